@@ -14,19 +14,30 @@
 # in the config file supplied as an argument.  If the Org does not exist it
 # does nothing.
 #
+# The contents of the Org are deleted concurrently in dependency order by
+# pyvcloud.vcd.tenant.TenantTeardown.  If some deletion fails, fix the cause
+# and run the procedure again, it resumes with whatever is left.
+#
 # Usage: python3 tenant-remove.py tenant.yaml
 
-from collections import namedtuple
 import requests
 import sys
 import yaml
 
-# Private utility functions.
-from tenantlib import handle_task
-
 from pyvcloud.vcd.client import BasicLoginCredentials
 from pyvcloud.vcd.client import Client
-from pyvcloud.vcd.system import System
+from pyvcloud.vcd.operation_graph import OperationStatus
+from pyvcloud.vcd.tenant import TenantTeardown
+
+
+def _report(operation):
+    """Print the outcome of each teardown operation"""
+    if operation.status == OperationStatus.FAILED:
+        print("{0}: {1} ({2})".format(operation.name, operation.status.value,
+                                      operation.error))
+    else:
+        print("{0}: {1}".format(operation.name, operation.status.value))
+
 
 # Collect arguments.
 if len(sys.argv) != 2:
@@ -34,10 +45,9 @@ if len(sys.argv) != 2:
     sys.exit(1)
 config_yaml = sys.argv[1]
 
-# Load the YAML configuration and convert to an object with properties.
+# Load the YAML configuration.
 with open(config_yaml, "r") as config_file:
     config_dict = yaml.safe_load(config_file)
-    cfg = namedtuple('ConfigObject', config_dict.keys())(**config_dict)
 
 # Disable warnings from self-signed certificates.
 requests.packages.urllib3.disable_warnings()
@@ -45,30 +55,28 @@ requests.packages.urllib3.disable_warnings()
 # Login. SSL certificate verification is turned off to allow self-signed
 # certificates.  You should only do this in trusted environments.
 print("Logging in...")
-client = Client(cfg.vcd_host, verify_ssl_certs=False,
+client = Client(config_dict['vcd_host'], verify_ssl_certs=False,
                 log_file='pyvcloud.log',
                 log_requests=True,
                 log_headers=True,
                 log_bodies=True)
-client.set_credentials(BasicLoginCredentials(cfg.vcd_admin_user, "System",
-                       cfg.vcd_admin_password))
+client.set_credentials(BasicLoginCredentials(
+    config_dict['vcd_admin_user'], "System",
+    config_dict['vcd_admin_password']))
 
-# Load the org.  If it does not exist, there's nothing to do.
-print("Fetching Org...")
-try:
-    org_record = client.get_org_by_name(cfg.org)
-except Exception:
-    print("Org does not exist, nothing to be done")
-    sys.exit(0)
-
-# Delete the org.
-print("Org exists, deleting: {0}".format(cfg.org))
-sys_admin_resource = client.get_admin()
-system = System(client, admin_resource=sys_admin_resource)
-resource = system.delete_org(cfg.org, True, True)
-handle_task(client, resource)
-print("Deleted the org...")
+# Delete the org along with everything it contains.
+org_name = config_dict['org']
+if isinstance(org_name, dict):
+    org_name = org_name['name']
+print("Tearing down org: {0}".format(org_name))
+teardown = TenantTeardown(client, org_name, delete_org=True)
+graph = teardown.run(callback=_report)
 
 # Log out.
-print("All done!")
 client.logout()
+failed = [op.name for op in graph.list_operations()
+          if op.status in (OperationStatus.FAILED, OperationStatus.BLOCKED)]
+if failed:
+    print("Not deleted: {0}".format(", ".join(failed)))
+    sys.exit(1)
+print("All done!")
@@ -24,6 +24,7 @@ from pyvcloud.vcd.client import ResourceType
 from pyvcloud.vcd.exceptions import MissingRecordException
 from pyvcloud.vcd.exceptions import MultipleRecordsException
 from pyvcloud.vcd.exceptions import OperationNotSupportedException
+from pyvcloud.vcd.utils import records_to_dict
 from pyvcloud.vcd.utils import to_dict
 
 
@@ -56,7 +57,7 @@ class APIExtension(object):
             msg = 'User doesn\'t have permission to view extensions.'
             raise OperationNotSupportedException(msg)
 
-        return [to_dict(r, self.ATTRIBUTES) for r in records]
+        return records_to_dict(records, self.ATTRIBUTES)
 
     def _get_extension_record(self,
                               name,
@@ -22,6 +22,7 @@ import json
 import os
 import re
 import tempfile
+import threading
 
 from dateutil.parser import parse
 from six import integer_types
@@ -61,6 +62,10 @@ class ApiHelper(object):
         'datetime': datetime,
         'object': object,
     }
+    # compiled per type, and shared by all helpers
+    _deserializers = {}
+    _serialized_fields = {}
+    _compile_lock = threading.Lock()
 
     def __init__(self):
         """Constructor of the class."""
@@ -115,21 +120,33 @@ class ApiHelper(object):
                 return obj.value
 
             obj_dict = {}
-            cls_tree = list(inspect.getmro(obj.__class__))
-            cls_tree.remove(object)
-            for cls in cls_tree:
-                current_dict = {
-                    cls.attribute_map[attr]: getattr(obj, attr)
-                    for attr, _ in iteritems(cls.swagger_types)
-                    if hasattr(obj, attr) and getattr(obj, attr) is not None
-                }
-                obj_dict.update(current_dict)
+            for attr, key in self._get_serialized_fields(obj.__class__):
+                value = getattr(obj, attr, None)
+                if value is not None:
+                    obj_dict[key] = value
 
         return {
             key: self.sanitize_for_serialization(val)
             for key, val in iteritems(obj_dict)
         }
 
+    def _get_serialized_fields(self, klass):
+        """Returns the attributes of a model class and their json keys.
+
+        The fields are computed once per class, across its whole class tree.
+
+        :param klass: model class.
+        :return: list of tuples of attribute name and json key.
+        """
+        fields = self._serialized_fields.get(klass)
+        if fields is None:
+            fields = []
+            for cls in _get_class_tree(klass):
+                fields.extend((attr, cls.attribute_map[attr])
+                              for attr in cls.swagger_types)
+            self._serialized_fields[klass] = fields
+        return fields
+
     def deserialize(self, response, response_type):
         """Deserializes response into an object.
 
@@ -162,50 +179,111 @@ class ApiHelper(object):
         """
         if data is None:
             return None
+        return self._get_deserializer(klass)(data)
 
-        if type(klass) == str:
+    def _get_deserializer(self, klass):
+        """Returns the compiled deserializer of a type.
+
+        Deserializers are compiled once per type, and shared by all helpers.
+
+        :param klass: class literal, or string of class name.
+        :return: function with signature function(data) returning the
+            deserialized object.
+        """
+        deserializer = self._deserializers.get(klass)
+        if deserializer is None:
+            with self._compile_lock:
+                # deserializers are published once complete, so that other
+                # threads never use a model deserializer being compiled
+                compiling = {}
+                deserializer = self.__compile(klass, compiling)
+                self._deserializers.update(compiling)
+        return deserializer
+
+    def __compile(self, klass, compiling):
+        """Compiles the deserializer of a type.
+
+        :param klass: class literal, or string of class name.
+        :param dict compiling: deserializers compiled by the ongoing
+            compilation, keyed by type.
+        :return: function with signature function(data).
+        """
+        deserializer = self._deserializers.get(klass) or compiling.get(klass)
+        if deserializer is not None:
+            return deserializer
+
+        key = klass
+        if isinstance(klass, str):
             if klass.startswith('list['):
                 sub_kls = re.match(r'list\[(.*)\]', klass).group(1)
-                return [
-                    self.__deserialize(sub_data, sub_kls) for sub_data in data
-                ]
-
-            if klass.startswith(r'dict('):
+                deserializer = self.__compile_list(
+                    self.__compile(sub_kls, compiling))
+            elif klass.startswith(r'dict('):
                 sub_kls = re.match(r'dict\(([^,]*), (.*)\)', klass).group(2)
-                return {
-                    k: self.__deserialize(v, sub_kls)
-                    for k, v in iteritems(data)
-                }
-
-            # convert str to class
-            if klass in self.NATIVE_TYPES_MAPPING:
-                klass = self.NATIVE_TYPES_MAPPING[klass]
+                deserializer = self.__compile_dict(
+                    self.__compile(sub_kls, compiling))
             else:
-                if hasattr(models, klass):
-                    klass = getattr(models, klass)
-                elif hasattr(schema_v1_5, klass):
-                    klass = getattr(schema_v1_5, klass)
-                elif hasattr(extension, klass):
-                    klass = getattr(extension, klass)
-                elif hasattr(ovf, klass):
-                    klass = getattr(ovf, klass)
-                elif hasattr(versioning, klass):
-                    klass = getattr(versioning, klass)
-                elif hasattr(environment, klass):
-                    klass = getattr(environment, klass)
-                elif hasattr(vmware, klass):
-                    klass = getattr(vmware, klass)
+                klass = self.__resolve_class(klass)
+                if isinstance(klass, str):
+                    deserializer = self.__compile_unknown(klass)
+                else:
+                    deserializer = self.__compile(klass, compiling)
+            compiling[key] = deserializer
+            return deserializer
 
         if klass in self.PRIMITIVE_TYPES:
-            return self.__deserialize_primitive(data, klass)
+            deserializer = self.__compile_primitive(klass)
         elif klass == object:
-            return self.__deserialize_object(data)
+            deserializer = self.__deserialize_object
         elif klass == date:
-            return self.__deserialize_date(data)
+            deserializer = self.__deserialize_date
         elif klass == datetime:
-            return self.__deserialize_datatime(data)
+            deserializer = self.__deserialize_datatime
         else:
-            return self.__deserialize_model(data, klass)
+            deserializer = self.__compile_model(klass, compiling)
+        compiling[key] = deserializer
+        return deserializer
+
+    def __resolve_class(self, name):
+        """Finds a model class by name.
+
+        :param str name: name of the class.
+        :return: the class, or name if there is no such class.
+        """
+        if name in self.NATIVE_TYPES_MAPPING:
+            return self.NATIVE_TYPES_MAPPING[name]
+        for module in (models, schema_v1_5, extension, ovf, versioning,
+                       environment, vmware):
+            if hasattr(module, name):
+                return getattr(module, name)
+        return name
+
+    def __compile_list(self, deserialize_item):
+        def deserialize_list(data):
+            return [
+                None if item is None else deserialize_item(item)
+                for item in data
+            ]
+        return deserialize_list
+
+    def __compile_dict(self, deserialize_value):
+        def deserialize_dict(data):
+            return {
+                k: None if v is None else deserialize_value(v)
+                for k, v in iteritems(data)
+            }
+        return deserialize_dict
+
+    def __compile_unknown(self, name):
+        # only fails if some data of that type has to be deserialized
+        def deserialize_unknown(data):
+            raise ClientException("Unknown type `{0}`".format(name))
+        return deserialize_unknown
+
+    def __compile_primitive(self, klass):
+        def deserialize_primitive(data):
+            return self.__deserialize_primitive(data, klass)
+        return deserialize_primitive
 
     def __deserialize_file(self, response):
         """Saves response body into a file.
@@ -283,38 +361,63 @@ class ApiHelper(object):
             raise ClientException(
                 "Failed to parse `{0}` into a datetime object".format(string))
 
-    def __deserialize_model(self, data, klass):
-        """Deserializes list or dict to model.
+    def __compile_model(self, klass, compiling):
+        """Compiles the deserializer of a model class.
+
+        The fields of the class tree, their json keys and their compiled
+        deserializers are resolved once, the returned function only maps
+        values.
 
-        :param data: dict, list.
         :param klass: class literal.
-        :return: model object.
+        :param dict compiling: deserializers compiled by the ongoing
+            compilation, keyed by type.
+        :return: function with signature function(data) returning a model
+            object.
         """
         if 'EnumMeta' == type(klass).__name__:
-            return klass(data)
+            return klass
         if not klass.swagger_types:
-            return data
+            return self.__deserialize_object
 
         if klass == QueryResultRecordType:
-            record_type = data.get('_type')
-            klass = getattr(schema_v1_5, record_type)
-
-        kwargs = {}
-        cls_tree = list(inspect.getmro(klass))
-        cls_tree.remove(object)
-        for cls in cls_tree:
-            for attr, attr_type in iteritems(cls.swagger_types):
-                if data is not None and cls.attribute_map[
-                        attr] in data and isinstance(data, (list, dict)):
-                    value = data[cls.attribute_map[attr]]
-                    kwargs[attr] = self.__deserialize(value, attr_type)
-
-        instance = None
-        if hasattr(models, klass.__name__):
-            instance = klass(**kwargs)
-        else:
+            def deserialize_record(data):
+                record_type = data.get('_type')
+                return self._get_deserializer(getattr(schema_v1_5,
+                                                      record_type))(data)
+            return deserialize_record
+
+        fields = []
+
+        def deserialize_model(data):
+            kwargs = {}
+            if isinstance(data, dict):
+                for attr, key, deserialize_value in fields:
+                    if key in data:
+                        value = data[key]
+                        kwargs[attr] = None if value is None else \
+                            deserialize_value(value)
+
+            if use_kwargs:
+                return klass(**kwargs)
             instance = klass()
             for key in kwargs:
                 setattr(instance, key, kwargs[key])
+            return instance
+
+        use_kwargs = hasattr(models, klass.__name__)
+        # registered before the fields are compiled, as models may refer to
+        # themselves
+        compiling[klass] = deserialize_model
+        for cls in _get_class_tree(klass):
+            for attr, attr_type in iteritems(cls.swagger_types):
+                field = (attr, cls.attribute_map[attr],
+                         self.__compile(attr_type, compiling))
+                if field not in fields:
+                    fields.append(field)
+        return deserialize_model
+
 
-        return instance
+def _get_class_tree(klass):
+    cls_tree = list(inspect.getmro(klass))
+    cls_tree.remove(object)
+    return cls_tree
@@ -0,0 +1,238 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+from collections import deque
+import json
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from pyvcloud.vcd.client import Client
+from pyvcloud.vcd.exceptions import RequestNotRecordedException
+
+
+class RecordingTransport(object):
+    """Records the requests sent by clients to a cassette file.
+
+    Used as the transport of clients, see Client, it sends requests through
+    another transport and appends every exchange to the cassette as a line
+    of JSON: method, url and headers of the request, status, headers, body
+    and latency of the response. Authentication headers are redacted like in
+    the logs, and request bodies are not recorded.
+
+        transport = RecordingTransport('sweep.cassette')
+        client = Client('vcd.example.com', transport=transport)
+        ...
+        transport.close()
+
+    The cassette can then be replayed with a ReplayTransport.
+    """
+
+    def __init__(self, path, transport=None):
+        """Constructor for RecordingTransport objects.
+
+        :param str path: path of the cassette file, overwritten if it exists.
+        :param transport: transport the requests are sent through, defaults
+            to requests.Session.
+        """
+        self.path = path
+        self._transport = transport or requests.Session
+        self._lock = threading.Lock()
+        self._file = open(path, 'w')
+
+    def __call__(self):
+        return _RecordingSession(self, self._transport())
+
+    def close(self):
+        """Closes the cassette file."""
+        with self._lock:
+            self._file.close()
+
+    def _record(self, method, url, response, elapsed):
+        entry = {
+            'method': method,
+            'url': url,
+            'request_headers': Client._redact_headers(
+                response.request.headers),
+            'status': response.status_code,
+            'headers': Client._redact_headers(response.headers),
+            'elapsed': round(elapsed, 6)
+        }
+        content = response.content or b''
+        try:
+            entry['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_b64'] = base64.b64encode(content).decode('ascii')
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+
+class ReplayTransport(object):
+    """Serves the requests of clients from a cassette, without vCD.
+
+    Requests are matched by method and url. Requests sent several times get
+    the recorded responses in order, the last one being served again once
+    they are exhausted, e.g. to a client polling a task more often than when
+    the cassette was recorded. Responses are delayed by their recorded
+    latency times latency_scale.
+
+        transport = ReplayTransport('sweep.cassette', latency_scale=0)
+        client = Client('vcd.example.com', transport=transport)
+    """
+
+    def __init__(self, path, latency_scale=1.0):
+        """Constructor for ReplayTransport objects.
+
+        :param str path: path of a cassette file written by a
+            RecordingTransport.
+        :param float latency_scale: factor applied to the recorded latencies,
+            0 to serve responses right away.
+        """
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._responses = {}
+        self._requests = 0
+        self._unplayed = 0
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses.setdefault(
+                        (entry['method'], entry['url']),
+                        deque()).append(entry)
+                    self._unplayed += 1
+
+    def __call__(self):
+        return _ReplaySession(self)
+
+    def close(self):
+        pass
+
+    def get_stats(self):
+        """Returns statistics about the replayed requests.
+
+        :return: number of requests served, and of recorded exchanges not
+            served yet.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {'requests': self._requests, 'unplayed': self._unplayed}
+
+    def _replay(self, method, url):
+        with self._lock:
+            queue = self._responses.get((method, url))
+            if not queue:
+                raise RequestNotRecordedException(
+                    'Request %s %s not found in the cassette.' %
+                    (method, url))
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+            self._requests += 1
+            if not entry.get('played'):
+                entry['played'] = True
+                self._unplayed -= 1
+        delay = entry['elapsed'] * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+        return _ReplayedResponse(entry)
+
+
+def _get_url(url, params):
+    """Returns the url of a request including its query parameters."""
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+class _RecordingSession(object):
+    def __init__(self, recorder, session):
+        self._recorder = recorder
+        self._session = session
+
+    @property
+    def headers(self):
+        return self._session.headers
+
+    def request(self, method, url, params=None, **kwargs):
+        start = time.monotonic()
+        response = self._session.request(
+            method, url, params=params, **kwargs)
+        self._recorder._record(method, _get_url(url, params), response,
+                               time.monotonic() - start)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def close(self):
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _ReplaySession(object):
+    def __init__(self, player):
+        self.headers = CaseInsensitiveDict()
+        self._player = player
+
+    def request(self, method, url, params=None, **kwargs):
+        return self._player._replay(method, _get_url(url, params))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _ReplayedResponse(object):
+    """Recorded response with the interface of requests.Response."""
+
+    def __init__(self, entry):
+        self.status_code = entry['status']
+        self.headers = CaseInsensitiveDict(entry['headers'])
+        self.url = entry['url']
+        self.request = requests.Request(entry['method'], entry['url'],
+                                        headers=entry['request_headers'])
+        if 'body_b64' in entry:
+            self.content = base64.b64decode(entry['body_b64'])
+        else:
+            self.content = entry['body'].encode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
@@ -13,14 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import timedelta
 from enum import Enum
+from itertools import islice
 import json
 import logging
-import logging.handlers as handlers
-from pathlib import Path
 import sys
+import threading
 import time
 import urllib
 
@@ -28,21 +31,34 @@ from lxml import etree
 from lxml import objectify
 import requests
 
+from pyvcloud.vcd import tracing
 from pyvcloud.vcd.vcd_api_version import VCDApiVersion
 from pyvcloud.vcd.exceptions import AccessForbiddenException, \
     BadRequestException, ClientException, ConflictException, \
     EntityNotFoundException, InternalServerException, \
-    InvalidContentLengthException, MethodNotAllowedException, \
+    InvalidContentLengthException, InvalidParameterException, \
+    MethodNotAllowedException, \
     MissingLinkException, MissingRecordException, MultipleLinksException, \
     MultipleRecordsException, NotAcceptableException, NotFoundException, \
     OperationNotSupportedException, RequestTimeoutException,\
     TaskTimeoutException, UnauthorizedException, UnknownApiException, \
     UnsupportedMediaTypeException, VcdException, VcdResponseException, \
     VcdTaskException  # NOQA
+from pyvcloud.vcd.rate_limiter import DEFAULT_RETRY_AFTER_SEC
+from pyvcloud.vcd.rate_limiter import EndpointClass
+from pyvcloud.vcd.rate_limiter import get_endpoint_class
+from pyvcloud.vcd.rate_limiter import parse_retry_after
+from pyvcloud.vcd.request_scheduler import RequestPriority
+from pyvcloud.vcd.sdk_logging import get_file_logger
+from pyvcloud.vcd.sdk_logging import truncate_body
 
 SIZE_1MB = 1024 * 1024
+
+DEFAULT_LOG_BODY_LIMIT = 64 * 1024
 SYSTEM_ORG_NAME = 'system'
 ALPHA_API_SUBSTRING = "alpha"
+# maximum number of concurrent requests issued by a single query operation
+DEFAULT_QUERY_MAX_WORKERS = 8
 
 NSMAP = {
     'ns10':
@@ -368,6 +384,22 @@ class ResourceType(Enum):
 
 RESOURCE_TYPES = [r.value for r in ResourceType]
 
+# resource types looked up by Client.search() by default
+SEARCH_RESOURCE_TYPES = [
+    ResourceType.VAPP, ResourceType.VM, ResourceType.VAPP_TEMPLATE,
+    ResourceType.CATALOG_ITEM, ResourceType.MEDIA, ResourceType.DISK,
+    ResourceType.CATALOG, ResourceType.ORG_VDC
+]
+ADMIN_SEARCH_RESOURCE_TYPES = [
+    ResourceType.ADMIN_VAPP, ResourceType.ADMIN_VM,
+    ResourceType.ADMIN_VAPP_TEMPLATE, ResourceType.ADMIN_CATALOG_ITEM,
+    ResourceType.ADMIN_MEDIA, ResourceType.ADMIN_DISK,
+    ResourceType.ADMIN_CATALOG, ResourceType.ADMIN_ORG_VDC
+]
+DEFAULT_SEARCH_PAGE_SIZE = 25
+
+_FILTER_OPERATORS = ('==', '!=', '=lt=', '=le=', '=gt=', '=ge=')
+
 
 class EntityType(Enum):
     ADMIN = 'application/vnd.vmware.admin.vcloud+xml'
@@ -582,6 +614,15 @@ class MetadataValueType(Enum):
     DATA_TIME = 'MetadataDateTimeValue'
 
 
+# type prefixes of metadata values in query filters, e.g. NUMBER:42
+_METADATA_FILTER_TYPES = {
+    MetadataValueType.STRING: 'STRING',
+    MetadataValueType.NUMBER: 'NUMBER',
+    MetadataValueType.BOOLEAN: 'BOOLEAN',
+    MetadataValueType.DATA_TIME: 'DATETIME'
+}
+
+
 class TaskStatus(Enum):
     QUEUED = 'queued'
     PRE_RUNNING = 'preRunning'
@@ -661,21 +702,26 @@ class _TaskMonitor(object):
             _fail_on_statuses = fail_on_statuses
         task_href = task.get('href')
         start_time = datetime.now()
-        while True:
-            task = self._get_task_status(task_href)
-            if callback is not None:
-                callback(task)
-            task_status = task.get('status').lower()
-            for status in expected_target_statuses:
-                if task_status == status.value.lower():
-                    return task
-            for status in _fail_on_statuses:
-                if task_status == status.value.lower():
-                    raise VcdTaskException(task_status, task.Error)
-            if start_time - datetime.now() > timedelta(seconds=timeout):
-                break
-            time.sleep(poll_frequency)
-        raise TaskTimeoutException("Task timeout")
+        with tracing.start_span('TaskMonitor.wait_for_status',
+                                {'vcd.task_href': task_href}) as span:
+            tracing.set_attribute(span, 'vcd.task_operation',
+                                  task.get('operationName'))
+            while True:
+                task = self._get_task_status(task_href)
+                if callback is not None:
+                    callback(task)
+                task_status = task.get('status').lower()
+                tracing.set_attribute(span, 'vcd.task_status', task_status)
+                for status in expected_target_statuses:
+                    if task_status == status.value.lower():
+                        return task
+                for status in _fail_on_statuses:
+                    if task_status == status.value.lower():
+                        raise VcdTaskException(task_status, task.Error)
+                if start_time - datetime.now() > timedelta(seconds=timeout):
+                    break
+                time.sleep(poll_frequency)
+            raise TaskTimeoutException("Task timeout")
 
     def _get_task_status(self, task_href):
         return self._client.get_resource(task_href)
@@ -750,6 +796,21 @@ class Client(object):
     :param boolean log_request: if True log HTTP requests.
     :param boolean log_headers: if True log HTTP headers.
     :param boolean log_bodies: if True log HTTP bodies.
+    :param int log_body_limit: maximum number of bytes of each HTTP body
+        logged, None to log whole bodies.
+    :param pyvcloud.vcd.rate_limiter.AdaptiveRateLimiter rate_limiter: if
+        set, requests are throttled by the limiter, which may be shared with
+        other clients, and requests throttled by vCD are retried once the
+        limiter allows.
+    :param pyvcloud.vcd.request_scheduler.RequestScheduler request_scheduler:
+        if set, requests are sent in the order of their priority, see
+        request_priority().
+    :param pyvcloud.vcd.hedging.HedgingPolicy hedging_policy: if set, slow
+        GET requests are hedged as per the policy, see get_stats().
+    :param transport: callable returning a new http session, called for
+        every login, e.g. a pyvcloud.vcd.http2_transport.Http2Transport to
+        multiplex requests over a few HTTP/2 connections. Defaults to
+        requests.Session.
     """
 
     _HEADER_ACCEPT_NAME = 'Accept'
@@ -759,6 +820,7 @@ class Client(object):
     _HEADER_CONTENT_RANGE_NAME = 'Content-Range'
     _HEADER_CONTENT_TYPE_NAME = 'Content-Type'
     _HEADER_REQUEST_ID_NAME = 'X-VMWARE-VCLOUD-REQUEST-ID'
+    _HEADER_RETRY_AFTER_NAME = 'Retry-After'
     _HEADER_X_VCLOUD_AUTH_NAME = 'x-vcloud-authorization'
     _HEADER_X_VMWARE_CLOUD_ACCESS_TOKEN_NAME = 'x-vmware-vcloud-access-token'
 
@@ -770,8 +832,14 @@ class Client(object):
         _HEADER_X_VMWARE_CLOUD_ACCESS_TOKEN_NAME
     ]
 
+    _HEADERS_TO_REDACT_LOWER = [name.lower() for name in _HEADERS_TO_REDACT]
+
     _UPLOAD_FRAGMENT_MAX_RETRIES = 5
 
+    # status codes vCD answers with when it is overloaded
+    _THROTTLING_STATUS_CODES = (requests.codes.too_many_requests,
+                                requests.codes.service_unavailable)
+
     def _prep_base_uri(self, uri, is_cloudapi=False):
         result = uri
         if len(result) > 0:
@@ -794,13 +862,19 @@ class Client(object):
                  log_file=None,
                  log_requests=False,
                  log_headers=False,
-                 log_bodies=False):
+                 log_bodies=False,
+                 log_body_limit=DEFAULT_LOG_BODY_LIMIT,
+                 rate_limiter=None,
+                 request_scheduler=None,
+                 hedging_policy=None,
+                 transport=None):
         self._logger = None
         self._get_default_logger(file_name=log_file)
 
         self._log_requests = log_requests
         self._log_headers = log_headers
         self._log_bodies = log_bodies
+        self._log_body_limit = log_body_limit
         self._verify_ssl_certs = verify_ssl_certs
 
         self.fsencoding = sys.getfilesystemencoding()
@@ -822,6 +896,12 @@ class Client(object):
 
         self._is_sysadmin = False
 
+        self._rate_limiter = rate_limiter
+        self._request_scheduler = request_scheduler
+        self._thread_local = threading.local()
+        self._hedging_policy = hedging_policy
+        self._transport = transport or requests.Session
+
     def _get_default_logger(self, file_name="vcd_pysdk.log",
                             log_level=logging.DEBUG,
                             max_bytes=30000000, backup_count=30):
@@ -849,22 +929,13 @@ class Client(object):
         """
         if file_name is None:
             file_name = "vcd_pysdk.log"
-        self._logger = logging.getLogger(file_name)
+        formatter = logging.Formatter(
+            fmt='%(asctime)s | %(module)s:%(lineno)s - %(funcName)s '
+                '| %(levelname)s :: %(message)s',
+            datefmt='%y-%m-%d %H:%M:%S')
+        self._logger = get_file_logger(file_name, file_name, log_level,
+                                       max_bytes, backup_count, formatter)
         self._logger.setLevel(log_level)
-        file = Path(file_name)
-        if not file.exists():
-            file.parent.mkdir(parents=True, exist_ok=True)
-        if not self._logger.handlers:
-            log_handler = handlers.RotatingFileHandler(
-                filename=file_name, maxBytes=max_bytes,
-                backupCount=backup_count)
-            formatter = logging.Formatter(
-                fmt='%(asctime)s | %(module)s:%(lineno)s - %(funcName)s '
-                    '| %(levelname)s :: %(message)s',
-                datefmt='%y-%m-%d %H:%M:%S')
-            log_handler.setFormatter(formatter)
-            log_handler.setLevel(log_level)
-            self._logger.addHandler(log_handler)
 
     def _negotiate_api_version(self):
         """Negotiate the API version to use with VCD.
@@ -936,7 +1007,7 @@ class Client(object):
 
         :rtype: list
         """
-        with requests.Session() as new_session:
+        with self._transport() as new_session:
             # Use with block to avoid leaking socket connections.
             response = self._do_request_prim(
                 'GET',
@@ -1024,7 +1095,7 @@ class Client(object):
 
         # Ensure we close session if any exception is thrown to avoid leaking
         # a socket connection.
-        new_session = requests.Session()
+        new_session = self._transport()
         try:
             # Use /cloudapi/1.0.0/sessions for Xendi and beyond i.e. api v33+
             # otherwise use /api/sessions
@@ -1104,7 +1175,7 @@ class Client(object):
         self._negotiate_api_version()
         self._logger.debug('API version in use: %s' % self._api_version)
 
-        new_session = requests.Session()
+        new_session = self._transport()
         try:
             if is_jwt_token:
                 self._vcloud_access_token = token
@@ -1238,6 +1309,67 @@ class Client(object):
             self._task_monitor = _TaskMonitor(self)
         return self._task_monitor
 
+    def get_stats(self):
+        """Returns statistics about the requests sent by the client.
+
+        :return: statistics of hedged requests under the key 'hedging', if
+            the client has a hedging policy, see HedgingPolicy.get_stats().
+
+        :rtype: dict
+        """
+        stats = {}
+        if self._hedging_policy is not None:
+            stats['hedging'] = self._hedging_policy.get_stats()
+        return stats
+
+    @contextmanager
+    def request_priority(self, priority):
+        """Sets the priority of the requests sent by the current thread.
+
+        Only used if the client has a request scheduler. Requests sent by
+        other threads, including the worker threads of concurrent helpers
+        started within the block, keep their own priority.
+
+            with client.request_priority(RequestPriority.LOW):
+                records = list(query.execute())
+
+        :param pyvcloud.vcd.request_scheduler.RequestPriority priority:
+            priority of the requests sent within the block.
+        """
+        previous = getattr(self._thread_local, 'priority', None)
+        self._thread_local.priority = priority
+        try:
+            yield
+        finally:
+            self._thread_local.priority = previous
+
+    def get_request_priority(self):
+        """Returns the priority of the requests sent by the current thread.
+
+        :return: the priority set by request_priority(), NORMAL by default.
+
+        :rtype: pyvcloud.vcd.request_scheduler.RequestPriority
+        """
+        priority = getattr(self._thread_local, 'priority', None)
+        return priority or RequestPriority.NORMAL
+
+    @contextmanager
+    def _scheduled(self, priority=None):
+        """Waits for the request scheduler to allow sending a request.
+
+        :param RequestPriority priority: priority of the request, defaults to
+            the priority of the current thread.
+        """
+        if self._request_scheduler is None:
+            yield
+            return
+        self._request_scheduler.acquire(
+            priority or self.get_request_priority())
+        try:
+            yield
+        finally:
+            self._request_scheduler.release()
+
     def _do_request(self,
                     method,
                     uri,
@@ -1245,15 +1377,34 @@ class Client(object):
                     media_type=None,
                     objectify_results=True,
                     params=None,
-                    extra_headers=None):
-        response = self._do_request_prim(
-            method,
-            uri,
-            self._session,
-            contents=contents,
-            media_type=media_type,
-            params=params,
-            extra_headers=extra_headers)
+                    extra_headers=None,
+                    priority=None):
+        def send(request_uri):
+            # headers are copied, hedged requests may be sent concurrently
+            headers = dict(extra_headers) if extra_headers else None
+            if self._rate_limiter is None:
+                return self._do_request_prim(
+                    method,
+                    request_uri,
+                    self._session,
+                    contents=contents,
+                    media_type=media_type,
+                    params=params,
+                    extra_headers=headers)
+            return self._do_limited_request(
+                method,
+                request_uri,
+                contents=contents,
+                media_type=media_type,
+                params=params,
+                extra_headers=headers)
+
+        with self._scheduled(priority):
+            # only idempotent requests can safely be sent twice
+            if self._hedging_policy is not None and method == 'GET':
+                response = self._hedging_policy.send(uri, send)
+            else:
+                response = send(uri)
 
         sc = response.status_code
         if sc in (requests.codes.ok,
@@ -1266,6 +1417,66 @@ class Client(object):
             sc, self._get_response_request_id(response),
             _objectify_response(response, objectify_results))
 
+    def _do_limited_request(self, method, uri, **kwargs):
+        """Sends a request once the rate limiter allows it.
+
+        Requests throttled by vCD are retried, after the delay requested by
+        vCD, up to the number of retries allowed by the rate limiter.
+
+        :param str method: http method of the request.
+        :param str uri: uri of the request.
+        :param kwargs: other arguments of _do_request_prim().
+
+        :return: the response of the last attempt.
+
+        :rtype: requests.Response
+        """
+        endpoint_class = get_endpoint_class(method, uri)
+        attempt = 0
+        while True:
+            response = self._send_limited(
+                endpoint_class,
+                lambda: self._do_request_prim(
+                    method, uri, self._session, **kwargs))
+            if response.status_code not in self._THROTTLING_STATUS_CODES \
+                    or attempt >= self._rate_limiter.max_retries:
+                return response
+            attempt += 1
+            self._logger.debug(
+                'Request %s %s throttled with status code %s, retry #%s.' %
+                (method, uri, response.status_code, attempt))
+
+    def _send_limited(self, endpoint_class, send):
+        """Sends a request within the budget of the rate limiter.
+
+        :param EndpointClass endpoint_class: class of the request.
+        :param function send: function without arguments sending the request
+            and returning the response.
+
+        :return: the response.
+
+        :rtype: requests.Response
+        """
+        overloaded = False
+        retry_after = None
+        self._rate_limiter.acquire(endpoint_class)
+        try:
+            response = send()
+            if response.status_code in self._THROTTLING_STATUS_CODES:
+                retry_after = parse_retry_after(
+                    response.headers.get(self._HEADER_RETRY_AFTER_NAME))
+                if retry_after is None:
+                    retry_after = DEFAULT_RETRY_AFTER_SEC
+            # a conflict usually means the entity is busy with another task
+            overloaded = retry_after is not None or \
+                response.status_code == requests.codes.conflict
+            return response
+        except requests.exceptions.RequestException:
+            overloaded = True
+            raise
+        finally:
+            self._rate_limiter.release(endpoint_class, overloaded, retry_after)
+
     @staticmethod
     def _response_code_to_exception(sc, request_id, objectify_response):
         if sc == requests.codes.bad_request:
@@ -1305,53 +1516,55 @@ class Client(object):
 
         raise UnknownApiException(sc, request_id, objectify_response)
 
-    def _redact_headers(self, headers):
+    @classmethod
+    def _redact_headers(cls, headers):
         redacted_headers = {}
         for key, value in headers.items():
-            if key not in self._HEADERS_TO_REDACT:
+            # some transports lower case the header names
+            if key.lower() not in cls._HEADERS_TO_REDACT_LOWER:
                 redacted_headers[key] = value
             else:
                 redacted_headers[key] = "[REDACTED]"
         return redacted_headers
 
     def _log_request_sent(self, method, uri, headers={}, request_body=None):
-        if not self._log_requests:
+        if not self._log_requests or \
+                not self._logger.isEnabledFor(logging.DEBUG):
             return
 
-        self._logger.debug(f"Request uri {method}: {uri}")
+        self._logger.debug('Request uri %s: %s', method, uri)
 
         if self._log_headers:
-            self._logger.debug(f"Request partial headers: {self._redact_headers(headers)}")  # noqa: E501
+            self._logger.debug('Request partial headers: %s',
+                               self._redact_headers(headers))
 
         if self._log_bodies and request_body is not None:
-            if isinstance(request_body, str):
-                body = request_body
-            else:
-                body = request_body.decode(self.fsencoding)
-            self._logger.debug('Request body: %s' % body)
+            self._logger.debug(
+                'Request body: %s',
+                truncate_body(request_body, self._log_body_limit))
 
     def _log_request_response(self,
                               response,
                               skip_logging_response_body=False):
-        if not self._log_requests:
+        if not self._log_requests or \
+                not self._logger.isEnabledFor(logging.DEBUG):
             return
 
         if self._log_headers:
-            self._logger.debug(f"Request full headers: {self._redact_headers(response.request.headers)}")  # noqa: E501
+            self._logger.debug('Request full headers: %s',
+                               self._redact_headers(response.request.headers))
 
-        self._logger.debug('Response status code: %s' % response.status_code)
+        self._logger.debug('Response status code: %s', response.status_code)
 
         if self._log_headers:
-            self._logger.debug('Response headers: %s' % self._redact_headers(
-                response.headers))
+            self._logger.debug('Response headers: %s',
+                               self._redact_headers(response.headers))
 
         if self._log_bodies and not skip_logging_response_body and \
            _response_has_content(response):
-            if isinstance(response.content, str):
-                response_body = response.content
-            else:
-                response_body = response.content.decode(self.fsencoding)
-            self._logger.debug('Response body: %s' % response_body)
+            self._logger.debug(
+                'Response body: %s',
+                truncate_body(response.content, self._log_body_limit))
 
     def _do_request_prim(self,
                          method,
@@ -1383,19 +1596,23 @@ class Client(object):
             else:
                 data = etree.tostring(contents)
 
-        self._log_request_sent(
-            method=method, uri=uri, headers=headers, request_body=data)
+        with tracing.start_request_span(method, uri) as span:
+            tracing.inject_context(headers)
+            self._log_request_sent(
+                method=method, uri=uri, headers=headers, request_body=data)
 
-        response = session.request(
-            method,
-            uri,
-            params=params,
-            data=data,
-            headers=headers,
-            auth=auth,
-            verify=self._verify_ssl_certs)
+            response = session.request(
+                method,
+                uri,
+                params=params,
+                data=data,
+                headers=headers,
+                auth=auth,
+                verify=self._verify_ssl_certs)
 
-        self._log_request_response(response=response)
+            self._log_request_response(response=response)
+            tracing.set_response(span, response.status_code,
+                                 self._get_response_request_id(response))
 
         return response
 
@@ -1411,13 +1628,18 @@ class Client(object):
         # retry efforts fail, we will fail the upload completely and return.
         for attempt in range(1, self._UPLOAD_FRAGMENT_MAX_RETRIES + 1):
             try:
-                self._log_request_sent(method='PUT', uri=uri, headers=headers)
-                response = self._session.put(
-                    uri,
-                    data=data,
-                    headers=headers,
-                    verify=self._verify_ssl_certs)
-                self._log_request_response(response)
+                with tracing.start_request_span('PUT', uri) as span:
+                    tracing.inject_context(headers)
+                    self._log_request_sent(
+                        method='PUT', uri=uri, headers=headers)
+                    response = self._send_transfer(
+                        lambda: self._session.put(
+                            uri,
+                            data=data,
+                            headers=headers,
+                            verify=self._verify_ssl_certs))
+                    self._log_request_response(response)
+                    tracing.set_response(span, response.status_code, None)
 
                 sc = response.status_code
                 if sc != 200:
@@ -1436,16 +1658,31 @@ class Client(object):
                         'Reached max retry limit. Failing upload.')
                     raise
 
+    def _send_transfer(self, send):
+        with self._scheduled():
+            if self._rate_limiter is None:
+                return send()
+            return self._send_limited(EndpointClass.TRANSFER, send)
+
     def download_from_uri(self,
                           uri,
                           file_name,
                           chunk_size=SIZE_1MB,
                           size=0,
                           callback=None):
-        self._log_request_sent(method='GET', uri=uri)
-        response = self._session.get(
-            uri, stream=True, verify=self._verify_ssl_certs)
-        self._log_request_response(response, skip_logging_response_body=True)
+        headers = {}
+        with tracing.start_request_span('GET', uri) as span:
+            tracing.inject_context(headers)
+            self._log_request_sent(method='GET', uri=uri, headers=headers)
+            response = self._send_transfer(
+                lambda: self._session.get(
+                    uri,
+                    headers=headers,
+                    stream=True,
+                    verify=self._verify_ssl_certs))
+            self._log_request_response(response,
+                                       skip_logging_response_body=True)
+            tracing.set_response(span, response.status_code, None)
 
         sc = response.status_code
         if sc != 200:
@@ -1467,7 +1704,8 @@ class Client(object):
                      contents,
                      media_type,
                      params=None,
-                     objectify_results=True):
+                     objectify_results=True,
+                     priority=None):
         """Puts the specified contents to the specified resource.
 
         This method does an HTTP PUT.
@@ -1478,7 +1716,8 @@ class Client(object):
             contents=contents,
             media_type=media_type,
             objectify_results=objectify_results,
-            params=params)
+            params=params,
+            priority=priority)
 
     def put_linked_resource(self, resource, rel, media_type, contents):
         """Puts to a resource link.
@@ -1504,7 +1743,8 @@ class Client(object):
                       media_type,
                       params=None,
                       objectify_results=True,
-                      extra_headers=None):
+                      extra_headers=None,
+                      priority=None):
         """Posts to a resource link.
 
         Posts the specified contents to the specified resource. (Does an HTTP
@@ -1517,7 +1757,8 @@ class Client(object):
             media_type=media_type,
             objectify_results=objectify_results,
             params=params,
-            extra_headers=extra_headers)
+            extra_headers=extra_headers,
+            priority=priority)
 
     def post_linked_resource(self, resource, rel, media_type, contents,
                              extra_headers=None):
@@ -1540,14 +1781,14 @@ class Client(object):
                 "Operation is not supported").with_traceback(e.__traceback__)
 
     def get_resource(self, uri, params=None, objectify_results=True,
-                     extra_headers=None):
+                     extra_headers=None, priority=None):
         """Gets the specified contents to the specified resource.
 
         This method does an HTTP GET.
         """
         return self._do_request(
             'GET', uri, objectify_results=objectify_results, params=params,
-            extra_headers=extra_headers)
+            extra_headers=extra_headers, priority=priority)
 
     def get_linked_resource(self, resource, rel, media_type,
                             extra_headers=None):
@@ -1572,10 +1813,11 @@ class Client(object):
                 "Operation is not supported").with_traceback(e.__traceback__)
 
     def delete_resource(self, uri, params=None, force=False, recursive=False,
-                        extra_headers=None):
+                        extra_headers=None, priority=None):
         full_uri = '%s?force=%s&recursive=%s' % (uri, force, recursive)
         return self._do_request('DELETE', full_uri, params=params,
-                                extra_headers=extra_headers)
+                                extra_headers=extra_headers,
+                                priority=priority)
 
     def delete_linked_resource(self, resource, rel, media_type,
                                extra_headers=None):
@@ -1711,7 +1953,8 @@ class Client(object):
                         equality_filter=None,
                         sort_asc=None,
                         sort_desc=None,
-                        fields=None):
+                        fields=None,
+                        cursor_key=None):
         """Issue a typed query using vCD query API.
 
         :param str query_type_name: name of the entity, which should be a
@@ -1726,6 +1969,8 @@ class Client(object):
             Multiple sub expression can be joined using logical AND i.e. ;
             logical OR i.e. , etc. Each value in query string must be
             url-encoded. E.g. 'numberOfCpus=gt=4' , 'name==abc%20def'.
+            Sub expressions on metadata entries can be built with
+            get_metadata_filter().
         :param tuple equality_filter: a special filter that will be logically
             AND-ed to qfilter, with the operator being ==. The first element in
             the tuple is treated as filter name, while the second element is
@@ -1735,12 +1980,25 @@ class Client(object):
             ascending by that field.
         :param str sort_desc: if 'name' field is present in the result sort
             descending by that field.
-        :param str fields: comma separated list of fields to return.
+        :param str fields: comma separated list of fields to return. Metadata
+            entries can be requested with fields built by
+            get_metadata_field().
+        :param str cursor_key: name of a unique, sortable field e.g. 'id' or
+            'name' of entities unique by name. If set, execute() sweeps
+            through the results sorted ascending by that field, fetching each
+            batch with a '<cursor_key>=gt=<last value seen>' filter instead of
+            a page number. Cost per batch stays constant however deep the
+            sweep gets, and records created or deleted during the sweep don't
+            shift the remaining records across pages. Can't be combined with
+            page, sort_asc or sort_desc.
 
         :return: A query object that runs the query when execute()
             method is called.
 
         :rtype: pyvcloud.vcd.client._TypedQuery
+
+        :raises: InvalidParameterException: if cursor_key is combined with
+            page, sort_asc or sort_desc.
         """
         return _TypedQuery(
             query_type_name,
@@ -1753,7 +2011,130 @@ class Client(object):
             equality_filter=equality_filter,
             sort_asc=sort_asc,
             sort_desc=sort_desc,
-            fields=fields)
+            fields=fields,
+            cursor_key=cursor_key)
+
+    def search(self,
+               name_or_filter,
+               types=None,
+               orgs=None,
+               limit=None,
+               page_size=DEFAULT_SEARCH_PAGE_SIZE,
+               max_workers=DEFAULT_QUERY_MAX_WORKERS):
+        """Searches entities of several types at once.
+
+        One typed query per resource type, and per organization if orgs is
+        provided, is issued concurrently. Results are merged as the queries
+        complete and entities returned by more than one query are reported
+        once.
+
+        :param str name_or_filter: either the name of the entities to look
+            for, which may contain * wildcards e.g. 'web*', or a filter
+            expression as accepted by the qfilter parameter of
+            get_typed_query() e.g. 'name==web*;status==POWERED_ON'.
+        :param iterable types: resource types to look up, as ResourceType
+            members or names. Defaults to ADMIN_SEARCH_RESOURCE_TYPES for
+            system administrators and SEARCH_RESOURCE_TYPES for other users.
+        :param iterable orgs: names of the organizations to restrict the
+            search to. Only available to system administrators, who otherwise
+            search across all organizations.
+        :param int limit: if set, the search stops once that many entities
+            are found and pending queries are cancelled.
+        :param int page_size: number of entities fetched per request.
+        :param int max_workers: maximum number of concurrent queries.
+
+        :return: objects containing QueryResultFormat.REFERENCES XML data,
+            each with the href, name and type of an entity, in no particular
+            order.
+
+        :rtype: list
+
+        :raises: InvalidParameterException: if orgs is provided by an user
+            who is not a system administrator.
+        :raises: EntityNotFoundException: if one of the organizations can't
+            be found.
+        """
+        if types is None:
+            types = ADMIN_SEARCH_RESOURCE_TYPES if self.is_sysadmin() \
+                else SEARCH_RESOURCE_TYPES
+        types = [t.value if isinstance(t, ResourceType) else t for t in types]
+
+        if any(op in name_or_filter for op in _FILTER_OPERATORS):
+            qfilter = name_or_filter
+        else:
+            # keep wildcards as is, they would be matched literally if encoded
+            qfilter = 'name==%s' % urllib.parse.quote(name_or_filter,
+                                                      safe='*')
+
+        scopes = [qfilter]
+        if orgs is not None:
+            if not self.is_sysadmin():
+                raise InvalidParameterException(
+                    'Only system administrators can search across '
+                    'organizations.')
+            scopes = []
+            for org_href in self._get_org_hrefs(orgs):
+                org_filter = 'org==%s' % urllib.parse.quote(org_href)
+                # qfilter may OR sub expressions, hence the parentheses
+                scopes.append('(%s);%s' % (qfilter, org_filter))
+
+        if limit is not None:
+            page_size = min(page_size, limit)
+
+        def run_query(query_type_name, scope_filter):
+            query = self.get_typed_query(
+                query_type_name,
+                query_result_format=QueryResultFormat.REFERENCES,
+                page_size=page_size,
+                qfilter=scope_filter)
+            try:
+                return list(islice(query.execute(), limit))
+            except OperationNotSupportedException:
+                # the query isn't available to the logged in user
+                return []
+
+        result = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                executor.submit(run_query, query_type_name, scope_filter)
+                for query_type_name in types for scope_filter in scopes
+            ]
+            for future in as_completed(futures):
+                for record in future.result():
+                    result.setdefault(record.get('href'), record)
+                if limit is not None and len(result) >= limit:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=False)
+        return list(result.values())[:limit]
+
+    def _get_org_hrefs(self, org_names):
+        """Resolves organization names to hrefs.
+
+        :param iterable org_names: names of the organizations.
+
+        :return: hrefs of the organizations, in the same order as the names.
+
+        :rtype: list
+
+        :raises: EntityNotFoundException: if one of the organizations can't
+            be found.
+        """
+        orgs = self._get_wk_resource(_WellKnownEndpoint.ORG_LIST)
+        hrefs = {}
+        if hasattr(orgs, 'Org'):
+            for org in orgs.Org:
+                hrefs[org.get('name').lower()] = org.get('href')
+        result = []
+        for org_name in org_names:
+            if org_name.lower() not in hrefs:
+                raise EntityNotFoundException(
+                    'org \'%s\' not found' % org_name)
+            result.append(hrefs[org_name.lower()])
+        return result
 
     def _get_wk_resource(self, wk_type):
         return self.get_resource(self._get_wk_endpoint(wk_type))
@@ -1859,25 +2240,82 @@ def get_links(resource, rel=RelationType.DOWN, media_type=None, name=None):
 
     :rtype: list
     """
-    links = []
-    for link in resource.findall('{http://www.vmware.com/vcloud/v1.5}Link'):
-        link_rel = link.get('rel')
-        link_media_type = link.get('type')
-        link_name = link.get('name')
-        if name is not None and link_name != name:
-            continue
-        if link_rel == rel.value:
-            if media_type is None and link_media_type is None:
-                links.append(Link(link))
-            elif media_type is not None and \
-                    link_media_type == media_type:
-                links.append(Link(link))
-    return links
+    return [Link(link_elem) for link_elem in _LINK_XPATHS[
+        media_type is None, name is None](
+            resource, rel=rel.value, media_type=media_type, name=name)]
+
+
+def _compile_link_xpath(has_type, has_name):
+    predicates = ['@rel=$rel']
+    predicates.append('@type=$media_type' if has_type else 'not(@type)')
+    if has_name:
+        predicates.append('@name=$name')
+    return etree.XPath('v:Link[%s]' % ' and '.join(predicates),
+                       namespaces={'v': NSMAP['vcloud']})
+
+
+# links are matched by compiled XPath expressions, keyed by whether the
+# media type and the name of the links are unset, every lookup reads the
+# current attributes of the links
+_LINK_XPATHS = {(no_type, no_name): _compile_link_xpath(not no_type,
+                                                        not no_name)
+                for no_type in (False, True) for no_name in (False, True)}
+
+
+def get_metadata_field(key, domain=MetadataDomain.GENERAL):
+    """Returns the query field name of a metadata entry.
+
+    The field can be listed in the fields of a typed query, in which case
+    each query record carries a Metadata element with the matching entry, if
+    the entity has one.
+
+    :param str key: key of the metadata entry.
+    :param MetadataDomain domain: domain of the metadata entry.
+
+    :return: field name e.g. 'metadata:cost-center' or
+        'metadata@SYSTEM:cost-center'.
+
+    :rtype: str
+    """
+    if domain == MetadataDomain.SYSTEM:
+        return 'metadata@SYSTEM:' + urllib.parse.quote(key)
+    return 'metadata:' + urllib.parse.quote(key)
+
+
+def get_metadata_filter(key,
+                        value,
+                        value_type=MetadataValueType.STRING,
+                        domain=MetadataDomain.GENERAL,
+                        operator='=='):
+    """Returns a query filter sub expression on a metadata entry.
+
+    The result is url-encoded as expected by the qfilter parameter of typed
+    queries, and can be joined to other sub expressions with ; or ,.
+
+    :param str key: key of the metadata entry.
+    :param value: value to compare the metadata entry with.
+    :param MetadataValueType value_type: type of the metadata entry.
+    :param MetadataDomain domain: domain of the metadata entry.
+    :param str operator: comparison operator e.g. '==', '=gt=' or '=le='.
+
+    :return: filter sub expression e.g. 'metadata:rank=gt=NUMBER:3'.
+
+    :rtype: str
+    """
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return '%s%s%s:%s' % (get_metadata_field(key, domain), operator,
+                          _METADATA_FILTER_TYPES[value_type],
+                          urllib.parse.quote(str(value)))
 
 
 class Link(object):
     """Abstraction over <Link> elements."""
 
+    __slots__ = ('rel', 'media_type', 'href', 'name')
+
     def __init__(self, link_elem):
         self.rel = link_elem.get('rel')
         self.media_type = link_elem.get('type')
@@ -1899,7 +2337,8 @@ class _AbstractQuery(object):
                  equality_filter=None,
                  sort_asc=None,
                  sort_desc=None,
-                 fields=None):
+                 fields=None,
+                 cursor_key=None):
         """Constructor for _AbstractQuery object.
 
         :param QueryResultFormat query_result_format: format of query result.
@@ -1921,7 +2360,18 @@ class _AbstractQuery(object):
             order. attribute-name cannot include metadata.
         :param str fields: comma-separated list of attribute names or metadata
             key names to return
+        :param str cursor_key: name of a unique, sortable attribute used to
+            page through the results with a filter on the last value seen,
+            instead of a page number.
+
+        :raises: InvalidParameterException: if cursor_key is combined with
+            page, sort_asc or sort_desc.
         """
+        if cursor_key is not None and \
+                (page or sort_asc is not None or sort_desc is not None):
+            raise InvalidParameterException(
+                'cursor_key can\'t be combined with page, sort_asc or '
+                'sort_desc.')
         self._client = client
         self._query_result_format = query_result_format
         self._page_size = page_size
@@ -1956,6 +2406,13 @@ class _AbstractQuery(object):
 
         self.fields = fields
 
+        self._cursor_key = cursor_key
+        if cursor_key is not None:
+            self._sort_asc = cursor_key
+            if fields is not None and \
+                    cursor_key not in fields.split(','):
+                self.fields = fields + ',' + cursor_key
+
     def _escape_special_characters(self, single_encoded_value_string):
         """Escape vCD query specific special characters viz. ( ) ; ,.
 
@@ -1990,6 +2447,9 @@ class _AbstractQuery(object):
         if query_href is None:
             raise OperationNotSupportedException('Unable to execute query.')
 
+        if self._cursor_key is not None:
+            return self._cursor_iterator(query_href)
+
         # build query uri
         query_uri = self._build_query_uri(
             query_href,
@@ -2049,6 +2509,132 @@ class _AbstractQuery(object):
             query_results = self._client.get_resource(
                 next_page_uri, objectify_results=True)
 
+    def _cursor_iterator(self, query_href):
+        last_value = None
+        while True:
+            qfilter = self._filter
+            if last_value is not None:
+                qfilter = self._get_cursor_filter(last_value)
+            query_results = self._client.get_resource(
+                self._build_query_uri(
+                    query_href,
+                    1,
+                    self._page_size,
+                    qfilter,
+                    self._include_links,
+                    fields=self.fields))
+            count = 0
+            record = None
+            for record in query_results.iterchildren():
+                if etree.QName(record.tag).localname != 'Link':
+                    count += 1
+                    yield record
+            if count == 0 or count < int(query_results.get('pageSize')):
+                break
+            last_value = record.get(self._cursor_key)
+            if last_value is None:
+                raise InvalidParameterException(
+                    'Query records don\'t have the cursor key \'%s\'.' %
+                    self._cursor_key)
+
+    def _get_cursor_filter(self, last_value):
+        """Merges the filter of the query with the cursor position.
+
+        :param str last_value: value of the cursor key in the last record
+            fetched so far.
+
+        :return: filter expression selecting the records after last_value.
+
+        :rtype: str
+        """
+        cursor_filter = '%s=gt=%s' % (self._cursor_key,
+                                      self._encode_filter_value(last_value))
+        return self._and_filter(cursor_filter)
+
+    def _and_filter(self, sub_expression):
+        """Logically ANDs a sub expression to the filter of the query.
+
+        :param str sub_expression: filter sub expression, with its value
+            already encoded.
+
+        :return: the combined filter expression.
+
+        :rtype: str
+        """
+        if self._filter:
+            # the user filter may OR sub expressions, hence the parentheses
+            return '(%s);%s' % (self._filter, sub_expression)
+        return sub_expression
+
+    def _encode_filter_value(self, value):
+        """Encodes a value for use in a filter sub expression.
+
+        :param str value: raw value.
+
+        :return: the value encoded as expected by the api version in use.
+
+        :rtype: str
+        """
+        value = urllib.parse.quote(value)
+        if float(self._client.get_api_version()) >= \
+                float(ApiVersion.VERSION_35.value):
+            value = self._escape_special_characters(value)
+        return value
+
+    def count(self):
+        """Counts the results of the query, without fetching them.
+
+        Only the first record of the results is transferred, the count is read
+        from the total reported by vCD.
+
+        :return: number of results matched by the query.
+
+        :rtype: int
+
+        :raises: OperationNotSupportedException: if the query is not available
+            to the logged in user.
+        """
+        return self._count(self._filter)
+
+    def _count(self, qfilter):
+        query_href = self._find_query_uri(self._query_result_format)
+        if query_href is None:
+            raise OperationNotSupportedException('Unable to execute query.')
+        query_results = self._client.get_resource(
+            self._build_query_uri(
+                query_href, 1, 1, qfilter, False, fields=self.fields))
+        return int(query_results.get('total'))
+
+    def group_count(self, field, values,
+                    max_workers=DEFAULT_QUERY_MAX_WORKERS):
+        """Counts the results of the query for each value of a field.
+
+        One count request is issued per value, with the equality of the field
+        to that value AND-ed to the filter of the query. Requests are issued
+        concurrently.
+
+        :param str field: name of the field to group results by e.g. 'status'
+            or 'vdcName'.
+        :param iterable values: values of the field to count results for.
+        :param int max_workers: maximum number of concurrent requests.
+
+        :return: number of results matched by the query for each value, keyed
+            by value.
+
+        :rtype: dict
+
+        :raises: OperationNotSupportedException: if the query is not available
+            to the logged in user.
+        """
+        values = list(values)
+        filters = [
+            self._and_filter(
+                '%s==%s' % (field, self._encode_filter_value(str(value))))
+            for value in values
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(values, executor.map(self._count, filters)))
+
     def find_unique(self):
         """Convenience wrapper over execute().
 
@@ -2129,7 +2715,8 @@ class _TypedQuery(_AbstractQuery):
                  equality_filter=None,
                  sort_asc=None,
                  sort_desc=None,
-                 fields=None):
+                 fields=None,
+                 cursor_key=None):
         super(_TypedQuery, self).__init__(
             query_result_format,
             client,
@@ -2140,7 +2727,8 @@ class _TypedQuery(_AbstractQuery):
             equality_filter=equality_filter,
             sort_asc=sort_asc,
             sort_desc=sort_desc,
-            fields=fields)
+            fields=fields,
+            cursor_key=cursor_key)
         self._query_type_name = query_type_name
 
     def _find_query_uri(self, query_result_format):
@@ -2219,9 +2807,5 @@ def get_logger(file_name="vcd_sdk.log",
     :return: Logger with rotating file handler.
     :type: LOGGER
     """
-    LOGGER = logging.getLogger(file_name)
-    logHandler = handlers.RotatingFileHandler(
-        filename=file_name, maxBytes=max_bytes, backupCount=backup_count)
-    logHandler.setLevel(log_level)
-    LOGGER.addHandler(logHandler)
-    return LOGGER
+    return get_file_logger(file_name, file_name, log_level, max_bytes,
+                           backup_count)
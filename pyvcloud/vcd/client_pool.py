@@ -0,0 +1,268 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+from pyvcloud.vcd.client import BasicLoginCredentials
+from pyvcloud.vcd.client import Client
+
+DEFAULT_MAX_SESSIONS = 64
+# JWTs are renewed when they expire within this number of seconds
+DEFAULT_REFRESH_MARGIN_SEC = 300
+
+
+class ClientPool(object):
+    """Pool of logged in clients, one per host, org and user.
+
+    Clients are logged in the first time they are asked for, and kept open
+    for later use. When the pool holds max_sessions sessions, the least
+    recently used client nobody is using is logged out to make room for a
+    new one. If all clients are in use, callers wait for one to be
+    released.
+
+        pool = ClientPool(max_sessions=100, verify_ssl_certs=False)
+        with pool.client('vcd.example.com', 'acme', 'admin', password) as c:
+            org = Org(c, resource=c.get_org())
+        ...
+        pool.close()
+
+    The same client may be handed out to several threads at the same time.
+    A pooled client is only handed out to callers with the password it was
+    logged in with, other callers log in again, and the new client replaces
+    the pooled one if the login succeeds. Clients whose JWT is about to
+    expire are logged in again the same way. In both cases, the pool waits
+    until the previous client is no longer in use and logs it out.
+
+    The API version negotiated by the first login to a host is used by all
+    the clients of that host, without negotiating it again.
+    """
+
+    def __init__(self,
+                 max_sessions=DEFAULT_MAX_SESSIONS,
+                 refresh_margin=DEFAULT_REFRESH_MARGIN_SEC,
+                 **client_args):
+        """Constructor for ClientPool objects.
+
+        :param int max_sessions: maximum number of clients logged in at the
+            same time.
+        :param float refresh_margin: number of seconds before the expiry of
+            its JWT from which a client is logged in again.
+        :param client_args: arguments of the clients, see Client, e.g.
+            verify_ssl_certs, or a transport or rate_limiter shared by all
+            the clients.
+        """
+        self.max_sessions = max_sessions
+        self.refresh_margin = refresh_margin
+        self._client_args = client_args
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # entries in order of use, least recently used first
+        self._entries = OrderedDict()
+        self._api_versions = {}
+        # passwords are only kept as digests keyed by this random secret
+        self._secret = os.urandom(32)
+        self._stats = {'logins': 0, 'refreshes': 0, 'evictions': 0}
+
+    @contextmanager
+    def client(self, host, org, user, password):
+        """Hands out the logged in client of a user.
+
+        :param str host: vCD server host name or connection URI.
+        :param str org: name of the organization of the user.
+        :param str user: name of the user.
+        :param str password: password of the user.
+
+        :return: a context manager returning the client, which must not be
+            used outside of its block.
+        """
+        digest = hmac.new(self._secret, password.encode('utf-8'),
+                          hashlib.sha256).digest()
+        entry, needs_login = self._acquire((host, org.lower(), user), digest)
+        try:
+            if needs_login:
+                self._login(entry, host,
+                            BasicLoginCredentials(user, org, password),
+                            digest)
+            yield entry.client
+        finally:
+            self._release(entry)
+
+    def get_stats(self):
+        """Returns statistics about the clients of the pool.
+
+        :return: number of clients logged in, of logins, of logins to renew
+            JWTs and of clients logged out to make room for other ones.
+
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sessions'] = len(self._entries)
+            return stats
+
+    def close(self):
+        """Logs out all the clients of the pool.
+
+        The clients must no longer be in use.
+        """
+        with self._lock:
+            clients = [e.client for e in self._entries.values()]
+            self._entries.clear()
+        for client in clients:
+            _logout(client)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _acquire(self, key, digest):
+        """Leases the entry of a key.
+
+        :return: the entry, and whether the caller must log in the client of
+            the entry, in which case it has exclusive use of the entry.
+
+        :rtype: tuple
+        """
+        evicted = []
+        with self._lock:
+            while True:
+                entry = self._entries.get(key)
+                if entry is None:
+                    if len(self._entries) >= self.max_sessions:
+                        idle_key = next((k for k, e in self._entries.items()
+                                         if e.leases == 0), None)
+                        if idle_key is None:
+                            self._changed.wait()
+                        else:
+                            evicted.append(self._entries.pop(idle_key).client)
+                            self._stats['evictions'] += 1
+                        continue
+                    entry = _PoolEntry(key)
+                    self._entries[key] = entry
+                if entry.logging_in:
+                    self._changed.wait()
+                    continue
+                needs_login = self._needs_login(entry, digest)
+                if needs_login and entry.leases > 0:
+                    # wait for the other users of the client to release it,
+                    # and don't hand it out to new ones meanwhile
+                    entry.draining = True
+                    self._changed.wait()
+                    continue
+                if not needs_login and entry.draining:
+                    self._changed.wait()
+                    continue
+                entry.draining = False
+                entry.logging_in = needs_login
+                entry.leases += 1
+                self._entries.move_to_end(key)
+                break
+        for client in evicted:
+            _logout(client)
+        return entry, needs_login
+
+    def _needs_login(self, entry, digest):
+        if entry.client is None:
+            return True
+        if not hmac.compare_digest(entry.digest, digest):
+            return True
+        return entry.expires_at is not None and \
+            entry.expires_at - self.refresh_margin < time.time()
+
+    def _release(self, entry):
+        with self._lock:
+            entry.leases -= 1
+            entry.logging_in = False
+            if entry.client is None and entry.leases == 0:
+                # login failed, don't hold a session slot
+                if self._entries.get(entry.key) is entry:
+                    del self._entries[entry.key]
+            self._changed.notify_all()
+
+    def _login(self, entry, host, creds, digest):
+        # the caller has exclusive use of the entry, the previous client is
+        # only replaced if the login succeeds
+        client_args = dict(self._client_args)
+        if client_args.get('api_version') is None:
+            with self._lock:
+                client_args['api_version'] = self._api_versions.get(host)
+        client = Client(host, **client_args)
+        client.set_credentials(creds)
+        previous_client = entry.client
+        with self._lock:
+            self._api_versions.setdefault(host, client.get_api_version())
+            self._stats['logins'] += 1
+            if previous_client is not None and \
+                    hmac.compare_digest(entry.digest, digest):
+                self._stats['refreshes'] += 1
+            entry.client = client
+            entry.digest = digest
+            entry.expires_at = _get_token_expiry(client.get_access_token())
+        if previous_client is not None:
+            _logout(previous_client)
+
+
+class _PoolEntry(object):
+    __slots__ = ('key', 'client', 'digest', 'expires_at', 'leases',
+                 'logging_in', 'draining')
+
+    def __init__(self, key):
+        self.key = key
+        self.client = None
+        self.digest = None
+        self.expires_at = None
+        self.leases = 0
+        self.logging_in = False
+        self.draining = False
+
+
+def _logout(client):
+    if client is None:
+        return
+    try:
+        client.logout()
+    except Exception as e:
+        # the session expires on its own if vCD can't be reached
+        client._logger.warning('Logout of pooled client failed: %s', e)
+
+
+def _get_token_expiry(token):
+    """Returns the expiry time of a JWT.
+
+    :param str token: the JWT, or None.
+
+    :return: expiry time as seconds since the epoch, or None if the token
+        is not a JWT with an expiry time.
+
+    :rtype: float
+    """
+    if not token:
+        return None
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
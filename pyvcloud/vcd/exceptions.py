@@ -237,6 +237,14 @@ class TaskTimeoutException(ClientException, TimeoutError):
     """Raised when a task in vcd timeout."""
 
 
+class EntityWaitTimeoutException(ClientException, TimeoutError):
+    """Raised when entities don't reach the awaited state in time."""
+
+    def __init__(self, message, pending_hrefs):
+        super(EntityWaitTimeoutException, self).__init__(message)
+        self.pending_hrefs = pending_hrefs
+
+
 class SDKRequestException(ClientException, IOError):
     """Raised when an exception occurred during vcd request."""
 
@@ -255,3 +263,11 @@ class InvalidParameterException(ClientException):
 
 class SessionException(ClientException):
     """Raised for any session related exceptions in pyvcloud."""
+
+
+class RequestNotRecordedException(ClientException):
+    """Raised when a replayed request isn't found in the cassette."""
+
+
+class SiteTimeoutException(ClientException, TimeoutError):
+    """Raised when a vCD site doesn't answer a multi-site call in time."""
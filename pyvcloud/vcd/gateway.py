@@ -11,6 +11,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from copy import deepcopy
+
+from lxml import etree
+
 from pyvcloud.vcd.client import create_element
 from pyvcloud.vcd.client import E
 from pyvcloud.vcd.client import EntityType
@@ -22,10 +26,12 @@ from pyvcloud.vcd.exceptions import EntityNotFoundException
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.network_url_constants import CRL_CERTIFICATE_POST
 from pyvcloud.vcd.network_url_constants import DHCP_URL_TEMPLATE
+from pyvcloud.vcd.network_url_constants import FIREWALL_RULES_URL_TEMPLATE
 from pyvcloud.vcd.network_url_constants import FIREWALL_URL_TEMPLATE
 from pyvcloud.vcd.network_url_constants import GET_CERTIFICATES
 from pyvcloud.vcd.network_url_constants import GET_CRL_CERTIFICATES
 from pyvcloud.vcd.network_url_constants import IPSEC_VPN_URL_TEMPLATE
+from pyvcloud.vcd.network_url_constants import NAT_RULES_URL_TEMPLATE
 from pyvcloud.vcd.network_url_constants import NAT_URL_TEMPLATE
 from pyvcloud.vcd.network_url_constants import SERVICE_CERTIFICATE_POST
 from pyvcloud.vcd.network_url_constants import STATIC_ROUTE_URL_TEMPLATE
@@ -35,6 +41,41 @@ from pyvcloud.vcd.utils import get_admin_href
 from pyvcloud.vcd.utils import netmask_to_cidr_prefix_len
 
 
+# fields of edge rules assigned by the edge, not part of their definition
+_RULE_ID_FIELDS = ('id', 'ruleId', 'ruleTag')
+
+
+def _get_rule_signature(rule):
+    """Returns the definition of an edge rule element as a hashable value.
+
+    All the fields of the rule are included, fields nested in e.g. source,
+    destination or application ones by their path, except the ids assigned
+    by the edge. Values are normalized so that rules built locally compare
+    equal to the ones returned by the edge, e.g. a missing or empty field is
+    left out.
+
+    :param lxml.objectify.ObjectifiedElement rule: the rule element.
+
+    :return: sorted tuple of (field path, value) tuples.
+
+    :rtype: tuple
+    """
+    fields = []
+    _collect_rule_fields(rule, '', fields)
+    return tuple(sorted(fields))
+
+
+def _collect_rule_fields(element, prefix, fields):
+    for field in element.iterchildren():
+        name = etree.QName(field).localname
+        if prefix == '' and name in _RULE_ID_FIELDS:
+            continue
+        if next(field.iterchildren(), None) is not None:
+            _collect_rule_fields(field, prefix + name + '/', fields)
+        elif field.text is not None and field.text.strip() != '':
+            fields.append((prefix + name, field.text.strip().lower()))
+
+
 class Gateway(object):
     __LEASE_TIME = '86400'
     __DEFAULT_ENCRYPTION_PROTOCOL = 'aes'
@@ -717,16 +758,26 @@ class Gateway(object):
         firewall_rule_href = self._build_firewall_rule_href()
         firewall_rules_resource = self.get_firewall_rules()
         firewall_rules_tag = firewall_rules_resource.firewallRules
+        firewall_rule = self._create_firewall_rule_element(
+            name, action=action, type=type, enabled=enabled,
+            logging_enabled=logging_enabled)
+        firewall_rules_tag.append(firewall_rule)
+        self.client.put_resource(firewall_rule_href, firewall_rules_resource,
+                                 EntityType.DEFAULT_CONTENT_TYPE.value)
+
+    @staticmethod
+    def _create_firewall_rule_element(name,
+                                      action='accept',
+                                      type='User',
+                                      enabled=True,
+                                      logging_enabled=False):
         firewall_rule = E.firewallRule()
         firewall_rule.append(E.name(name))
         firewall_rule.append(E.ruleType(type))
         firewall_rule.append(E.enabled(enabled))
         firewall_rule.append(E.loggingEnabled(logging_enabled))
         firewall_rule.append(E.action(action))
-
-        firewall_rules_tag.append(firewall_rule)
-        self.client.put_resource(firewall_rule_href, firewall_rules_resource,
-                                 EntityType.DEFAULT_CONTENT_TYPE.value)
+        return firewall_rule
 
     def get_firewall_rules(self):
         """Get firewall Rules from vCD.
@@ -1009,6 +1060,29 @@ class Gateway(object):
         nat_rule_href = self._build_nat_rule_href()
         nat_rules_resource = self.get_nat_rules()
         nat_rules_tag = nat_rules_resource.natRules
+        nat_rule = self._create_nat_rule_element(
+            action, original_address, translated_address,
+            description=description, protocol=protocol,
+            original_port=original_port, translated_port=translated_port,
+            type=type, icmp_type=icmp_type, logging_enabled=logging_enabled,
+            enabled=enabled, vnic=vnic)
+        nat_rules_tag.append(nat_rule)
+        self.client.put_resource(nat_rule_href, nat_rules_resource,
+                                 EntityType.DEFAULT_CONTENT_TYPE.value)
+
+    @staticmethod
+    def _create_nat_rule_element(action,
+                                 original_address,
+                                 translated_address,
+                                 description=None,
+                                 protocol='any',
+                                 original_port='any',
+                                 translated_port='any',
+                                 type='User',
+                                 icmp_type='any',
+                                 logging_enabled=False,
+                                 enabled=True,
+                                 vnic=0):
         nat_rule = E.natRule()
         nat_rule.append(E.ruleType(type))
         nat_rule.append(E.action(action))
@@ -1030,10 +1104,7 @@ class Gateway(object):
             nat_rule.append(E.translatedPort(translated_port))
             nat_rule.append(E.protocol(protocol))
             nat_rule.append(E.icmpType(icmp_type))
-
-        nat_rules_tag.append(nat_rule)
-        self.client.put_resource(nat_rule_href, nat_rules_resource,
-                                 EntityType.DEFAULT_CONTENT_TYPE.value)
+        return nat_rule
 
     def get_nat_rules(self):
         """Get Nat Rules from vCD.
@@ -1125,6 +1196,20 @@ class Gateway(object):
         static_route_href = self._build_static_routes_href()
         static_routes_resource = self.get_static_routes()
         static_route_tag = static_routes_resource.staticRoutes
+        static_route = self._create_static_route_element(
+            network, next_hop, mtu=mtu, description=description, type=type,
+            vnic=vnic)
+        static_route_tag.append(static_route)
+        self.client.put_resource(static_route_href, static_routes_resource,
+                                 EntityType.DEFAULT_CONTENT_TYPE.value)
+
+    @staticmethod
+    def _create_static_route_element(network,
+                                     next_hop,
+                                     mtu=1500,
+                                     description=None,
+                                     type='User',
+                                     vnic=0):
         static_route = E.route()
         static_route.append(E.network(network))
         static_route.append(E.nextHop(next_hop))
@@ -1132,9 +1217,7 @@ class Gateway(object):
         static_route.append(E.type(type))
         static_route.append(E.description(description))
         static_route.append(E.vnic(vnic))
-        static_route_tag.append(static_route)
-        self.client.put_resource(static_route_href, static_routes_resource,
-                                 EntityType.DEFAULT_CONTENT_TYPE.value)
+        return static_route
 
     def get_static_routes(self):
         """Get Static Routes from vCD.
@@ -1168,6 +1251,154 @@ class Gateway(object):
                 out_list.append(static_route_info)
         return out_list
 
+    def apply_firewall_rules(self, rules):
+        """Makes the user firewall rules of the gateway match the given list.
+
+        The desired rules are compared with the user rules currently present
+        on the edge, system rules are left untouched. A current rule is kept
+        as is only if all of its fields, including its source, destination
+        and application, match a desired rule, ids assigned by the edge
+        aside. Other current user rules, including rules which only differ
+        from a desired rule by some fields, are deleted and the desired rules
+        without an identical current rule are created. User rules missing
+        from the list are therefore deleted. If rules only need to be added
+        they are created with a single POST to the bulk firewall rules
+        endpoint, otherwise the whole firewall configuration is updated with
+        a single PUT.
+
+        :param list rules: list of dict, each dict holding the keyword
+            arguments of add_firewall_rule() for one rule e.g.
+            [{'name': 'allow-web', 'action': 'accept'}], or rule elements as
+            returned by get_firewall_rules(), e.g. to keep current rules.
+
+        :return: number of rules added, removed and left unchanged e.g.
+            {'added': 1, 'removed': 0, 'unchanged': 12}.
+
+        :rtype: dict
+        """
+        network_url = build_network_url_from_gateway_url(self.href)
+        desired = [self._create_firewall_rule_element(**rule)
+                   if isinstance(rule, dict) else deepcopy(rule)
+                   for rule in rules]
+        return self._apply_rule_set(
+            network_url + FIREWALL_URL_TEMPLATE,
+            network_url + FIREWALL_RULES_URL_TEMPLATE, 'firewallRules',
+            'ruleType', desired)
+
+    def apply_nat_rules(self, rules):
+        """Makes the user nat rules of the gateway match the given list.
+
+        Works like apply_firewall_rules(), using the bulk nat rules endpoint
+        when rules only need to be added.
+
+        :param list rules: list of dict, each dict holding the keyword
+            arguments of add_nat_rule() for one rule e.g.
+            [{'action': 'snat', 'original_address': '10.0.0.0/24',
+              'translated_address': '172.16.0.10'}], or rule elements as
+            returned by get_nat_rules().
+
+        :return: number of rules added, removed and left unchanged.
+
+        :rtype: dict
+        """
+        network_url = build_network_url_from_gateway_url(self.href)
+        desired = [self._create_nat_rule_element(**rule)
+                   if isinstance(rule, dict) else deepcopy(rule)
+                   for rule in rules]
+        return self._apply_rule_set(
+            network_url + NAT_URL_TEMPLATE,
+            network_url + NAT_RULES_URL_TEMPLATE, 'natRules', 'ruleType',
+            desired)
+
+    def apply_static_routes(self, routes):
+        """Makes the user static routes of the gateway match the given list.
+
+        Works like apply_firewall_rules(). Since the edge offers no bulk
+        endpoint for static routes, any change results in a single PUT of
+        the static routing configuration.
+
+        :param list routes: list of dict, each dict holding the keyword
+            arguments of add_static_route() for one route e.g.
+            [{'network': '192.169.1.0/24', 'next_hop': '2.2.3.80'}], or route
+            elements as returned by get_static_routes().
+
+        :return: number of routes added, removed and left unchanged.
+
+        :rtype: dict
+        """
+        desired = [self._create_static_route_element(**route)
+                   if isinstance(route, dict) else deepcopy(route)
+                   for route in routes]
+        return self._apply_rule_set(
+            self._build_static_routes_href(), None, 'staticRoutes', 'type',
+            desired)
+
+    def _apply_rule_set(self, config_href, rules_href, container_name,
+                        type_field, desired):
+        """Applies the difference between desired and current user rules.
+
+        Rules are compared by all their fields, see _get_rule_signature().
+
+        :param str config_href: href of the service configuration.
+        :param str rules_href: href of the bulk rules endpoint of the service
+            or None if the service doesn't have one.
+        :param str container_name: name of the element holding the rules in
+            the service configuration.
+        :param str type_field: name of the rule field holding the rule type.
+        :param list desired: rule elements which should be present.
+
+        :return: number of rules added, removed and left unchanged.
+
+        :rtype: dict
+        """
+        config = self.client.get_resource(config_href)
+        container = getattr(config, container_name)
+
+        # identical desired rules are each matched with their own current
+        # rule
+        pending = {}
+        for rule in desired:
+            pending.setdefault(_get_rule_signature(rule), []).append(rule)
+
+        to_remove = []
+        unchanged = 0
+        for rule in container.iterchildren():
+            rule_type = next((field.text for field in rule.iterchildren()
+                              if etree.QName(field).localname == type_field),
+                             None)
+            if rule_type is None or rule_type.strip().lower() != 'user':
+                continue
+            candidates = pending.get(_get_rule_signature(rule))
+            if candidates:
+                candidates.pop()
+                unchanged += 1
+            else:
+                to_remove.append(rule)
+
+        remaining = set(id(rule) for candidates in pending.values()
+                        for rule in candidates)
+        to_add = [rule for rule in desired if id(rule) in remaining]
+
+        if len(to_remove) == 0 and len(to_add) > 0 and \
+                rules_href is not None:
+            rules = create_element(container_name)
+            for rule in to_add:
+                rules.append(rule)
+            self.client.post_resource(rules_href, rules,
+                                      EntityType.DEFAULT_CONTENT_TYPE.value)
+        elif len(to_remove) > 0 or len(to_add) > 0:
+            for rule in to_remove:
+                container.remove(rule)
+            for rule in to_add:
+                container.append(rule)
+            self.client.put_resource(config_href, config,
+                                     EntityType.DEFAULT_CONTENT_TYPE.value)
+        return {
+            'added': len(to_add),
+            'removed': len(to_remove),
+            'unchanged': unchanged
+        }
+
     def add_ipsec_vpn(self,
                       name,
                       peer_id,
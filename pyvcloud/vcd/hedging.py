@@ -0,0 +1,226 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+import contextvars
+from itertools import cycle
+import threading
+import time
+import urllib
+
+DEFAULT_PERCENTILE = 95
+DEFAULT_MIN_DELAY_SEC = 0.05
+# number of recent latencies the hedging delay is computed from
+DEFAULT_WINDOW_SIZE = 200
+# no request is hedged until that many latencies have been observed
+DEFAULT_MIN_SAMPLES = 20
+# hedges are capped to that share of the requests, to bound the extra load
+DEFAULT_MAX_HEDGE_RATIO = 0.1
+DEFAULT_MAX_WORKERS = 16
+
+
+class HedgingPolicy(object):
+    """Hedges idempotent requests against slow vCD cells.
+
+    A request without response after the configured percentile of recent
+    latencies is sent a second time, to an alternate cell if any is
+    configured, and the first response to arrive is used. The other response
+    is discarded once it arrives.
+
+    Clients only hedge GET requests, never POST, PUT or DELETE ones.
+    """
+
+    def __init__(self,
+                 percentile=DEFAULT_PERCENTILE,
+                 min_delay=DEFAULT_MIN_DELAY_SEC,
+                 alternate_uris=None,
+                 window_size=DEFAULT_WINDOW_SIZE,
+                 min_samples=DEFAULT_MIN_SAMPLES,
+                 max_hedge_ratio=DEFAULT_MAX_HEDGE_RATIO,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        """Constructor for HedgingPolicy objects.
+
+        :param float percentile: percentile of recent latencies after which a
+            request is hedged.
+        :param float min_delay: minimum time in seconds before a request is
+            hedged.
+        :param list alternate_uris: optional base uris of individual cells
+            e.g. ['https://cell2.example.com'], hedges are sent to them in
+            turn. By default hedges are sent to the same uri as the request,
+            i.e. usually to another cell behind the load balancer.
+        :param int window_size: number of recent latencies to compute the
+            percentile from.
+        :param int min_samples: number of latencies to observe before
+            requests are hedged.
+        :param float max_hedge_ratio: maximum ratio of hedged requests.
+        :param int max_workers: maximum number of hedged requests, and of
+            hedges, in flight at the same time. Requests aren't hedged while
+            that many are pending.
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self._alternate_uris = None
+        if alternate_uris:
+            self._alternate_uris = cycle(
+                [urllib.parse.urlsplit(uri) for uri in alternate_uris])
+        self._latencies = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self._primary_executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._primaries_in_flight = 0
+        self._hedges_in_flight = 0
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def send(self, uri, send):
+        """Sends a request, hedging it if it is too slow.
+
+        :param str uri: uri of the request.
+        :param function send: function with signature function(uri) which
+            sends the request to the given uri and returns the response.
+
+        :return: the first response received.
+
+        :rtype: requests.Response
+        """
+        delay = self._get_delay()
+        if delay is None:
+            return self._timed(send, uri)
+        # the primary request is sent right away by a worker, so that the
+        # caller can return the response of the hedge if it comes first
+        primary = self._submit_primary(send, uri)
+        if primary is None:
+            return self._timed(send, uri)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        hedge = self._submit_hedge(send, uri)
+        if hedge is None:
+            return primary.result()
+        done, pending = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None and pending:
+            # fall back to the other request
+            winner = pending.pop()
+        response = winner.result()
+        if winner is hedge:
+            with self._lock:
+                self._hedge_wins += 1
+        return response
+
+    def get_stats(self):
+        """Returns statistics about hedged requests.
+
+        :return: number of requests sent, of requests hedged, of hedges whose
+            response arrived first, and the ratio of hedged requests.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'hedged': self._hedged,
+                'hedge_wins': self._hedge_wins,
+                'hedge_rate': self._hedged / self._requests
+                if self._requests else 0.0
+            }
+
+    def _submit_primary(self, send, uri):
+        """Sends a request to be hedged, unless too many are pending.
+
+        Requests run in the context of the caller e.g. its tracing span.
+
+        :return: the future of the request, or None if the request isn't
+            hedged.
+
+        :rtype: concurrent.futures.Future
+        """
+        with self._lock:
+            # never more requests than workers, so they are never queued
+            if self._primaries_in_flight >= self.max_workers:
+                return None
+            self._primaries_in_flight += 1
+        primary = self._primary_executor.submit(
+            contextvars.copy_context().run, self._timed, send, uri)
+        primary.add_done_callback(self._primary_done)
+        return primary
+
+    def _primary_done(self, primary):
+        with self._lock:
+            self._primaries_in_flight -= 1
+
+    def _submit_hedge(self, send, uri):
+        """Sends the hedge of a request, unless too many hedges are pending.
+
+        :return: the future of the hedge, or None if the request isn't
+            hedged.
+
+        :rtype: concurrent.futures.Future
+        """
+        with self._lock:
+            if self._hedges_in_flight >= self.max_workers:
+                return None
+            self._hedges_in_flight += 1
+            self._hedged += 1
+        hedge = self._executor.submit(contextvars.copy_context().run,
+                                      self._timed, send,
+                                      self._get_hedge_uri(uri))
+        hedge.add_done_callback(self._hedge_done)
+        return hedge
+
+    def _hedge_done(self, hedge):
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    def _timed(self, send, uri):
+        start = time.monotonic()
+        response = send(uri)
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return response
+
+    def _get_delay(self):
+        """Returns the time to wait for a response before hedging.
+
+        :return: the delay in seconds, or None if the request shouldn't be
+            hedged.
+
+        :rtype: float
+        """
+        with self._lock:
+            self._requests += 1
+            if len(self._latencies) < self.min_samples or \
+                    self._hedged >= self._requests * self.max_hedge_ratio:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.percentile / 100),
+                    len(latencies) - 1)
+        return max(latencies[index], self.min_delay)
+
+    def _get_hedge_uri(self, uri):
+        if self._alternate_uris is None:
+            return uri
+        with self._lock:
+            alternate = next(self._alternate_uris)
+        parts = urllib.parse.urlsplit(uri)
+        return urllib.parse.urlunsplit(
+            parts._replace(scheme=alternate.scheme, netloc=alternate.netloc))
@@ -0,0 +1,156 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+
+import httpx
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_MAX_CONNECTIONS = 4
+
+
+class Http2Transport(object):
+    """HTTP/2 transport for clients, based on httpx.
+
+    Requests are multiplexed over at most max_connections connections per
+    vCD host, instead of one connection per request in flight. It requires
+    the httpx package with its http2 extra, e.g. pip install pyvcloud[http2].
+
+        client = Client('vcd.example.com', transport=Http2Transport())
+
+    All the sessions created by a transport share its connections, so a
+    single transport can be shared by several clients.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, timeout=None):
+        """Constructor for Http2Transport objects.
+
+        :param int max_connections: maximum number of connections per host.
+        :param float timeout: timeout of requests in seconds, None to wait
+            forever like requests does by default.
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # httpx verifies certificates per client, not per request
+        self._clients = {}
+
+    def __call__(self):
+        """Creates a new session, called by clients for every login.
+
+        :return: the session.
+
+        :rtype: Http2Session
+        """
+        return Http2Session(self)
+
+    def close(self):
+        """Closes the connections of the transport."""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+    def _get_client(self, verify):
+        with self._lock:
+            client = self._clients.get(verify)
+            if client is None:
+                client = httpx.Client(
+                    http2=True,
+                    verify=verify,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections))
+                self._clients[verify] = client
+            return client
+
+
+class Http2Session(object):
+    """Session of an Http2Transport.
+
+    Implements the part of the interface of requests.Session used by
+    clients, errors are raised as requests exceptions.
+    """
+
+    def __init__(self, transport):
+        self.headers = CaseInsensitiveDict()
+        self._transport = transport
+
+    def request(self,
+                method,
+                url,
+                params=None,
+                data=None,
+                headers=None,
+                auth=None,
+                verify=True,
+                stream=False):
+        all_headers = CaseInsensitiveDict(self.headers)
+        all_headers.update(headers or {})
+        client = self._transport._get_client(verify)
+        request = client.build_request(
+            method, url, params=params, content=data,
+            headers=dict(all_headers))
+        try:
+            response = client.send(request, auth=auth, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return _Http2Response(response)
+
+    def get(self, url, headers=None, verify=True, stream=False):
+        return self.request(
+            'GET', url, headers=headers, verify=verify, stream=stream)
+
+    def put(self, url, data=None, headers=None, verify=True):
+        return self.request(
+            'PUT', url, data=data, headers=headers, verify=verify)
+
+    def close(self):
+        # connections belong to the transport
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _Http2Response(object):
+    """httpx response with the interface of requests.Response."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.request = response.request
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        try:
+            for chunk in self._response.iter_bytes(chunk_size):
+                yield chunk
+        finally:
+            self._response.close()
@@ -15,13 +15,19 @@
 
 from pyvcloud.vcd.client import E
 from pyvcloud.vcd.client import EntityType
+from pyvcloud.vcd.client import get_metadata_field
 from pyvcloud.vcd.client import MetadataDomain
 from pyvcloud.vcd.client import MetadataValueType
 from pyvcloud.vcd.client import MetadataVisibility
 from pyvcloud.vcd.client import NSMAP
+from pyvcloud.vcd.client import QueryResultFormat
 from pyvcloud.vcd.client import RelationType
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.utils import get_admin_href
+from pyvcloud.vcd.utils import typed_metadata_to_dict
+
+# maximum page size of typed queries returning records
+DEFAULT_QUERY_PAGE_SIZE = 128
 
 
 class Metadata(object):
@@ -237,3 +243,58 @@ class Metadata(object):
 
         return self.client.delete_linked_resource(metadata_value,
                                                   RelationType.REMOVE, None)
+
+
+def query_metadata(client,
+                   resource_type,
+                   keys,
+                   domain=MetadataDomain.GENERAL,
+                   qfilter=None,
+                   equality_filter=None,
+                   page_size=DEFAULT_QUERY_PAGE_SIZE):
+    """Fetch metadata entries of many entities through the query service.
+
+    Instead of fetching the metadata of each entity separately, the entries
+    are projected into the records of a typed query, so that the metadata of
+    a whole vdc or org is fetched a page of entities at a time.
+
+    :param pyvcloud.vcd.client.Client client: the client that will be used to
+        make REST calls to vCD.
+    :param str resource_type: type of the entities, as listed in the enum
+        pyvcloud.vcd.client.ResourceType e.g. 'adminVApp' or 'vm'.
+    :param iterable keys: keys of the metadata entries to fetch.
+    :param client.MetadataDomain domain: domain of the metadata entries.
+    :param str qfilter: filter expression selecting the entities, see
+        Client.get_typed_query(). Filters on metadata can be built with
+        pyvcloud.vcd.client.get_metadata_filter().
+    :param tuple equality_filter: equality filter selecting the entities, see
+        Client.get_typed_query().
+    :param int page_size: number of entities fetched per request.
+
+    :return: metadata values, converted to the python type matching their
+        MetadataValueType, keyed by metadata key, keyed by entity href.
+        Entities without any of the requested entries map to an empty dict.
+
+    :rtype: dict
+
+    :raises: InvalidParameterException: if no key is provided.
+    """
+    keys = list(keys)
+    if len(keys) == 0:
+        raise InvalidParameterException('No metadata key provided.')
+    if not isinstance(domain, MetadataDomain):
+        raise InvalidParameterException('Invalid domain.')
+    query = client.get_typed_query(
+        resource_type,
+        query_result_format=QueryResultFormat.RECORDS,
+        page_size=page_size,
+        qfilter=qfilter,
+        equality_filter=equality_filter,
+        fields=','.join(get_metadata_field(key, domain) for key in keys))
+    result = {}
+    for record in query.execute():
+        metadata = {}
+        if hasattr(record, 'Metadata'):
+            metadata = typed_metadata_to_dict(record.Metadata)
+        result[record.get('href')] = metadata
+    return result
@@ -0,0 +1,300 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import queue
+import threading
+import time
+
+from pyvcloud.vcd.client import QueryResultFormat
+from pyvcloud.vcd.exceptions import InvalidParameterException
+from pyvcloud.vcd.exceptions import SiteTimeoutException
+
+DEFAULT_SITE_TIMEOUT_SEC = 300
+
+# kinds of the messages sent by the workers of a multi-site call
+_ITEM = 'item'
+_DONE = 'done'
+_ERROR = 'error'
+
+
+class MultiSiteClient(object):
+    """Runs the same calls against several vCD sites concurrently.
+
+    Each site is a logged in client, queried by its own worker thread.
+    Results are streamed as (site name, result) tuples in the order they
+    arrive, so that a slow site doesn't hold back the results of the other
+    ones. A site which fails, or doesn't complete before its timeout, is
+    reported in the errors of the results while the other sites go on.
+
+        multi_site = MultiSiteClient({'ams': ams_client, 'sfo': sfo_client})
+        results = multi_site.get_typed_query(
+            ResourceType.VM.value,
+            query_result_format=QueryResultFormat.RECORDS).execute()
+        for site, vm in results:
+            ...
+        for site, e in results.errors.items():
+            ...
+    """
+
+    def __init__(self,
+                 sites=None,
+                 timeout=DEFAULT_SITE_TIMEOUT_SEC,
+                 max_workers=None):
+        """Constructor for MultiSiteClient objects.
+
+        :param dict sites: logged in clients keyed by the names of their
+            sites.
+        :param float timeout: default number of seconds each site is given
+            to complete a call, None to wait forever.
+        :param int max_workers: maximum number of sites called at the same
+            time, defaults to all of them.
+        """
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._clients = OrderedDict()
+        self._timeouts = {}
+        for name, client in (sites or {}).items():
+            self.add_site(name, client)
+
+    def add_site(self, name, client, timeout=None):
+        """Adds a site.
+
+        :param str name: name of the site, which tags its results.
+        :param pyvcloud.vcd.client.Client client: logged in client of the
+            site.
+        :param float timeout: number of seconds the site is given to
+            complete a call, defaults to the timeout of the multi-site
+            client.
+
+        :raises: InvalidParameterException: if a site with that name was
+            already added.
+        """
+        if name in self._clients:
+            raise InvalidParameterException(
+                'Site \'%s\' already added.' % name)
+        self._clients[name] = client
+        if timeout is not None:
+            self._timeouts[name] = timeout
+
+    def get_sites(self):
+        """Returns the names of the sites.
+
+        :rtype: list
+        """
+        return list(self._clients)
+
+    def get_client(self, name):
+        """Returns the client of a site.
+
+        :param str name: name of the site.
+
+        :rtype: pyvcloud.vcd.client.Client
+
+        :raises: InvalidParameterException: if there is no such site.
+        """
+        if name not in self._clients:
+            raise InvalidParameterException('Site \'%s\' not found.' % name)
+        return self._clients[name]
+
+    def get_typed_query(self,
+                        query_type_name,
+                        query_result_format=QueryResultFormat.REFERENCES,
+                        **query_args):
+        """Issues the same typed query to all the sites.
+
+        :param str query_type_name: name of the entity, which should be a
+            string listed in ResourceType enum values.
+        :param QueryResultFormat query_result_format: format of query result.
+        :param query_args: other parameters of the query, see
+            Client.get_typed_query().
+
+        :return: A query object that runs the query on all the sites when
+            its execute() method is called.
+
+        :rtype: pyvcloud.vcd.multi_site._MultiSiteTypedQuery
+        """
+        return _MultiSiteTypedQuery(self, query_type_name,
+                                    query_result_format, query_args)
+
+    def search(self, name_or_filter, **search_args):
+        """Searches entities of several types on all the sites at once.
+
+        :param str name_or_filter: name of the entities or filter expression,
+            see Client.search().
+        :param search_args: other parameters of the search, see
+            Client.search().
+
+        :return: (site name, entity reference) tuples, see Client.search().
+
+        :rtype: pyvcloud.vcd.multi_site.MultiSiteResults
+        """
+        return self._fan_out(
+            lambda client: client.search(name_or_filter, **search_args),
+            True)
+
+    def run(self, function, *args, **kwargs):
+        """Calls a function with the client of each site.
+
+        :param function function: the function, called with a client as
+            first argument followed by args and kwargs, e.g.
+            Client.get_org_list.
+
+        :return: one (site name, return value) tuple per site which
+            completed the call.
+
+        :rtype: pyvcloud.vcd.multi_site.MultiSiteResults
+        """
+        return self._fan_out(
+            lambda client: function(client, *args, **kwargs), False)
+
+    def _fan_out(self, call, iterate):
+        timeouts = OrderedDict(
+            (name, self._timeouts.get(name, self.timeout))
+            for name in self._clients)
+        return MultiSiteResults(self._clients.copy(), timeouts, call,
+                                iterate, self.max_workers)
+
+
+class _MultiSiteTypedQuery(object):
+    def __init__(self, multi_site, query_type_name, query_result_format,
+                 query_args):
+        self._multi_site = multi_site
+        self._query_type_name = query_type_name
+        self._query_result_format = query_result_format
+        self._query_args = query_args
+
+    def execute(self):
+        """Runs the query on all the sites.
+
+        :return: (site name, record) tuples, records of each site being
+            returned in the order of the query.
+
+        :rtype: pyvcloud.vcd.multi_site.MultiSiteResults
+        """
+        return self._multi_site._fan_out(
+            lambda client: self._get_query(client).execute(), True)
+
+    def count(self):
+        """Counts the results of the query on each site.
+
+        :return: one (site name, count) tuple per site.
+
+        :rtype: pyvcloud.vcd.multi_site.MultiSiteResults
+        """
+        return self._multi_site._fan_out(
+            lambda client: self._get_query(client).count(), False)
+
+    def _get_query(self, client):
+        return client.get_typed_query(
+            self._query_type_name,
+            query_result_format=self._query_result_format,
+            **self._query_args)
+
+
+class MultiSiteResults(object):
+    """Results of a call run on several sites, see MultiSiteClient.
+
+    Iterating over the results runs the call, and returns (site name,
+    result) tuples as the sites answer. Once the iteration is over, errors
+    maps the sites which failed to their exception, a SiteTimeoutException
+    for sites which didn't complete in time, and completed_sites lists the
+    sites whose results were all returned.
+    """
+
+    def __init__(self, clients, timeouts, call, iterate, max_workers):
+        self.errors = OrderedDict()
+        self.completed_sites = []
+        self._clients = clients
+        self._timeouts = timeouts
+        self._call = call
+        self._iterate = iterate
+        self._max_workers = max_workers
+        self._iterator = None
+
+    def __iter__(self):
+        if self._iterator is None:
+            self._iterator = self._run()
+        return self._iterator
+
+    def _run(self):
+        if not self._clients:
+            return
+        messages = queue.SimpleQueue()
+        cancelled = {name: threading.Event() for name in self._clients}
+        start = time.monotonic()
+        deadlines = {
+            name: start + timeout
+            for name, timeout in self._timeouts.items() if timeout is not None
+        }
+        pending = set(self._clients)
+        executor = ThreadPoolExecutor(
+            max_workers=self._max_workers or len(self._clients))
+        try:
+            for name, client in self._clients.items():
+                # workers inherit the current span, if any
+                executor.submit(contextvars.copy_context().run, self._work,
+                                name, client, messages, cancelled[name])
+            while pending:
+                pending_deadlines = [deadlines[name] for name in pending
+                                     if name in deadlines]
+                wait = None
+                if pending_deadlines:
+                    wait = max(min(pending_deadlines) - time.monotonic(), 0)
+                try:
+                    kind, name, value = messages.get(timeout=wait)
+                except queue.Empty:
+                    # sites are only timed out once their messages are read
+                    now = time.monotonic()
+                    for name in [n for n in pending
+                                 if n in deadlines and deadlines[n] <= now]:
+                        pending.discard(name)
+                        cancelled[name].set()
+                        self.errors[name] = SiteTimeoutException(
+                            'Site \'%s\' did not complete within %s seconds.'
+                            % (name, self._timeouts[name]))
+                    continue
+                if name not in pending:
+                    continue
+                if kind == _ITEM:
+                    yield name, value
+                elif kind == _DONE:
+                    pending.discard(name)
+                    self.completed_sites.append(name)
+                else:
+                    pending.discard(name)
+                    self.errors[name] = value
+        finally:
+            for event in cancelled.values():
+                event.set()
+            executor.shutdown(wait=False)
+
+    def _work(self, name, client, messages, cancelled):
+        if cancelled.is_set():
+            return
+        try:
+            result = self._call(client)
+            if self._iterate:
+                for item in result:
+                    if cancelled.is_set():
+                        return
+                    messages.put((_ITEM, name, item))
+            else:
+                messages.put((_ITEM, name, result))
+            messages.put((_DONE, name, None))
+        except Exception as e:
+            messages.put((_ERROR, name, e))
@@ -0,0 +1,279 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from enum import Enum
+
+from lxml import objectify
+
+from pyvcloud.vcd.client import NSMAP
+from pyvcloud.vcd.exceptions import EntityNotFoundException
+from pyvcloud.vcd.exceptions import InvalidParameterException
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TASK_TIMEOUT = 600
+
+_TASK_TAG = '{' + NSMAP['vcloud'] + '}Task'
+
+
+class OperationStatus(Enum):
+    PENDING = 'pending'
+    SUCCEEDED = 'succeeded'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+    BLOCKED = 'blocked'
+
+
+class Operation(object):
+    def __init__(self, name, action, depends_on=(), exists=None, group=None):
+        """Constructor for Operation objects.
+
+        :param str name: unique name of the operation in the graph.
+        :param function action: function without arguments which performs the
+            operation. If it returns an object containing EntityType.TASK XML
+            data, or an entity with pending tasks, the operation completes
+            only once those tasks succeed.
+        :param iterable depends_on: names of the operations which must
+            complete before this one can start.
+        :param function exists: optional function without arguments, which
+            returns True if the operation has already been performed, in which
+            case the action is skipped. EntityNotFoundException raised by it
+            is treated as False.
+        :param str group: optional name of the group the operation belongs
+            to, used to limit how many operations of the group run at the
+            same time.
+        """
+        self.name = name
+        self.action = action
+        self.depends_on = tuple(depends_on)
+        self.exists = exists
+        self.group = group
+        self.status = OperationStatus.PENDING
+        self.result = None
+        self.error = None
+
+
+class OperationGraph(object):
+    """Runs SDK operations concurrently, honouring their dependencies.
+
+    Operations whose dependencies have completed are run on a pool of worker
+    threads, the rest wait. An operation that fails blocks every operation
+    that depends on it, directly or indirectly, while independent branches of
+    the graph carry on.
+    """
+
+    def __init__(self,
+                 client,
+                 max_workers=DEFAULT_MAX_WORKERS,
+                 task_timeout=DEFAULT_TASK_TIMEOUT,
+                 callback=None,
+                 group_limits=None):
+        """Constructor for OperationGraph objects.
+
+        :param pyvcloud.vcd.client.Client client: the client that will be used
+            to monitor the tasks spawned by the operations.
+        :param int max_workers: maximum number of operations which run at the
+            same time.
+        :param int task_timeout: time in seconds to wait for each task spawned
+            by an operation.
+        :param function callback: optional function with signature
+            function(operation) called every time an operation completes,
+            fails or is skipped.
+        :param dict group_limits: maximum number of operations of a group
+            which run at the same time, keyed by group name. Groups not
+            listed are only limited by max_workers.
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.task_timeout = task_timeout
+        self.callback = callback
+        self.group_limits = group_limits or {}
+        self._operations = {}
+
+    def add(self, name, action, depends_on=(), exists=None, group=None):
+        """Adds an operation to the graph.
+
+        :param str name: unique name of the operation.
+        :param function action: function without arguments which performs the
+            operation.
+        :param iterable depends_on: names of the operations which must
+            complete before this one can start.
+        :param function exists: optional function without arguments, which
+            returns True if the operation has already been performed.
+        :param str group: optional name of the group the operation belongs
+            to, see group_limits.
+
+        :return: the operation added to the graph.
+
+        :rtype: pyvcloud.vcd.operation_graph.Operation
+
+        :raises: InvalidParameterException: if an operation with the same name
+            is already part of the graph.
+        """
+        if name in self._operations:
+            raise InvalidParameterException(
+                'Operation \'%s\' is already part of the graph.' % name)
+        operation = Operation(name, action, depends_on, exists, group)
+        self._operations[name] = operation
+        return operation
+
+    def get_operation(self, name):
+        """Retrieves an operation of the graph by name.
+
+        :param str name: name of the operation.
+
+        :return: the named operation.
+
+        :rtype: pyvcloud.vcd.operation_graph.Operation
+
+        :raises: EntityNotFoundException: if the operation is not part of the
+            graph.
+        """
+        if name not in self._operations:
+            raise EntityNotFoundException(
+                'Operation \'%s\' not found.' % name)
+        return self._operations[name]
+
+    def list_operations(self):
+        """Lists the operations of the graph in a valid execution order.
+
+        :return: operations, each one listed after all its dependencies.
+
+        :rtype: list
+
+        :raises: InvalidParameterException: if an operation depends on an
+            unknown operation or if the dependencies form a cycle.
+        """
+        result = []
+        visited = {}
+        for name in self._operations:
+            self._visit(name, visited, result)
+        return result
+
+    def _visit(self, name, visited, result):
+        state = visited.get(name)
+        if state == 'done':
+            return
+        if state == 'visiting':
+            raise InvalidParameterException(
+                'Dependency cycle detected at operation \'%s\'.' % name)
+        visited[name] = 'visiting'
+        operation = self._operations[name]
+        for dependency in operation.depends_on:
+            if dependency not in self._operations:
+                raise InvalidParameterException(
+                    'Operation \'%s\' depends on unknown operation \'%s\'.' %
+                    (name, dependency))
+            self._visit(dependency, visited, result)
+        visited[name] = 'done'
+        result.append(operation)
+
+    def run(self):
+        """Runs all pending operations of the graph.
+
+        :return: status of every operation, keyed by the operation name.
+
+        :rtype: dict
+
+        :raises: InvalidParameterException: if an operation depends on an
+            unknown operation or if the dependencies form a cycle.
+        """
+        order = [op.name for op in self.list_operations()]
+        waiting = {name for name, op in self._operations.items()
+                   if op.status == OperationStatus.PENDING}
+        running = {}
+        running_per_group = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while waiting or running:
+                # operations are listed in execution order, so blocking
+                # propagates down the graph within a single pass
+                for name in [n for n in order if n in waiting]:
+                    if self._is_blocked(name):
+                        waiting.remove(name)
+                        self._complete(self._operations[name],
+                                       OperationStatus.BLOCKED)
+                    elif self._is_ready(name):
+                        group = self._operations[name].group
+                        limit = self.group_limits.get(group)
+                        if limit is not None and \
+                                running_per_group.get(group, 0) >= limit:
+                            continue
+                        waiting.remove(name)
+                        future = executor.submit(self._execute,
+                                                 self._operations[name])
+                        running[future] = name
+                        running_per_group[group] = \
+                            running_per_group.get(group, 0) + 1
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    operation = self._operations[running.pop(future)]
+                    running_per_group[operation.group] -= 1
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        operation.error = e
+                        status = OperationStatus.FAILED
+                    self._complete(operation, status)
+        return {name: op.status for name, op in self._operations.items()}
+
+    def _is_ready(self, name):
+        return all(self._operations[d].status in (OperationStatus.SUCCEEDED,
+                                                  OperationStatus.SKIPPED)
+                   for d in self._operations[name].depends_on)
+
+    def _is_blocked(self, name):
+        return any(self._operations[d].status in (OperationStatus.FAILED,
+                                                  OperationStatus.BLOCKED)
+                   for d in self._operations[name].depends_on)
+
+    def _complete(self, operation, status):
+        operation.status = status
+        if self.callback is not None:
+            self.callback(operation)
+
+    def _execute(self, operation):
+        if operation.exists is not None:
+            try:
+                if operation.exists():
+                    return OperationStatus.SKIPPED
+            except EntityNotFoundException:
+                pass
+        operation.result = operation.action()
+        for task in _get_tasks(operation.result):
+            self.client.get_task_monitor().wait_for_success(
+                task, timeout=self.task_timeout)
+        return OperationStatus.SUCCEEDED
+
+
+def _get_tasks(resource):
+    """Returns the tasks to wait for, spawned by an operation.
+
+    :param resource: result of an operation.
+
+    :return: objects containing EntityType.TASK XML data.
+
+    :rtype: list
+    """
+    if not isinstance(resource, objectify.ObjectifiedElement):
+        return []
+    if resource.tag == _TASK_TAG:
+        return [resource]
+    if hasattr(resource, 'Tasks') and hasattr(resource.Tasks, 'Task'):
+        return list(resource.Tasks.Task)
+    return []
@@ -45,14 +45,16 @@ from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.exceptions import OperationNotSupportedException
 from pyvcloud.vcd.exceptions import UploadException
 from pyvcloud.vcd.metadata import Metadata
+from pyvcloud.vcd.metadata import query_metadata
 from pyvcloud.vcd.system import System
+from pyvcloud.vcd.tracing import traced
 from pyvcloud.vcd.utils import extract_id
 from pyvcloud.vcd.utils import get_admin_href
 from pyvcloud.vcd.utils import get_non_admin_href
 from pyvcloud.vcd.utils import get_safe_members_in_tar_file
 from pyvcloud.vcd.utils import is_admin
+from pyvcloud.vcd.utils import records_to_dict
 from pyvcloud.vcd.utils import retrieve_compute_policy_id_from_href
-from pyvcloud.vcd.utils import to_dict
 from pyvcloud.vcd.utils import update_vm_compute_policy_element
 from pyvcloud.vcd.utils import VDC_COMPUTE_POLICY_MAX_API_VERSION
 from pyvcloud.vcd.utils import VDC_COMPUTE_POLICY_MIN_API_VERSION
@@ -107,6 +109,7 @@ class Org(object):
             self.reload()
         return self.resource.get('name')
 
+    @traced
     def create_catalog(self, name, description):
         """Create a catalog in the organization.
 
@@ -154,15 +157,10 @@ class Org(object):
             resource_type = ResourceType.ADMIN_CATALOG.value
         else:
             resource_type = ResourceType.CATALOG.value
-        result = []
         q = self.client.get_typed_query(
             resource_type, query_result_format=QueryResultFormat.ID_RECORDS)
-        records = list(q.execute())
-        for r in records:
-            result.append(
-                to_dict(
-                    r, resource_type=resource_type, exclude=['owner', 'org']))
-        return result
+        return records_to_dict(
+            q.execute(), resource_type=resource_type, exclude=['owner', 'org'])
 
     def get_catalog(self, name, is_admin_operation=False):
         """Retrieves a catalog by name.
@@ -582,6 +580,7 @@ class Org(object):
         return self._upload_file(
             file_name, file_href, chunk_size=chunk_size, callback=callback)
 
+    @traced
     def upload_ovf(self,
                    catalog_name,
                    file_name,
@@ -861,6 +860,7 @@ class Org(object):
                         time.sleep(1)
         return uploaded_bytes
 
+    @traced
     def capture_vapp(self,
                      catalog_resource,
                      vapp_href,
@@ -1173,13 +1173,10 @@ class Org(object):
             query_result_format=QueryResultFormat.RECORDS,
             equality_filter=name_filter,
             qfilter=org_filter)
-        result = []
-        for r in list(query.execute()):
-            result.append(
-                to_dict(
-                    r, resource_type=resource_type, exclude=['org',
-                                                             'orgName']))
-        return result
+        return records_to_dict(
+            query.execute(),
+            resource_type=resource_type,
+            exclude=['org', 'orgName'])
 
     def add_rights(self, rights):
         """Adds set of rights to the organization.
@@ -1300,13 +1297,8 @@ class Org(object):
             resource_type,
             query_result_format=QueryResultFormat.RECORDS,
             equality_filter=name_filter)
-        records = list(query.execute())
-        result = []
-        if len(records) > 0:
-            for r in records:
-                result.append(
-                    to_dict(r, resource_type=resource_type, exclude=[]))
-        return result
+        return records_to_dict(
+            query.execute(), resource_type=resource_type, exclude=[])
 
     def list_rights_of_org(self):
         """Retrieves the list of rights associated with the current org.
@@ -1320,9 +1312,9 @@ class Org(object):
         rights = []
         if hasattr(org_admin_resource, 'RightReferences') and \
                 hasattr(org_admin_resource.RightReferences, 'RightReference'):
-            for right_reference in \
-                    org_admin_resource.RightReferences.RightReference:
-                rights.append(to_dict(right_reference, exclude=['type']))
+            rights = records_to_dict(
+                org_admin_resource.RightReferences.RightReference,
+                exclude=['type'])
         return rights
 
     def get_catalog_access_settings(self, catalog_name):
@@ -1809,6 +1801,34 @@ class Org(object):
                                 catalog_name, item_name))
         return metadata.get_metadata_value(key, domain)
 
+    def get_vapps_metadata(self, keys, domain=MetadataDomain.GENERAL,
+                           qfilter=None):
+        """Fetch metadata entries of all the vApps in the organization.
+
+        The entries are fetched through the query service, a page of vApps
+        per request, instead of one request per vApp.
+
+        :param iterable keys: keys of the metadata entries to fetch.
+        :param client.MetadataDomain domain: domain of the metadata entries.
+        :param str qfilter: optional filter expression further restricting
+            the vApps, e.g. one built with
+            pyvcloud.vcd.client.get_metadata_filter().
+
+        :return: metadata values, typed as per their MetadataValueType, keyed
+            by metadata key, keyed by vApp href.
+
+        :rtype: dict
+        """
+        if self.client.is_sysadmin():
+            return query_metadata(
+                self.client, ResourceType.ADMIN_VAPP.value, keys,
+                domain=domain, qfilter=qfilter,
+                equality_filter=('org', get_non_admin_href(self.href)))
+        # typed queries of organization users are scoped to their org
+        return query_metadata(
+            self.client, ResourceType.VAPP.value, keys, domain=domain,
+            qfilter=qfilter)
+
     def set_metadata_on_catalog_item(self,
                                      catalog_name,
                                      item_name,
@@ -0,0 +1,225 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+import threading
+import time
+
+
+class EndpointClass(Enum):
+    """Classes of vCD endpoints, each one throttled on its own."""
+
+    QUERY = 'query'
+    GET = 'get'
+    TASK = 'task'
+    TRANSFER = 'transfer'
+
+
+# sustained requests per second and burst size of each endpoint class
+DEFAULT_RATES = {
+    EndpointClass.QUERY: (20, 40),
+    EndpointClass.GET: (50, 100),
+    EndpointClass.TASK: (10, 20),
+    EndpointClass.TRANSFER: (20, 20)
+}
+DEFAULT_INITIAL_LIMIT = 8
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 64
+DEFAULT_DECREASE_FACTOR = 0.5
+DEFAULT_MAX_RETRIES = 3
+# pause applied when vCD throttles a request without a Retry-After header
+DEFAULT_RETRY_AFTER_SEC = 1
+
+
+def get_endpoint_class(method, uri):
+    """Classifies a request by the kind of load it puts on vCD.
+
+    :param str method: http method of the request.
+    :param str uri: uri of the request.
+
+    :return: the class of the endpoint.
+
+    :rtype: EndpointClass
+    """
+    if '/transfer/' in uri:
+        return EndpointClass.TRANSFER
+    if method.upper() == 'GET':
+        if '/api/query' in uri:
+            return EndpointClass.QUERY
+        return EndpointClass.GET
+    return EndpointClass.TASK
+
+
+def parse_retry_after(value):
+    """Parses the value of a Retry-After http header.
+
+    :param str value: either a number of seconds or an http date.
+
+    :return: number of seconds to wait, or None if the value can't be parsed.
+
+    :rtype: float
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class _EndpointState(object):
+    def __init__(self, rate, burst, limit):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.limit = limit
+        self.in_flight = 0
+        self.paused_until = 0
+
+    def refill(self, now):
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def get_wait(self, now):
+        """Returns how long to wait before a request can be sent.
+
+        :return: 0 if a request can be sent now, a number of seconds, or None
+            if a request in flight has to complete first.
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= max(int(self.limit), 1):
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0
+
+
+class AdaptiveRateLimiter(object):
+    """Client side throttling of the requests sent to vCD.
+
+    Each class of endpoint has a token bucket, which caps the rate of
+    requests, and a limit on the number of requests in flight. The limit
+    grows additively while requests succeed and shrinks multiplicatively when
+    vCD signals overload (429 or 503 responses, busy entities, timeouts), so
+    the load settles just below what the cells can take. A Retry-After
+    header, or DEFAULT_RETRY_AFTER_SEC if there is none, pauses the endpoint
+    class for that long.
+
+    A single limiter can be shared by several clients, so that all the
+    requests of a process draw from the same budget.
+    """
+
+    def __init__(self,
+                 rates=None,
+                 initial_limit=DEFAULT_INITIAL_LIMIT,
+                 min_limit=DEFAULT_MIN_LIMIT,
+                 max_limit=DEFAULT_MAX_LIMIT,
+                 decrease_factor=DEFAULT_DECREASE_FACTOR,
+                 max_retries=DEFAULT_MAX_RETRIES):
+        """Constructor for AdaptiveRateLimiter objects.
+
+        :param dict rates: tuples of sustained requests per second and burst
+            size, keyed by EndpointClass. Classes not listed use
+            DEFAULT_RATES.
+        :param int initial_limit: initial number of requests of each class
+            allowed in flight.
+        :param int min_limit: lower bound of the number of requests of each
+            class allowed in flight.
+        :param int max_limit: upper bound of the number of requests of each
+            class allowed in flight.
+        :param float decrease_factor: factor applied to the limit when vCD
+            signals overload.
+        :param int max_retries: number of times a throttled request is
+            retried before its response is returned as is.
+        """
+        all_rates = dict(DEFAULT_RATES)
+        all_rates.update(rates or {})
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self._condition = threading.Condition()
+        self._states = {
+            endpoint_class: _EndpointState(rate, burst, initial_limit)
+            for endpoint_class, (rate, burst) in all_rates.items()
+        }
+
+    def acquire(self, endpoint_class):
+        """Blocks until a request of the endpoint class can be sent.
+
+        Every call must be followed by a call to release() once the request
+        completes.
+
+        :param EndpointClass endpoint_class: class of the request.
+        """
+        state = self._states[endpoint_class]
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                state.refill(now)
+                wait = state.get_wait(now)
+                if wait == 0:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                self._condition.wait(wait)
+
+    def release(self, endpoint_class, overloaded=False, retry_after=None):
+        """Records the completion of a request and adapts the limit.
+
+        :param EndpointClass endpoint_class: class of the request.
+        :param bool overloaded: True if vCD signaled overload.
+        :param float retry_after: if set, number of seconds to pause requests
+            of the endpoint class for.
+        """
+        state = self._states[endpoint_class]
+        with self._condition:
+            state.in_flight -= 1
+            if overloaded:
+                state.limit = max(state.limit * self.decrease_factor,
+                                  self.min_limit)
+            else:
+                # grows by one for every 'limit' successful requests
+                state.limit = min(state.limit + 1.0 / state.limit,
+                                  self.max_limit)
+            if retry_after is not None:
+                state.paused_until = max(state.paused_until,
+                                         time.monotonic() + retry_after)
+            self._condition.notify_all()
+
+    def get_limit(self, endpoint_class):
+        """Returns the current number of requests allowed in flight.
+
+        :param EndpointClass endpoint_class: class of the requests.
+
+        :return: the current limit.
+
+        :rtype: int
+        """
+        with self._condition:
+            return max(int(self._states[endpoint_class].limit), 1)
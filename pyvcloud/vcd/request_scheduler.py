@@ -0,0 +1,135 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+from enum import Enum
+import threading
+import time
+
+
+class RequestPriority(Enum):
+    """Priority classes of requests, from the most to the least urgent."""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+# matches the default size of the connection pool of requests sessions
+DEFAULT_MAX_CONCURRENCY = 10
+# requests in flight only allowed to HIGH priority requests
+DEFAULT_RESERVED_CONCURRENCY = 2
+# time after which a waiting request is promoted to the next priority class
+DEFAULT_MAX_WAIT_SEC = 2
+
+
+class RequestScheduler(object):
+    """Orders the requests sent by clients according to their priority.
+
+    At most max_concurrency requests are in flight at any time, and the last
+    reserved_concurrency of those slots are reserved to HIGH priority
+    requests, so that interactive calls don't queue behind bulk work. Among
+    waiting requests, the most urgent is sent first, in arrival order within
+    a priority class. To keep NORMAL and LOW priority requests from starving,
+    a request is promoted to the next priority class every max_wait seconds
+    it waits. Promoted requests still can't use the reserved slots, and
+    yield to requests of a higher original priority promoted to the same
+    class.
+
+    A single scheduler can be shared by several clients.
+    """
+
+    def __init__(self,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 reserved_concurrency=DEFAULT_RESERVED_CONCURRENCY,
+                 max_wait=DEFAULT_MAX_WAIT_SEC):
+        """Constructor for RequestScheduler objects.
+
+        :param int max_concurrency: maximum number of requests in flight.
+        :param int reserved_concurrency: number of requests in flight
+            reserved to HIGH priority requests.
+        :param float max_wait: time in seconds after which a waiting request
+            is promoted to the next priority class.
+        """
+        self.max_concurrency = max_concurrency
+        self.reserved_concurrency = min(reserved_concurrency,
+                                        max_concurrency - 1)
+        self.max_wait = max_wait
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = {priority: deque() for priority in RequestPriority}
+
+    def acquire(self, priority=RequestPriority.NORMAL):
+        """Blocks until a request of the given priority can be sent.
+
+        Every call must be followed by a call to release() once the request
+        completes.
+
+        :param RequestPriority priority: priority of the request.
+        """
+        queue = self._waiting[priority]
+        # a list, so that each request is identified by its own ticket
+        ticket = [time.monotonic()]
+        with self._condition:
+            queue.append(ticket)
+            while not self._can_send(priority, ticket, time.monotonic()):
+                # wake up periodically, waiting requests get promoted
+                self._condition.wait(self.max_wait)
+            queue.popleft()
+            self._in_flight += 1
+            # the next request in line may be sent as well
+            self._condition.notify_all()
+
+    def release(self):
+        """Records the completion of a request."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _get_rank(self, priority, now):
+        """Returns the effective rank of the oldest request of a priority.
+
+        :return: 0 for the most urgent rank, None if no request waits.
+
+        :rtype: int
+        """
+        queue = self._waiting[priority]
+        if len(queue) == 0:
+            return None
+        promotions = int((now - queue[0][0]) / self.max_wait)
+        return max(priority.value - promotions, 0)
+
+    def _can_send(self, priority, ticket, now):
+        # requests of a priority class are sent in arrival order
+        if self._waiting[priority][0] is not ticket:
+            return False
+        limit = self.max_concurrency
+        # promotions don't give access to the reserved slots
+        if priority != RequestPriority.HIGH:
+            limit -= self.reserved_concurrency
+        if self._in_flight >= limit:
+            return False
+        rank = self._get_rank(priority, now)
+        for other in RequestPriority:
+            if other == priority:
+                continue
+            other_rank = self._get_rank(other, now)
+            if other_rank is None:
+                continue
+            # equal ranks go to the higher original priority
+            if other_rank < rank or \
+                    (other_rank == rank and other.value < priority.value):
+                return False
+        return True
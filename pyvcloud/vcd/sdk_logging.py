@@ -0,0 +1,110 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import atexit
+import logging
+import logging.handlers as handlers
+import os
+from pathlib import Path
+import queue
+import threading
+
+_lock = threading.Lock()
+# listeners writing the log files, keyed by absolute path of the file
+_listeners = {}
+
+
+class _SdkQueueHandler(handlers.QueueHandler):
+    """Queue handler installed by get_file_logger()."""
+
+
+def get_file_logger(name,
+                    file_name,
+                    log_level=logging.DEBUG,
+                    max_bytes=10000000,
+                    backup_count=10,
+                    formatter=None):
+    """Returns a logger writing to a rotating log file.
+
+    Handlers are installed only once per logger, and only if the application
+    hasn't configured handlers for it. Records are handed over to a queue,
+    and a single background thread per log file writes them, so that logging
+    never blocks on disk writes. Pending records are written at exit.
+
+    :param str name: name of the logger.
+    :param str file_name: path of the log file.
+    :param int log_level: log level.
+    :param int max_bytes: max size of log file in bytes.
+    :param int backup_count: no of backup count.
+    :param logging.Formatter formatter: formatter of the records in the
+        file, only used when the file is first opened.
+
+    :return: the logger.
+
+    :rtype: logging.Logger
+    """
+    logger = logging.getLogger(name)
+    with _lock:
+        if logger.handlers:
+            return logger
+        path = os.path.abspath(file_name)
+        listener = _listeners.get(path)
+        if listener is None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            file_handler = handlers.RotatingFileHandler(
+                filename=path, maxBytes=max_bytes, backupCount=backup_count)
+            file_handler.setLevel(log_level)
+            if formatter is not None:
+                file_handler.setFormatter(formatter)
+            listener = handlers.QueueListener(
+                queue.SimpleQueue(), file_handler, respect_handler_level=True)
+            listener.start()
+            _listeners[path] = listener
+        queue_handler = _SdkQueueHandler(listener.queue)
+        queue_handler.setLevel(log_level)
+        logger.addHandler(queue_handler)
+    return logger
+
+
+def truncate_body(body, limit):
+    """Truncates a request or response body for logging.
+
+    :param body: the body.
+    :type body: str or bytes
+    :param int limit: maximum number of bytes or characters logged, None to
+        log whole bodies.
+
+    :return: the body, decoded if needed, and truncated to limit with a
+        mention of the number of bytes or characters left out.
+
+    :rtype: str
+    """
+    truncated = 0
+    if limit is not None and len(body) > limit:
+        truncated = len(body) - limit
+        body = body[:limit]
+    if not isinstance(body, str):
+        body = body.decode('utf-8', errors='replace')
+    if truncated:
+        body += '... [%d more]' % truncated
+    return body
+
+
+@atexit.register
+def _stop_listeners():
+    with _lock:
+        for listener in _listeners.values():
+            listener.stop()
+        _listeners.clear()
@@ -0,0 +1,528 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import urllib
+
+from pyvcloud.vcd.client import FenceMode
+from pyvcloud.vcd.client import QueryResultFormat
+from pyvcloud.vcd.client import ResourceType
+from pyvcloud.vcd.exceptions import EntityNotFoundException
+from pyvcloud.vcd.exceptions import InvalidParameterException
+from pyvcloud.vcd.operation_graph import DEFAULT_MAX_WORKERS
+from pyvcloud.vcd.operation_graph import OperationGraph
+from pyvcloud.vcd.org import Org
+from pyvcloud.vcd.system import System
+from pyvcloud.vcd.utils import get_non_admin_href
+from pyvcloud.vcd.vapp import VApp
+from pyvcloud.vcd.vdc import VDC
+
+# value of provider_vdc_name / network_pool_name in a vdc spec, which selects
+# the first provider vdc / network pool of the system
+ANY = '*'
+
+_NETWORK_TYPES = {
+    'isolated': ('create_isolated_vdc_network', FenceMode.ISOLATED.value),
+    'routed': ('create_routed_vdc_network', FenceMode.NAT_ROUTED.value),
+    'direct': ('create_directly_connected_vdc_network',
+               FenceMode.BRIDGED.value)
+}
+
+# maximum number of deletions of each kind of entity running at the same
+# time during a teardown
+DEFAULT_TEARDOWN_CONCURRENCY = {
+    'undeploy': 8,
+    'vapp': 8,
+    'disk': 8,
+    'media': 4,
+    'template': 4,
+    'network': 4,
+    'gateway': 2,
+    'vdc': 2,
+    'catalog': 4,
+    'org': 1
+}
+
+# entities enumerated in every vdc of the org being torn down
+_VDC_CONTENTS = [
+    ('vapp', ResourceType.ADMIN_VAPP.value),
+    ('disk', ResourceType.ADMIN_DISK.value),
+    ('media', ResourceType.ADMIN_MEDIA.value),
+    ('template', ResourceType.ADMIN_VAPP_TEMPLATE.value),
+    ('network', ResourceType.ORG_VDC_NETWORK.value),
+    ('gateway', ResourceType.EDGE_GATEWAY.value)
+]
+
+
+class TenantProvisioner(object):
+    """Builds a tenant (org and its contents) from a declarative spec.
+
+    The spec is a dict in the format of examples/tenant.yaml:
+
+        {
+            'org': 'Test1',  # or {'name': .., 'full_name': ..}
+            'users': [{'name': .., 'password': .., 'role': ..}],
+            'vdcs': [{'vdc_name': .., 'provider_vdc_name': '*', ..}],
+            'catalogs': [{'name': .., 'description': ..}],
+            'catalog_items': [{'catalog_name': .., 'item_name': ..,
+                               'file_name': ..}],
+            'networks': {'isolated': [{'network_name': .., ..}],
+                         'routed': [..], 'direct': [..]},
+            'vapps': [{'name': .., 'catalog': .., 'template': .., ..}]
+        }
+
+    The singular keys 'user', 'vdc' and 'catalog' are accepted as well.
+    Networks and vApps are created in the vdc named by their 'vdc_name' key,
+    by default in the first vdc of the spec. Apart from the keys mentioned
+    here, entries hold keyword arguments of the corresponding SDK method,
+    i.e. Org.create_user, Org.create_org_vdc, Org.create_catalog,
+    Org.upload_ovf, VDC.create_*_vdc_network and VDC.instantiate_vapp.
+
+    Every entity becomes an operation of a
+    pyvcloud.vcd.operation_graph.OperationGraph, which depends only on the
+    entities it really needs: users, vdcs and catalogs are created in
+    parallel once the org exists, networks once their vdc exists, catalog
+    items once their catalog exists and vApps once their vdc, network and
+    template are in place. Entities which already exist are skipped, so
+    provisioning can be repeated safely.
+    """
+
+    def __init__(self, client, spec):
+        """Constructor for TenantProvisioner objects.
+
+        :param pyvcloud.vcd.client.Client client: the client that will be used
+            to make REST calls to vCD. Must be logged in as system
+            administrator.
+        :param dict spec: description of the tenant.
+
+        :raises: InvalidParameterException: if the spec doesn't name an org.
+        """
+        self.client = client
+        self.spec = spec
+        org_spec = spec.get('org')
+        if isinstance(org_spec, dict):
+            org_spec = dict(org_spec)
+        else:
+            org_spec = {'name': org_spec}
+        if not org_spec.get('name'):
+            raise InvalidParameterException('Tenant spec must name an org.')
+        self.org_name = org_spec.pop('name')
+        self._org_spec = org_spec
+        self._org_href = None
+        self._vdc_hrefs = {}
+
+    def add_operations(self, graph):
+        """Adds the operations provisioning the tenant to a graph.
+
+        Operation names are prefixed by the org name, so several tenants can
+        share one graph and be provisioned concurrently.
+
+        :param pyvcloud.vcd.operation_graph.OperationGraph graph: the graph.
+        """
+        org_op = self._name('org', self.org_name)
+        graph.add(org_op, self._create_org, exists=self._org_exists)
+
+        for user in _as_list(self.spec, 'users', 'user'):
+            graph.add(
+                self._name('user', user['name']),
+                lambda user=user: self._create_user(user),
+                depends_on=[org_op],
+                exists=lambda user=user: self._get_org().get_user(
+                    user['name']) is not None)
+
+        vdc_names = []
+        for vdc in _as_list(self.spec, 'vdcs', 'vdc'):
+            vdc_names.append(vdc['vdc_name'])
+            graph.add(
+                self._name('vdc', vdc['vdc_name']),
+                lambda vdc=vdc: self._create_vdc(vdc),
+                depends_on=[org_op],
+                exists=lambda vdc=vdc: self._get_vdc(
+                    vdc['vdc_name']) is not None)
+
+        for catalog in _as_list(self.spec, 'catalogs', 'catalog'):
+            graph.add(
+                self._name('catalog', catalog['name']),
+                lambda catalog=catalog: self._get_org().create_catalog(
+                    **catalog),
+                depends_on=[org_op],
+                exists=lambda catalog=catalog: self._get_org().get_catalog(
+                    catalog['name']) is not None)
+
+        for item in self.spec.get('catalog_items') or []:
+            graph.add(
+                self._name('catalog_item', item['catalog_name'],
+                           item['item_name']),
+                lambda item=item: self._upload_catalog_item(item),
+                depends_on=self._dependencies(
+                    graph, [self._name('catalog', item['catalog_name'])]),
+                exists=lambda item=item: self._get_org().get_catalog_item(
+                    item['catalog_name'], item['item_name']) is not None)
+
+        networks = self.spec.get('networks') or {}
+        for network_type, (method, fence_mode) in _NETWORK_TYPES.items():
+            for network in networks.get(network_type) or []:
+                network = dict(network)
+                vdc_name = _get_vdc_name(network, vdc_names)
+                graph.add(
+                    self._name('network', vdc_name, network['network_name']),
+                    lambda v=vdc_name, m=method, n=network: getattr(
+                        self._get_vdc(v), m)(**n),
+                    depends_on=self._dependencies(
+                        graph, [self._name('vdc', vdc_name)]),
+                    exists=lambda v=vdc_name, f=fence_mode, n=network: len(
+                        self._get_vdc(v).list_orgvdc_network_resources(
+                            name=n['network_name'], type=f)) > 0)
+
+        for vapp in self.spec.get('vapps') or []:
+            vapp = dict(vapp)
+            vdc_name = _get_vdc_name(vapp, vdc_names)
+            depends_on = [self._name('vdc', vdc_name),
+                          self._name('catalog_item', vapp['catalog'],
+                                     vapp['template'])]
+            if vapp.get('network') is not None:
+                depends_on.append(
+                    self._name('network', vdc_name, vapp['network']))
+            graph.add(
+                self._name('vapp', vdc_name, vapp['name']),
+                lambda v=vdc_name, a=vapp: self._get_vdc(v).instantiate_vapp(
+                    **a),
+                depends_on=self._dependencies(graph, depends_on),
+                exists=lambda v=vdc_name, a=vapp: self._get_vdc(v).get_vapp(
+                    a['name']) is not None)
+
+    def provision(self,
+                  max_workers=DEFAULT_MAX_WORKERS,
+                  callback=None):
+        """Provisions the tenant.
+
+        :param int max_workers: maximum number of operations which run at the
+            same time.
+        :param function callback: optional function with signature
+            function(operation) called every time an operation completes,
+            fails or is skipped.
+
+        :return: the graph that was run, with the status and error of every
+            operation.
+
+        :rtype: pyvcloud.vcd.operation_graph.OperationGraph
+        """
+        graph = OperationGraph(
+            self.client, max_workers=max_workers, callback=callback)
+        self.add_operations(graph)
+        graph.run()
+        return graph
+
+    def _name(self, kind, *names):
+        return '%s/%s:%s' % (self.org_name, kind, '/'.join(names))
+
+    def _dependencies(self, graph, names):
+        # entities not described by the spec are expected to exist already
+        result = []
+        for name in names:
+            try:
+                graph.get_operation(name)
+                result.append(name)
+            except EntityNotFoundException:
+                pass
+        return result
+
+    def _org_exists(self):
+        self._org_href = self.client.get_org_by_name(self.org_name).get(
+            'href')
+        return True
+
+    def _create_org(self):
+        system = System(self.client, admin_resource=self.client.get_admin())
+        admin_org = system.create_org(
+            self.org_name,
+            self._org_spec.get('full_name', self.org_name),
+            self._org_spec.get('is_enabled', True))
+        self._org_href = self.client.get_org_by_name(self.org_name).get(
+            'href')
+        return admin_org
+
+    def _get_org(self):
+        # each operation works on its own Org object, which is fetched on
+        # first use, so concurrent operations never observe a stale or half
+        # reloaded org resource.
+        if self._org_href is None:
+            self._org_exists()
+        return Org(self.client, href=self._org_href)
+
+    def _get_vdc(self, vdc_name):
+        vdc_href = self._vdc_hrefs.get(vdc_name)
+        if vdc_href is None:
+            vdc_resource = self._get_org().get_vdc(vdc_name)
+            if vdc_resource is None:
+                return None
+            vdc_href = vdc_resource.get('href')
+            self._vdc_hrefs[vdc_name] = vdc_href
+        return VDC(self.client, href=vdc_href)
+
+    def _create_user(self, user):
+        kwargs = dict(user)
+        org = self._get_org()
+        role_record = org.get_role_record(kwargs.pop('role'))
+        kwargs.setdefault('is_enabled', True)
+        return org.create_user(
+            user_name=kwargs.pop('name'),
+            role_href=role_record.get('href'),
+            **kwargs)
+
+    def _create_vdc(self, vdc):
+        kwargs = dict(vdc)
+        system = System(self.client, admin_resource=self.client.get_admin())
+        if kwargs.get('provider_vdc_name') == ANY:
+            kwargs['provider_vdc_name'] = _get_first_name(
+                system.list_provider_vdcs(), 'provider vdc')
+        if kwargs.get('network_pool_name') == ANY:
+            kwargs['network_pool_name'] = _get_first_name(
+                system.list_network_pools(), 'network pool')
+        return self._get_org().create_org_vdc(**kwargs)
+
+    def _upload_catalog_item(self, item):
+        org = self._get_org()
+        org.upload_ovf(**item)
+        # the import of the uploaded template into the catalog runs as a
+        # task on the template, wait for it instead of polling the status.
+        catalog_item = org.get_catalog_item(item['catalog_name'],
+                                            item['item_name'])
+        return self.client.get_resource(catalog_item.Entity.get('href'))
+
+
+class TenantTeardown(object):
+    """Deletes the contents of an org concurrently, in dependency order.
+
+    The vApps, independent disks, media, vApp templates, org vdc networks,
+    edge gateways and vdcs of the org are enumerated with typed queries, and
+    deleted as a pyvcloud.vcd.operation_graph.OperationGraph:
+
+        - deployed vApps are powered off and undeployed,
+        - vApps, disks, media and templates are deleted in parallel,
+        - networks of a vdc are deleted once its vApps are gone,
+        - edge gateways of a vdc are deleted once its networks are gone,
+        - a vdc is disabled and deleted once it is empty,
+        - catalogs are deleted once their media and templates are gone,
+        - optionally, the org is deleted last.
+
+    Each kind of entity has its own concurrency limit. Since the plan is
+    built from what is left in vCD, a teardown which failed partway can be
+    resumed by running it again.
+    """
+
+    def __init__(self, client, org_name, delete_org=False, concurrency=None):
+        """Constructor for TenantTeardown objects.
+
+        :param pyvcloud.vcd.client.Client client: the client that will be used
+            to make REST calls to vCD. Must be logged in as system
+            administrator.
+        :param str org_name: name of the org to tear down.
+        :param bool delete_org: if True, the org itself is deleted as well.
+        :param dict concurrency: maximum number of deletions of each kind of
+            entity which run at the same time, overriding the values of
+            DEFAULT_TEARDOWN_CONCURRENCY.
+        """
+        self.client = client
+        self.org_name = org_name
+        self.delete_org = delete_org
+        self.concurrency = dict(DEFAULT_TEARDOWN_CONCURRENCY)
+        if concurrency is not None:
+            self.concurrency.update(concurrency)
+
+    def plan(self, max_workers=DEFAULT_MAX_WORKERS, callback=None):
+        """Builds the graph of operations tearing down the org.
+
+        :param int max_workers: maximum number of operations which run at the
+            same time, also used to enumerate the contents of the vdcs.
+        :param function callback: optional function with signature
+            function(operation) called every time an operation completes,
+            fails or is skipped.
+
+        :return: the graph of operations, empty if the org doesn't exist.
+
+        :rtype: pyvcloud.vcd.operation_graph.OperationGraph
+        """
+        graph = OperationGraph(
+            self.client,
+            max_workers=max_workers,
+            callback=callback,
+            group_limits=self.concurrency)
+        try:
+            org_href = self.client.get_org_by_name(self.org_name).get('href')
+        except EntityNotFoundException:
+            return graph
+
+        vdcs = self._query(ResourceType.ADMIN_ORG_VDC.value,
+                           'org==%s' % urllib.parse.quote(org_href))
+        queries = [(vdc, kind, resource_type) for vdc in vdcs
+                   for kind, resource_type in _VDC_CONTENTS]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda q: self._query(
+                    q[2], 'vdc==%s' % urllib.parse.quote(
+                        get_non_admin_href(q[0].get('href')))),
+                queries)
+            contents = {}
+            for (vdc, kind, _), records in zip(queries, results):
+                contents.setdefault(vdc.get('href'), {})[kind] = records
+
+        catalog_items = []
+        vdc_ops = []
+        for vdc in vdcs:
+            records = contents[vdc.get('href')]
+            vapps = [self._add_vapp(graph, r) for r in records['vapp']]
+            disks = [self._add_disk(graph, r, vapps) for r in records['disk']]
+            items = [self._add(graph, 'media', r) for r in records['media']]
+            items += [self._add(graph, 'template', r)
+                      for r in records['template']]
+            catalog_items += items
+            networks = [self._add(graph, 'network', r, vapps)
+                        for r in records['network']]
+            gateways = [self._add(graph, 'gateway', r, networks)
+                        for r in records['gateway']]
+            vdc_ops.append(
+                self._add(graph, 'vdc', vdc,
+                          vapps + disks + items + networks + gateways,
+                          action=lambda r=vdc: self._delete_vdc(r)))
+
+        catalogs = [self._add(graph, 'catalog', r, catalog_items)
+                    for r in self._query(
+                        ResourceType.ADMIN_CATALOG.value,
+                        'org==%s' % urllib.parse.quote(org_href))]
+        if self.delete_org:
+            graph.add(
+                '%s/org' % self.org_name,
+                lambda: self._delete_org(org_href),
+                depends_on=vdc_ops + catalogs,
+                group='org')
+        return graph
+
+    def run(self, max_workers=DEFAULT_MAX_WORKERS, callback=None):
+        """Tears down the org.
+
+        :param int max_workers: maximum number of operations which run at the
+            same time.
+        :param function callback: optional function with signature
+            function(operation) called every time an operation completes,
+            fails or is skipped.
+
+        :return: the graph that was run, with the status and error of every
+            operation.
+
+        :rtype: pyvcloud.vcd.operation_graph.OperationGraph
+        """
+        graph = self.plan(max_workers=max_workers, callback=callback)
+        graph.run()
+        return graph
+
+    def _query(self, resource_type, qfilter):
+        query = self.client.get_typed_query(
+            resource_type,
+            query_result_format=QueryResultFormat.RECORDS,
+            qfilter=qfilter)
+        return list(query.execute())
+
+    def _add(self, graph, kind, record, depends_on=(), action=None):
+        name = '%s/%s:%s (%s)' % (self.org_name, kind, record.get('name'),
+                                  record.get('href').split('/')[-1])
+        if action is None:
+            action = partial(self.client.delete_resource, record.get('href'))
+        graph.add(name, action, depends_on=depends_on, group=kind)
+        return name
+
+    def _add_vapp(self, graph, record):
+        href = record.get('href')
+        depends_on = []
+        if record.get('isDeployed') == 'true':
+            depends_on.append(
+                self._add(graph, 'undeploy', record,
+                          action=lambda: VApp(self.client, href=href).
+                          undeploy(action='powerOff')))
+        return self._add(graph, 'vapp', record, depends_on,
+                         action=lambda: self.client.delete_resource(
+                             href, force=True))
+
+    def _add_disk(self, graph, record, vapps):
+        # attached disks can only go once the vms using them are deleted
+        depends_on = vapps if record.get('isAttached') == 'true' else []
+        return self._add(graph, 'disk', record, depends_on)
+
+    def _delete_vdc(self, record):
+        vdc = VDC(self.client, href=get_non_admin_href(record.get('href')))
+        if record.get('isEnabled') == 'true':
+            vdc.enable_vdc(False)
+        return vdc.delete_vdc()
+
+    def _delete_org(self, org_href):
+        # an enabled org can't be deleted without forcing it
+        Org(self.client, href=org_href).update_org(is_enabled=False)
+        system = System(self.client, admin_resource=self.client.get_admin())
+        return system.delete_org(self.org_name)
+
+
+def provision_tenants(client,
+                      specs,
+                      max_workers=DEFAULT_MAX_WORKERS,
+                      callback=None):
+    """Provisions several tenants concurrently.
+
+    The operations of all tenants are run as one graph, so independent
+    operations of different tenants run in parallel too.
+
+    :param pyvcloud.vcd.client.Client client: the client that will be used
+        to make REST calls to vCD. Must be logged in as system administrator.
+    :param list specs: description of each tenant, see TenantProvisioner.
+    :param int max_workers: maximum number of operations which run at the
+        same time.
+    :param function callback: optional function with signature
+        function(operation) called every time an operation completes, fails
+        or is skipped.
+
+    :return: the graph that was run, with the status and error of every
+        operation.
+
+    :rtype: pyvcloud.vcd.operation_graph.OperationGraph
+    """
+    graph = OperationGraph(client, max_workers=max_workers, callback=callback)
+    for spec in specs:
+        TenantProvisioner(client, spec).add_operations(graph)
+    graph.run()
+    return graph
+
+
+def _as_list(spec, plural_key, singular_key):
+    if spec.get(plural_key):
+        return spec[plural_key]
+    if spec.get(singular_key):
+        return [spec[singular_key]]
+    return []
+
+
+def _get_vdc_name(kwargs, vdc_names):
+    vdc_name = kwargs.pop('vdc_name', None)
+    if vdc_name is None:
+        if len(vdc_names) == 0:
+            raise InvalidParameterException(
+                'Tenant spec has no vdc, \'vdc_name\' must be specified.')
+        vdc_name = vdc_names[0]
+    return vdc_name
+
+
+def _get_first_name(references, kind):
+    for reference in references:
+        return reference.get('name')
+    raise EntityNotFoundException('No %s found in the system.' % kind)
@@ -0,0 +1,178 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from contextlib import nullcontext
+import functools
+import re
+import urllib
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry import trace
+    from opentelemetry.trace import Status
+    from opentelemetry.trace import StatusCode
+except ImportError:
+    trace = None
+
+# spans are only exported if the application configures an OpenTelemetry
+# SDK, without the opentelemetry-api package all functions are no-ops
+
+# vCD records the client request id of requests in its logs
+HEADER_CLIENT_REQUEST_ID = 'X-VMWARE-VCLOUD-CLIENT-REQUEST-ID'
+
+_TRACER_NAME = 'pyvcloud'
+_UUID_PATTERN = re.compile(
+    '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
+    re.IGNORECASE)
+_VERSION_PATTERN = re.compile(r'\d+(\.\d+)+')
+# path segments which don't tell the type of the entity
+_PATH_PREFIXES = ('api', 'cloudapi', 'admin', 'extension')
+
+
+def is_enabled():
+    """Tells whether OpenTelemetry is installed.
+
+    :rtype: bool
+    """
+    return trace is not None
+
+
+def start_span(name, attributes=None):
+    """Starts a span, child of the current span.
+
+    :param str name: name of the span.
+    :param dict attributes: attributes of the span.
+
+    :return: a context manager running its block in the span, and returning
+        the span, or None if OpenTelemetry is not installed.
+    """
+    if trace is None:
+        return nullcontext()
+    return trace.get_tracer(_TRACER_NAME).start_as_current_span(
+        name, attributes=attributes)
+
+
+def start_request_span(method, uri):
+    """Starts the span of an http request.
+
+    :param str method: http method of the request.
+    :param str uri: uri of the request.
+
+    :return: a context manager running its block in the span, see
+        start_span().
+    """
+    if trace is None:
+        return nullcontext()
+    href_template = get_href_template(uri)
+    return start_span(
+        '%s %s' % (method, href_template), {
+            'http.method': method,
+            'http.url': uri,
+            'vcd.href_template': href_template,
+            'vcd.entity_type': _get_entity_type(href_template)
+        })
+
+
+def inject_context(headers):
+    """Adds the trace context of the current span to request headers.
+
+    The W3C trace context goes in the traceparent header, the trace and span
+    ids in the client request id header.
+
+    :param dict headers: headers of the request.
+    """
+    if trace is None:
+        return
+    propagate.inject(headers)
+    context = trace.get_current_span().get_span_context()
+    if context.is_valid:
+        headers[HEADER_CLIENT_REQUEST_ID] = '%032x-%016x' % (
+            context.trace_id, context.span_id)
+
+
+def set_response(span, status_code, request_id):
+    """Records the response of an http request in its span.
+
+    :param span: span of the request, None if OpenTelemetry is not
+        installed.
+    :param int status_code: status code of the response.
+    :param str request_id: id of the request in vCD, from the
+        X-VMWARE-VCLOUD-REQUEST-ID header of the response.
+    """
+    if span is None:
+        return
+    span.set_attribute('http.status_code', status_code)
+    if request_id is not None:
+        span.set_attribute('vcd.request_id', request_id)
+    if status_code >= 400:
+        span.set_status(Status(StatusCode.ERROR))
+
+
+def set_attribute(span, key, value):
+    """Sets an attribute of a span.
+
+    :param span: the span, None if OpenTelemetry is not installed.
+    :param str key: name of the attribute.
+    :param value: value of the attribute.
+    """
+    if span is not None and value is not None:
+        span.set_attribute(key, value)
+
+
+def traced(method):
+    """Decorator tracing the calls of a method of an entity class.
+
+    Each call runs in a span named after the method, e.g.
+    VDC.instantiate_vapp, with the entity type and href as attributes.
+
+    :param function method: the method.
+
+    :return: the method, unchanged if OpenTelemetry is not installed.
+
+    :rtype: function
+    """
+    if trace is None:
+        return method
+
+    @functools.wraps(method)
+    def traced_method(self, *args, **kwargs):
+        attributes = {'vcd.entity_type': type(self).__name__}
+        href = getattr(self, 'href', None)
+        if href is not None:
+            attributes['vcd.href'] = href
+        with start_span(method.__qualname__, attributes):
+            return method(self, *args, **kwargs)
+    return traced_method
+
+
+def get_href_template(uri):
+    """Returns the path of a uri, with ids replaced by placeholders.
+
+    :param str uri: uri of a request e.g.
+        https://vcd/api/vApp/vapp-9a6c0ec1-8b33-4a43-a9c9-3d0c6c3e4b5a.
+
+    :return: the template e.g. /api/vApp/vapp-{id}.
+
+    :rtype: str
+    """
+    return _UUID_PATTERN.sub('{id}', urllib.parse.urlsplit(uri).path)
+
+
+def _get_entity_type(href_template):
+    for segment in href_template.split('/'):
+        if segment and segment not in _PATH_PREFIXES and \
+                not _VERSION_PATTERN.fullmatch(segment):
+            return segment
+    return None
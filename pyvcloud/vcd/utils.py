@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from datetime import datetime
 from ipaddress import IPv4Network
 from os.path import abspath
 from os.path import dirname
@@ -30,6 +31,7 @@ from pyvcloud.vcd.client import ApiVersion
 from pyvcloud.vcd.client import E
 from pyvcloud.vcd.client import EntityType
 from pyvcloud.vcd.client import get_links
+from pyvcloud.vcd.client import MetadataValueType
 from pyvcloud.vcd.client import NSMAP
 from pyvcloud.vcd.client import VCLOUD_STATUS_MAP
 
@@ -38,6 +40,35 @@ VDC_COMPUTE_POLICY_MIN_API_VERSION = float(ApiVersion.VERSION_32.value)
 VDC_COMPUTE_POLICY_MAX_API_VERSION = float(ApiVersion.VERSION_33.value)
 VM_SIZING_POLICY_MIN_API_VERSION = float(ApiVersion.VERSION_33.value)
 
+# Clark notation tags and compiled XPath expressions used by the converters
+# below, built once instead of on every call (and every loop iteration).
+OVF_NAME = '{' + NSMAP['ovf'] + '}name'
+OVF_VIRTUAL_HARDWARE_SECTION = '{' + NSMAP['ovf'] + '}VirtualHardwareSection'
+OVF_ITEM = '{' + NSMAP['ovf'] + '}Item'
+RASD_ADDRESS_ON_PARENT = '{' + NSMAP['rasd'] + '}AddressOnParent'
+RASD_CONNECTION = '{' + NSMAP['rasd'] + '}Connection'
+RASD_DESCRIPTION = '{' + NSMAP['rasd'] + '}Description'
+RASD_ELEMENT_NAME = '{' + NSMAP['rasd'] + '}ElementName'
+RASD_INSTANCE_ID = '{' + NSMAP['rasd'] + '}InstanceID'
+RASD_RESOURCE_TYPE = '{' + NSMAP['rasd'] + '}ResourceType'
+RASD_VIRTUAL_QUANTITY = '{' + NSMAP['rasd'] + '}VirtualQuantity'
+RASD_VIRTUAL_QUANTITY_UNITS = '{' + NSMAP['rasd'] + '}VirtualQuantityUnits'
+VCLOUD_IP_ADDRESS = '{' + NSMAP['vcloud'] + '}ipAddress'
+VCLOUD_IP_ADDRESSING_MODE = '{' + NSMAP['vcloud'] + '}ipAddressingMode'
+VCLOUD_PRIMARY_NETWORK_CONNECTION = \
+    '{' + NSMAP['vcloud'] + '}primaryNetworkConnection'
+VE_VCENTER_ID = '{' + NSMAP['ve'] + '}vCenterId'
+VMEXT_VM_VIM_INFO = '{' + NSMAP['vmext'] + '}VmVimInfo'
+VMEXT_VM_VIM_OBJECT_REF = '{' + NSMAP['vmext'] + '}VmVimObjectRef'
+VMEXT_MO_REF = '{' + NSMAP['vmext'] + '}MoRef'
+XSI_TYPE = '{' + NSMAP['xsi'] + '}type'
+
+VAPP_NETWORKS_XPATH = etree.XPath('ovf:NetworkSection/ovf:Network',
+                                  namespaces=NSMAP)
+VM_HARDWARE_ITEMS_XPATH = etree.XPath('ovf:VirtualHardwareSection/ovf:Item',
+                                      namespaces=NSMAP)
+VM_ENVIRONMENT_XPATH = etree.XPath('ovfenv:Environment', namespaces=NSMAP)
+
 
 def extract_id(urn):
     """Extract id from an urn.
@@ -119,32 +150,34 @@ def vdc_to_dict(vdc, access_control_settings=None):
         for n in vdc.AvailableNetworks.Network:
             result['networks'].append(n.get('name'))
     if hasattr(vdc, 'ComputeCapacity'):
+        cpu = vdc.ComputeCapacity.Cpu
+        memory = vdc.ComputeCapacity.Memory
         result['cpu_capacity'] = {
-            'units': str(vdc.ComputeCapacity.Cpu.Units),
-            'allocated': str(vdc.ComputeCapacity.Cpu.Allocated),
-            'limit': str(vdc.ComputeCapacity.Cpu.Limit),
-            'reserved': str(vdc.ComputeCapacity.Cpu.Reserved),
-            'used': str(vdc.ComputeCapacity.Cpu.Used)
+            'units': str(cpu.Units),
+            'allocated': str(cpu.Allocated),
+            'limit': str(cpu.Limit),
+            'reserved': str(cpu.Reserved),
+            'used': str(cpu.Used)
         }
-        if hasattr(vdc.ComputeCapacity.Cpu, 'Overhead'):
-            result['cpu_capacity'] = str(vdc.ComputeCapacity.Cpu.Overhead)
+        if hasattr(cpu, 'Overhead'):
+            result['cpu_capacity'] = str(cpu.Overhead)
         result['mem_capacity'] = {
             'units':
-            str(vdc.ComputeCapacity.Memory.Units),
+            str(memory.Units),
             'allocated':
-            str(vdc.ComputeCapacity.Memory.Allocated),
+            str(memory.Allocated),
             'limit':
-            str(vdc.ComputeCapacity.Memory.Limit),
+            str(memory.Limit),
             'reserved':
-            str(vdc.ComputeCapacity.Memory.Reserved),
+            str(memory.Reserved),
             'used':
             humanfriendly.format_size(
-                int(str(vdc.ComputeCapacity.Memory.Used)) *
+                int(str(memory.Used)) *
                 humanfriendly.parse_size(
-                    '1 %s' % str(vdc.ComputeCapacity.Memory.Units)))
+                    '1 %s' % str(memory.Units)))
         }
-        if hasattr(vdc.ComputeCapacity.Memory, 'Overhead'):
-            result['mem_capacity'] = str(vdc.ComputeCapacity.Memory.Overhead)
+        if hasattr(memory, 'Overhead'):
+            result['mem_capacity'] = str(memory.Overhead)
     if hasattr(vdc, 'AllocationModel'):
         result['allocation_model'] = str(vdc.AllocationModel)
     if hasattr(vdc, 'VmQuota'):
@@ -204,41 +237,43 @@ def pvdc_to_dict(pvdc, refs=None, metadata=None):
             result['networks'].append(n.get('name'))
 
     if hasattr(pvdc, 'ComputeCapacity'):
+        cpu = pvdc.ComputeCapacity.Cpu
+        memory = pvdc.ComputeCapacity.Memory
         result['cpu_capacity'] = {
-            'units': str(pvdc.ComputeCapacity.Cpu.Units),
-            'total': str(pvdc.ComputeCapacity.Cpu.Total)
+            'units': str(cpu.Units),
+            'total': str(cpu.Total)
         }
         # process optional elements
-        if hasattr(pvdc.ComputeCapacity.Cpu, 'Allocation'):
+        if hasattr(cpu, 'Allocation'):
             result['cpu_capacity']['allocation'] = \
-                str(pvdc.ComputeCapacity.Cpu.Allocation)
-        if hasattr(pvdc.ComputeCapacity.Cpu, 'Reserved'):
+                str(cpu.Allocation)
+        if hasattr(cpu, 'Reserved'):
             result['cpu_capacity']['reserved'] = \
-                str(pvdc.ComputeCapacity.Cpu.Reserved)
-        if hasattr(pvdc.ComputeCapacity.Cpu, 'Used'):
+                str(cpu.Reserved)
+        if hasattr(cpu, 'Used'):
             result['cpu_capacity']['used'] = \
-                str(pvdc.ComputeCapacity.Cpu.Used)
-        if hasattr(pvdc.ComputeCapacity.Cpu, 'Overhead'):
+                str(cpu.Used)
+        if hasattr(cpu, 'Overhead'):
             result['cpu_capacity']['overhead'] = \
-                str(pvdc.ComputeCapacity.Cpu.Overhead)
+                str(cpu.Overhead)
 
         result['mem_capacity'] = {
-            'units': str(pvdc.ComputeCapacity.Memory.Units),
-            'total': str(pvdc.ComputeCapacity.Memory.Total)
+            'units': str(memory.Units),
+            'total': str(memory.Total)
         }
         # process optional elements
-        if hasattr(pvdc.ComputeCapacity.Memory, 'Allocation'):
+        if hasattr(memory, 'Allocation'):
             result['mem_capacity']['allocation'] = \
-                str(pvdc.ComputeCapacity.Memory.Allocation)
-        if hasattr(pvdc.ComputeCapacity.Memory, 'Reserved'):
+                str(memory.Allocation)
+        if hasattr(memory, 'Reserved'):
             result['mem_capacity']['reserved'] = \
-                str(pvdc.ComputeCapacity.Memory.Reserved)
-        if hasattr(pvdc.ComputeCapacity.Memory, 'Used'):
+                str(memory.Reserved)
+        if hasattr(memory, 'Used'):
             result['mem_capacity']['used'] = \
-                str(pvdc.ComputeCapacity.Memory.Used)
-        if hasattr(pvdc.ComputeCapacity.Memory, 'Overhead'):
+                str(memory.Used)
+        if hasattr(memory, 'Overhead'):
             result['mem_capacity']['overhead'] = \
-                str(pvdc.ComputeCapacity.Memory.Overhead)
+                str(memory.Overhead)
 
     if hasattr(pvdc, 'Capabilities') and \
             hasattr(pvdc.Capabilities, 'SupportedHardwareVersions') and \
@@ -318,17 +353,19 @@ def vapp_to_dict(vapp, metadata=None, access_control_settings=None):
         result['owner'] = []
         for user in vapp.Owner.User:
             result['owner'].append(user.get('name'))
-    items = vapp.xpath('//ovf:NetworkSection/ovf:Network', namespaces=NSMAP)
+    items = VAPP_NETWORKS_XPATH(vapp)
+    network_configs = {}
+    if len(items) > 0 and hasattr(vapp, 'NetworkConfigSection'):
+        for nc in vapp.NetworkConfigSection.NetworkConfig:
+            network_configs[nc.get('networkName')] = nc
     n = 0
     for item in items:
         n += 1
-        network_name = item.get('{' + NSMAP['ovf'] + '}name')
+        network_name = item.get(OVF_NAME)
         result['vapp-net-%s' % n] = network_name
-        if hasattr(vapp, 'NetworkConfigSection'):
-            for nc in vapp.NetworkConfigSection.NetworkConfig:
-                if nc.get('networkName') == network_name:
-                    result['vapp-net-%s-mode' % n] = \
-                        nc.Configuration.FenceMode.text
+        if network_name in network_configs:
+            result['vapp-net-%s-mode' % n] = \
+                network_configs[network_name].Configuration.FenceMode.text
     if hasattr(vapp, 'LeaseSettingsSection'):
         if hasattr(vapp.LeaseSettingsSection, 'DeploymentLeaseInSeconds'):
             result['deployment_lease'] = to_human(
@@ -345,30 +382,26 @@ def vapp_to_dict(vapp, metadata=None, access_control_settings=None):
             n += 1
             k = 'vm-%s' % n
             result[k + ': name'] = vm.get('name')
-            items = vm.xpath('ovf:VirtualHardwareSection/ovf:Item',
-                             namespaces=NSMAP)
-            for item in items:
-                element_name = item.find('rasd:ElementName', NSMAP)
-                connection = item.find('rasd:Connection', NSMAP)
+            for item in VM_HARDWARE_ITEMS_XPATH(vm):
+                element_name = item.find(RASD_ELEMENT_NAME)
+                connection = item.find(RASD_CONNECTION)
                 if connection is None:
-                    quantity = item.find('rasd:VirtualQuantity', NSMAP)
+                    quantity = item.find(RASD_VIRTUAL_QUANTITY)
                     if quantity is None or isinstance(quantity, NoneElement):
-                        value = item.find('rasd:Description', NSMAP)
+                        value = item.find(RASD_DESCRIPTION)
                     else:
-                        units = item.find('rasd:VirtualQuantityUnits', NSMAP)
+                        units = item.find(RASD_VIRTUAL_QUANTITY_UNITS)
                         if isinstance(units, NoneElement):
                             units = ''
                         value = '{:,} {}'.format(int(quantity), units).strip()
                 else:
                     value = '{}: {}'.format(
-                        connection.get('{' + NSMAP['vcloud'] +
-                                       '}ipAddressingMode'),
-                        connection.get('{' + NSMAP['vcloud'] + '}ipAddress'))
+                        connection.get(VCLOUD_IP_ADDRESSING_MODE),
+                        connection.get(VCLOUD_IP_ADDRESS))
                 result['%s: %s' % (k, element_name)] = value
-            env = vm.xpath('ovfenv:Environment', namespaces=NSMAP)
+            env = VM_ENVIRONMENT_XPATH(vm)
             if len(env) > 0:
-                result['%s: %s' % (k, 'moid')] = env[0].get('{' + NSMAP['ve'] +
-                                                            '}vCenterId')
+                result['%s: %s' % (k, 'moid')] = env[0].get(VE_VCENTER_ID)
             if hasattr(vm, 'StorageProfile'):
                 result['%s: %s' % (k, 'storage-profile')] = \
                     vm.StorageProfile.get('name')
@@ -444,27 +477,23 @@ def vm_to_dict(vm):
     result['status'] = VCLOUD_STATUS_MAP.get(int(vm.get('status')))
     result['needs-customization'] = vm.get('needsCustomization')
     if hasattr(vm, 'VCloudExtension'):
-        result['moref'] = vm.VCloudExtension[
-            '{' + NSMAP['vmext'] + '}VmVimInfo'][
-                '{' + NSMAP['vmext'] + '}VmVimObjectRef'][
-                    '{' + NSMAP['vmext'] + '}MoRef'].text
+        result['moref'] = vm.VCloudExtension[VMEXT_VM_VIM_INFO][
+            VMEXT_VM_VIM_OBJECT_REF][VMEXT_MO_REF].text
     if hasattr(vm, 'GuestCustomizationSection'):
         result['computer-name'] = \
             vm.GuestCustomizationSection.ComputerName.text
 
     disk_instance_name_map = {}
     nic_instance_name_map = {}
-    if hasattr(vm, '{' + NSMAP['ovf'] + '}VirtualHardwareSection'):
-        for item in vm['{' + NSMAP['ovf'] + '}VirtualHardwareSection'][
-                '{' + NSMAP['ovf'] + '}Item']:
-            if item['{' + NSMAP['rasd'] + '}ResourceType'].text == str(10):
-                nic_instance_name_map[
-                    item['{' + NSMAP['rasd'] + '}AddressOnParent'].text] = \
-                    item['{' + NSMAP['rasd'] + '}ElementName'].text
-            if item['{' + NSMAP['rasd'] + '}ResourceType'].text == str(17):
-                disk_instance_name_map[
-                    item['{' + NSMAP['rasd'] + '}InstanceID'].text] = \
-                    item['{' + NSMAP['rasd'] + '}ElementName'].text
+    if hasattr(vm, OVF_VIRTUAL_HARDWARE_SECTION):
+        for item in vm[OVF_VIRTUAL_HARDWARE_SECTION][OVF_ITEM]:
+            resource_type = item[RASD_RESOURCE_TYPE].text
+            if resource_type == '10':
+                nic_instance_name_map[item[RASD_ADDRESS_ON_PARENT].text] = \
+                    item[RASD_ELEMENT_NAME].text
+            elif resource_type == '17':
+                disk_instance_name_map[item[RASD_INSTANCE_ID].text] = \
+                    item[RASD_ELEMENT_NAME].text
 
     if hasattr(vm, 'NetworkConnectionSection'):
         ncs = vm.NetworkConnectionSection
@@ -676,6 +705,62 @@ def extract_metadata_value(metadata_value):
     return metadata_value.TypedValue.Value.text
 
 
+def typed_metadata_to_dict(metadata):
+    """Converts a lxml.objectify.ObjectifiedElement metadata object to a dict.
+
+    Unlike metadata_to_dict(), values are converted to the python type
+    matching their MetadataValueType.
+
+    :param lxml.objectify.ObjectifiedElement metadata: an object containing
+        EntityType.METADATA XML data, or the Metadata element of a query
+        record.
+
+    :return: metadata values keyed by metadata key, see
+        typed_value_to_python() for the types of the values.
+
+    :rtype: dict
+    """
+    result = {}
+    if hasattr(metadata, 'MetadataEntry'):
+        for entry in metadata.MetadataEntry:
+            result[entry.Key.text] = typed_value_to_python(entry.TypedValue)
+    return result
+
+
+def typed_value_to_python(typed_value):
+    """Converts a TypedValue of a metadata entry to a python value.
+
+    :param lxml.objectify.ObjectifiedElement typed_value: an object containing
+        TypedValue XML data.
+
+    :return: an int or a float for MetadataNumberValue, a bool for
+        MetadataBooleanValue, a datetime for MetadataDateTimeValue if it can
+        be parsed and the text of the value otherwise.
+    """
+    text = typed_value.Value.text
+    value_type = typed_value.get(XSI_TYPE)
+    if text is None or value_type is None:
+        return text
+    value_type = value_type.split(':')[-1]
+    if value_type == MetadataValueType.NUMBER.value:
+        try:
+            return int(text)
+        except ValueError:
+            return float(text)
+    if value_type == MetadataValueType.BOOLEAN.value:
+        return text.lower() == 'true'
+    if value_type == MetadataValueType.DATA_TIME.value:
+        # vCD reports date times with a Z suffix, which strptime doesn't
+        # understand as a utc offset
+        text_utc = text[:-1] + '+0000' if text.endswith('Z') else text
+        for date_format in ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S%z'):
+            try:
+                return datetime.strptime(text_utc, date_format)
+            except ValueError:
+                pass
+    return text
+
+
 def filter_attributes(resource_type):
     """Returns a list of attributes for a given resource type.
 
@@ -725,33 +810,80 @@ def to_dict(obj,
     """
     if obj is None:
         return {}
-    result = {}
+    template, selected = _get_to_dict_template(attributes, resource_type)
+    return _to_dict(obj, template, selected, exclude)
+
+
+def records_to_dict(records,
+                    attributes=None,
+                    resource_type=None,
+                    exclude=['href', 'type']):
+    """Converts a list of query records to a list of dictionaries.
+
+    Produces the same output as calling to_dict() on every record, but the
+    attribute selection is worked out once for the whole list.
+
+    :param iterable records: lxml.objectify.ObjectifiedElement objects e.g.
+        as returned by executing a typed query.
+    :param list attributes: list of attributes we want to extract from the XML
+        objects.
+    :param str resource_type: type of resource of the records. Acceptable
+        values are listed in the enum pyvcloud.vcd.client.ResourceType.
+    :param list exclude: list of attributes that should be excluded from the
+        dictionaries.
+
+    :return: the dictionaries representing the records.
+
+    :rtype: list
+    """
+    template, selected = _get_to_dict_template(attributes, resource_type)
+    return [{} if r is None else _to_dict(r, template, selected, exclude)
+            for r in records]
+
+
+def _get_to_dict_template(attributes, resource_type):
+    """Works out the attribute selection used by to_dict().
+
+    :param list attributes: list of attributes to extract, takes precedence
+        over resource_type.
+    :param str resource_type: type of resource whose default attributes
+        should be extracted.
+
+    :return: a dict with all the selected attributes set to None, and the set
+        of selected attributes (None if all the attributes are selected).
+
+    :rtype: tuple
+    """
     attributes_res = filter_attributes(resource_type)
+    template = {}
     if attributes:
         for attr in attributes:
-            result[attr] = None
+            template[attr] = None
     if attributes_res:
         for attr in attributes_res:
-            result[attr] = None
-    for attr in obj.attrib:
-        flag = False
-        if attributes:
-            flag = attr in attributes
-        elif attributes_res:
-            flag = attr in attributes_res
-        else:
-            flag = True
-        if flag:
+            template[attr] = None
+    if attributes:
+        selected = frozenset(attributes)
+    elif attributes_res:
+        selected = frozenset(attributes_res)
+    else:
+        selected = None
+    return template, selected
+
+
+def _to_dict(obj, template, selected, exclude):
+    result = dict(template)
+    for attr, value in obj.attrib.items():
+        if selected is None or attr in selected:
             if attr == 'id':
-                result[attr] = extract_id(obj.get(attr))
+                result[attr] = extract_id(value)
             else:
-                result[attr] = obj.get(attr)
+                result[attr] = value
     if hasattr(obj, '__dict__'):
         for key in obj.__dict__:
             result[key] = obj[key].text
     for e in exclude:
-        if e in result.keys():
-            result.pop(e)
+        result.pop(e, None)
     return result
 
 
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 from copy import deepcopy
+import urllib
 
 from lxml import etree
 from lxml import objectify
@@ -29,15 +30,24 @@ from pyvcloud.vcd.client import MetadataDomain
 from pyvcloud.vcd.client import MetadataValueType
 from pyvcloud.vcd.client import MetadataVisibility
 from pyvcloud.vcd.client import NSMAP
+from pyvcloud.vcd.client import QueryResultFormat
 from pyvcloud.vcd.client import RelationType
+from pyvcloud.vcd.client import ResourceType
 from pyvcloud.vcd.client import VCLOUD_STATUS_MAP
 from pyvcloud.vcd.exceptions import EntityNotFoundException
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.exceptions import InvalidStateException
 from pyvcloud.vcd.exceptions import OperationNotSupportedException
 from pyvcloud.vcd.metadata import Metadata
+from pyvcloud.vcd.tracing import traced
 from pyvcloud.vcd.utils import cidr_to_netmask
 from pyvcloud.vcd.utils import generate_compute_policy_tags
+from pyvcloud.vcd.utils import RASD_CONNECTION
+from pyvcloud.vcd.utils import VCLOUD_IP_ADDRESS
+from pyvcloud.vcd.utils import VCLOUD_PRIMARY_NETWORK_CONNECTION
+from pyvcloud.vcd.utils import VE_VCENTER_ID
+from pyvcloud.vcd.utils import VM_ENVIRONMENT_XPATH
+from pyvcloud.vcd.utils import VM_HARDWARE_ITEMS_XPATH
 from pyvcloud.vcd.vdc import VDC
 from pyvcloud.vcd.vm import VM
 
@@ -107,19 +117,42 @@ class VApp(object):
         :raises: Exception: if the named vm or its NIC information can't be
             found.
         """
-        self.get_resource()
+        if self.resource is None:
+            # avoid fetching the whole vApp along with all its vms, the
+            # network connection section of the named vm is enough.
+            vm_href = self._get_vm_href(vm_name)
+            if vm_href is not None:
+                net_conn_section = self.client.get_resource(
+                    vm_href + '/networkConnectionSection/')
+                if hasattr(net_conn_section, 'NetworkConnection'):
+                    primary_index = None
+                    if hasattr(net_conn_section,
+                               'PrimaryNetworkConnectionIndex'):
+                        primary_index = \
+                            net_conn_section.PrimaryNetworkConnectionIndex.text
+                    for nc in net_conn_section.NetworkConnection:
+                        if primary_index is None or \
+                                nc.NetworkConnectionIndex.text == \
+                                primary_index:
+                            if hasattr(nc, 'IpAddress'):
+                                return nc.IpAddress.text
+            raise Exception('can\'t find ip address')
         if hasattr(self.resource, 'Children') and \
            hasattr(self.resource.Children, 'Vm'):
             for vm in self.resource.Children.Vm:
                 if vm_name == vm.get('name'):
-                    items = vm.xpath(
-                        'ovf:VirtualHardwareSection/ovf:Item',
-                        namespaces=NSMAP)
-                    for item in items:
-                        connection = item.find('rasd:Connection', NSMAP)
-                        if connection is not None:
-                            return connection.get('{' + NSMAP['vcloud'] +
-                                                  '}ipAddress')
+                    connections = [
+                        c for c in (item.find(RASD_CONNECTION)
+                                    for item in VM_HARDWARE_ITEMS_XPATH(vm))
+                        if c is not None
+                    ]
+                    # fall back to the first NIC if none is marked primary
+                    primary = next(
+                        (c for c in connections
+                         if c.get(VCLOUD_PRIMARY_NETWORK_CONNECTION) ==
+                         'true'), connections[0] if connections else None)
+                    if primary is not None:
+                        return primary.get(VCLOUD_IP_ADDRESS)
         raise Exception('can\'t find ip address')
 
     def get_admin_password(self, vm_name):
@@ -253,9 +286,9 @@ class VApp(object):
         if hasattr(vapp, 'Children') and hasattr(vapp.Children, 'Vm'):
             for vm in vapp.Children.Vm:
                 if vm.get('name') == vm_name:
-                    env = vm.xpath('ovfenv:Environment', namespaces=NSMAP)
+                    env = VM_ENVIRONMENT_XPATH(vm)
                     if len(env) > 0:
-                        return env[0].get('{' + NSMAP['ve'] + '}vCenterId')
+                        return env[0].get(VE_VCENTER_ID)
         return None
 
     def set_lease(self, deployment_lease=0, storage_lease=0):
@@ -421,6 +454,7 @@ class VApp(object):
                 'Can\'t {0} vApp. Current state of vApp: {1}.'.format(
                     operation_name, VCLOUD_STATUS_MAP[power_state]))
 
+    @traced
     def deploy(self, power_on=None, force_customization=None):
         """Deploys the vApp.
 
@@ -454,6 +488,7 @@ class VApp(object):
             media_type=EntityType.DEPLOY.value,
             contents=deploy_vapp_params)
 
+    @traced
     def undeploy(self, action='default'):
         """Undeploys the vApp.
 
@@ -486,6 +521,7 @@ class VApp(object):
             media_type=EntityType.UNDEPLOY.value,
             contents=params)
 
+    @traced
     def power_off(self):
         """Power off the vms in the vApp.
 
@@ -500,6 +536,7 @@ class VApp(object):
         return self._perform_power_operation(
             rel=RelationType.POWER_OFF, operation_name='power off')
 
+    @traced
     def power_on(self):
         """Power on the vms in the vApp.
 
@@ -514,6 +551,7 @@ class VApp(object):
         return self._perform_power_operation(
             rel=RelationType.POWER_ON, operation_name='power on')
 
+    @traced
     def shutdown(self):
         """Shutdown the vApp.
 
@@ -541,6 +579,7 @@ class VApp(object):
         return self._perform_power_operation(
             rel=RelationType.POWER_RESET, operation_name='power reset')
 
+    @traced
     def reboot(self):
         """Reboots the vms in the vApp.
 
@@ -654,11 +693,39 @@ class VApp(object):
 
         :raises: EntityNotFoundException: if the named vm could not be found.
         """
+        if self.resource is None:
+            # avoid fetching the whole vApp along with all its vms.
+            vm_href = self._get_vm_href(vm_name)
+            if vm_href is None:
+                raise EntityNotFoundException(
+                    'Can\'t find VM \'%s\'' % vm_name)
+            return self.client.get_resource(vm_href)
         for vm in self.get_all_vms():
             if vm.get('name') == vm_name:
                 return vm
         raise EntityNotFoundException('Can\'t find VM \'%s\'' % vm_name)
 
+    def _get_vm_href(self, vm_name):
+        """Looks up the href of a vm in this vApp via the query service.
+
+        :param str vm_name: name of the vm.
+
+        :return: href of the vm or None if the vm could not be found.
+
+        :rtype: str
+        """
+        resource_type = ResourceType.VM.value
+        if self.client.is_sysadmin():
+            resource_type = ResourceType.ADMIN_VM.value
+        query = self.client.get_typed_query(
+            resource_type,
+            query_result_format=QueryResultFormat.REFERENCES,
+            qfilter='container==%s' % urllib.parse.quote_plus(self.href),
+            equality_filter=('name', vm_name))
+        for record in query.execute():
+            return record.get('href')
+        return None
+
     def add_disk_to_vm(self, vm_name, disk_size, disk_controller="lsilogic"):
         """Add a virtual disk to a virtual machine in the vApp.
 
@@ -995,6 +1062,7 @@ class VApp(object):
 
         return sourced_item
 
+    @traced
     def add_vms(self,
                 specs,
                 deploy=True,
@@ -1031,6 +1099,7 @@ class VApp(object):
             self.resource, RelationType.RECOMPOSE,
             EntityType.RECOMPOSE_VAPP_PARAMS.value, params)
 
+    @traced
     def delete_vms(self, names):
         """Recompose the vApp and delete vms.
 
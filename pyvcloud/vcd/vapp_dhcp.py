@@ -13,8 +13,6 @@
 # limitations under the License.
 
 from pyvcloud.vcd.client import E
-from pyvcloud.vcd.client import EntityType
-from pyvcloud.vcd.client import RelationType
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.vapp_services import VappServices
 
@@ -64,9 +62,7 @@ class VappDhcp(VappServices):
             dhcp.append(
                 E.IpRange(
                     E.StartAddress(ip_ranges[0]), E.EndAddress(ip_ranges[1])))
-        return self.client.put_linked_resource(
-            self.resource, RelationType.EDIT, EntityType.vApp_Network.value,
-            self.resource)
+        return self._update_resource()
 
     def enable_dhcp_service(self, isEnable):
         """Enable DHCP to vApp network.
@@ -82,6 +78,4 @@ class VappDhcp(VappServices):
             dhcp.IsEnabled = E.IsEnabled(True)
         else:
             dhcp.IsEnabled = E.IsEnabled(False)
-        return self.client.put_linked_resource(
-            self.resource, RelationType.EDIT, EntityType.vApp_Network.value,
-            self.resource)
+        return self._update_resource()
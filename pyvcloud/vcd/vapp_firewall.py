@@ -13,8 +13,6 @@
 # limitations under the License.
 
 from pyvcloud.vcd.client import E
-from pyvcloud.vcd.client import EntityType
-from pyvcloud.vcd.client import RelationType
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.vapp_services import VappServices
 
@@ -41,9 +39,7 @@ class VappFirewall(VappServices):
             firewall.IsEnabled = E.IsEnabled(True)
         else:
             firewall.IsEnabled = E.IsEnabled(False)
-        return self.client.put_linked_resource(
-            self.resource, RelationType.EDIT, EntityType.vApp_Network.value,
-            self.resource)
+        return self._update_resource()
 
     def set_default_action(self, action='drop', log_action=True):
         """Set default action on firewall services to vApp network.
@@ -65,9 +61,7 @@ class VappFirewall(VappServices):
         firewall_service = self.resource.Configuration.Features.FirewallService
         firewall_service.DefaultAction = E.DefaultAction(action)
         firewall_service.LogDefaultAction = E.LogDefaultAction(log_action)
-        return self.client.put_linked_resource(
-            self.resource, RelationType.EDIT, EntityType.vApp_Network.value,
-            self.resource)
+        return self._update_resource()
 
     def add_firewall_rule(self, name, is_enabled=False, policy='drop',
                           protocols=['Any'], source_port_range='Any',
@@ -118,10 +112,7 @@ class VappFirewall(VappServices):
         firewall_rule.append(E.SourceIp(source_ip))
         firewall_rule.append(E.EnableLogging(enable_logging))
         firewall_service.append(firewall_rule)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def list_firewall_rule(self):
         """List all firewall rules on firewall services to vApp network.
@@ -226,10 +217,7 @@ class VappFirewall(VappServices):
                 if enable_logging is not None:
                     firewall_rule.EnableLogging = E.EnableLogging(
                         enable_logging)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def delete_firewall_rule(self, name):
         """Delete firewall rule on firewall services to vApp network.
@@ -251,7 +239,4 @@ class VappFirewall(VappServices):
         for firewall_rule in firewall_service.FirewallRule:
             if firewall_rule.Description == name:
                 firewall_service.remove(firewall_rule)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
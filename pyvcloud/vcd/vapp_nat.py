@@ -13,8 +13,6 @@
 # limitations under the License.
 
 from pyvcloud.vcd.client import E
-from pyvcloud.vcd.client import EntityType
-from pyvcloud.vcd.client import RelationType
 from pyvcloud.vcd.exceptions import EntityNotFoundException
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.vapp_services import VappServices
@@ -54,10 +52,7 @@ class VappNat(VappServices):
             VappNat._makeNatServiceAttr(features)
         nat_service = features.NatService
         nat_service.IsEnabled = E.IsEnabled(isEnable)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def update_nat_type(self,
                         nat_type='ipTranslation',
@@ -86,10 +81,7 @@ class VappNat(VappServices):
             VappNat._delete_all_nat_rule(nat_service)
         nat_service.NatType = E.NatType(nat_type)
         nat_service.Policy = E.Policy(policy)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def add_nat_rule(self,
                      nat_type,
@@ -152,10 +144,7 @@ class VappNat(VappServices):
             vm_rule.append(E.Protocol(protocol))
             nat_rule.append(vm_rule)
         nat_service.append(nat_rule)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def get_nat_type(self):
         """Get NAT type to vApp network.
@@ -278,9 +267,7 @@ class VappNat(VappServices):
             raise EntityNotFoundException('NAT rule ' + id +
                                           ' doesn\'t exist.')
         else:
-            return self.client.put_linked_resource(
-                self.resource, RelationType.EDIT,
-                EntityType.vApp_Network.value, self.resource)
+            return self._update_resource()
 
     def update_nat_rule(self,
                         rule_id,
@@ -346,9 +333,7 @@ class VappNat(VappServices):
             raise EntityNotFoundException('NAT rule ' + id +
                                           ' doesn\'t exist.')
         else:
-            return self.client.put_linked_resource(
-                self.resource, RelationType.EDIT,
-                EntityType.vApp_Network.value, self.resource)
+            return self._update_resource()
 
     def _update_ip_translation_nat_rule(nat_rule,
                                         vapp_scoped_vm_id=None,
@@ -11,6 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from lxml import etree
+
 from pyvcloud.vcd.client import EntityType
 from pyvcloud.vcd.client import find_link
 from pyvcloud.vcd.client import QueryResultFormat
@@ -18,6 +20,7 @@ from pyvcloud.vcd.client import RelationType
 from pyvcloud.vcd.client import ResourceType
 from pyvcloud.vcd.exceptions import EntityNotFoundException
 from pyvcloud.vcd.exceptions import InvalidParameterException
+from pyvcloud.vcd.exceptions import InvalidStateException
 from pyvcloud.vcd.exceptions import MultipleRecordsException
 
 
@@ -42,6 +45,9 @@ class VappServices(object):
         """
         self.client = client
         self.vapp_name = vapp_name
+        self.href = None
+        self.resource = resource
+        self._transaction = None
         if vapp_name is not None and network_name is not None and\
                 resource_href is None and resource is None:
             self.network_name = network_name
@@ -55,9 +61,8 @@ class VappServices(object):
             self.href = resource_href
             self._get_resource()
             self.parent_href = find_link(self.resource, RelationType.UP,
-                                         EntityType.VAPP).href
+                                         EntityType.VAPP.value).href
             self.parent = self.client.get_resource(self.parent_href)
-        self.resource = resource
 
     def _build_self_href(self):
         self.parent = self._get_parent_by_name()
@@ -83,6 +88,44 @@ class VappServices(object):
         """Reloads the resource representation of the Vapp network."""
         self.resource = self.client.get_resource(self.href)
 
+    def _update_resource(self):
+        """Sends the locally modified vApp network representation to vCD.
+
+        Inside a transaction the update is deferred until the transaction is
+        committed.
+
+        :return: an object containing EntityType.TASK XML data which represents
+            the asynchronous task that is updating the vApp network, or None
+            if the update has been staged in a transaction.
+        :rtype: lxml.objectify.ObjectifiedElement
+        """
+        if self._transaction is not None:
+            self._transaction._is_dirty = True
+            return None
+        return self.client.put_linked_resource(self.resource,
+                                               RelationType.EDIT,
+                                               EntityType.vApp_Network.value,
+                                               self.resource)
+
+    def transaction(self):
+        """Starts a transaction on the vApp network services.
+
+        Changes made through this object (and through any other service
+        object of the same vApp network joined to the transaction) are staged
+        against a single copy of the vApp network configuration and sent to
+        vCD with one PUT when the with block exits without error, e.g.
+
+            with nat.transaction() as txn:
+                txn.join(firewall)
+                nat.add_nat_rule(...)
+                firewall.add_firewall_rule(...)
+            task = txn.task
+
+        :return: the transaction, to be used as a context manager.
+        :rtype: pyvcloud.vcd.vapp_services.VappServicesTransaction
+        """
+        return VappServicesTransaction(self)
+
     def _get_parent_by_name(self):
         """Get a vapp by name.
 
@@ -106,3 +149,106 @@ class VappServices(object):
             raise MultipleRecordsException("Found multiple vapp named "
                                            "'%s'," % self.vapp_name)
         return records[0]
+
+
+class VappServicesTransaction(object):
+    """Stages changes to vApp network services and commits them at once.
+
+    Every update done by VappFirewall, VappNat, VappDhcp or VappStaticRoute
+    results in a PUT of the whole vApp network configuration and in a
+    redeployment of the network services by vCD. Within a transaction the
+    updates are applied to one copy of the configuration, which is sent to
+    vCD once, when the transaction is committed.
+
+    Before committing, the configuration is fetched again and compared with
+    the one the changes were staged against. If somebody else modified it in
+    the meantime the commit is refused rather than overwriting their
+    changes.
+    """
+
+    def __init__(self, services):
+        """Constructor for VappServicesTransaction object.
+
+        :param pyvcloud.vcd.vapp_services.VappServices services: the service
+            object which started the transaction.
+        """
+        self.services = services
+        self.task = None
+        self._members = [services]
+        self._original_configuration = None
+        self._is_dirty = False
+
+    def __enter__(self):
+        for member in self._members:
+            if member._transaction is not None:
+                raise InvalidStateException(
+                    'A transaction is already in progress on the vApp '
+                    'network.')
+        self.services._reload()
+        self._original_configuration = etree.tostring(
+            self.services.resource.Configuration)
+        self.services._transaction = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                # staged changes are discarded, next access refetches the
+                # configuration from vCD
+                for member in self._members:
+                    member.resource = None
+        finally:
+            for member in self._members:
+                member._transaction = None
+        return False
+
+    def join(self, service):
+        """Adds another service object of the same network to the transaction.
+
+        :param pyvcloud.vcd.vapp_services.VappServices service: service object
+            of the same vApp network e.g. a VappFirewall object, if the
+            transaction was started on a VappNat object.
+
+        :raises: InvalidParameterException: if the service object belongs to
+            a different vApp network.
+        """
+        if service.href != self.services.href:
+            raise InvalidParameterException(
+                'Only services of the same vApp network can be part of one '
+                'transaction.')
+        if service in self._members:
+            return
+        service.resource = self.services.resource
+        service._transaction = self
+        self._members.append(service)
+
+    def commit(self):
+        """Sends the staged changes to vCD and ends the transaction.
+
+        Called automatically when the with block exits without error.
+
+        :return: an object containing EntityType.TASK XML data which represents
+            the asynchronous task that is updating the vApp network, or None
+            if no change was staged.
+        :rtype: lxml.objectify.ObjectifiedElement
+
+        :raises: InvalidStateException: if the vApp network configuration was
+            modified since the transaction started.
+        """
+        for member in self._members:
+            member._transaction = None
+        if not self._is_dirty:
+            return None
+        self._is_dirty = False
+        current = self.services.client.get_resource(self.services.href)
+        if etree.tostring(current.Configuration) != \
+                self._original_configuration:
+            for member in self._members:
+                member.resource = None
+            raise InvalidStateException(
+                'vApp network \'%s\' was modified concurrently, staged '
+                'changes were not applied.' % self.services.href)
+        self.task = self.services._update_resource()
+        return self.task
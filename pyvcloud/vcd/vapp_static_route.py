@@ -13,8 +13,6 @@
 # limitations under the License.
 
 from pyvcloud.vcd.client import E
-from pyvcloud.vcd.client import EntityType
-from pyvcloud.vcd.client import RelationType
 from pyvcloud.vcd.exceptions import EntityNotFoundException
 from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.vapp_services import VappServices
@@ -47,10 +45,7 @@ class VappStaticRoute(VappServices):
             VappStaticRoute._makeStaticRouteServiceAttr(features)
         route = features.StaticRoutingService
         route.IsEnabled = E.IsEnabled(isEnable)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def add(self, name, network_cidr, next_hop_ip):
         """Add static route to vApp network.
@@ -79,10 +74,7 @@ class VappStaticRoute(VappServices):
         static_route.append(E.Network(network_cidr))
         static_route.append(E.NextHopIp(next_hop_ip))
         route_service.append(static_route)
-        return self.client.put_linked_resource(self.resource,
-                                               RelationType.EDIT,
-                                               EntityType.vApp_Network.value,
-                                               self.resource)
+        return self._update_resource()
 
     def list(self):
         """List static route of vApp network.
@@ -147,9 +139,7 @@ class VappStaticRoute(VappServices):
             raise EntityNotFoundException('static route ' + name +
                                           ' doesn\'t exist.')
         else:
-            return self.client.put_linked_resource(
-                self.resource, RelationType.EDIT,
-                EntityType.vApp_Network.value, self.resource)
+            return self._update_resource()
 
     def delete(self, name):
         """Delete static route from vApp network.
@@ -183,6 +173,4 @@ class VappStaticRoute(VappServices):
             raise EntityNotFoundException('static route ' + name +
                                           ' doesn\'t exist.')
         else:
-            return self.client.put_linked_resource(
-                self.resource, RelationType.EDIT,
-                EntityType.vApp_Network.value, self.resource)
+            return self._update_resource()
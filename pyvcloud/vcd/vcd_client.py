@@ -13,16 +13,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import json
+import logging
 
 from six.moves import http_client
+import urllib3
 from vcloud.api.rest.schema_v1_5.task_type import TaskType
 from vcloud.rest.openapi.api_client import ApiClient
 from vcloud.rest.openapi.configuration import Configuration
 from vcloud.rest.openapi.rest import ApiException
 
+from pyvcloud.vcd import tracing
 from pyvcloud.vcd.api_helper import ApiHelper
 from pyvcloud.vcd.client import Client
+from pyvcloud.vcd.client import DEFAULT_LOG_BODY_LIMIT
 from pyvcloud.vcd.client import Link
 from pyvcloud.vcd.exceptions import AccessForbiddenException
 from pyvcloud.vcd.exceptions import BadRequestException
@@ -37,6 +44,14 @@ from pyvcloud.vcd.exceptions import RequestTimeoutException
 from pyvcloud.vcd.exceptions import UnauthorizedException
 from pyvcloud.vcd.exceptions import UnknownApiException
 from pyvcloud.vcd.exceptions import UnsupportedMediaTypeException
+from pyvcloud.vcd.rate_limiter import DEFAULT_RETRY_AFTER_SEC
+from pyvcloud.vcd.rate_limiter import EndpointClass
+from pyvcloud.vcd.rate_limiter import parse_retry_after
+from pyvcloud.vcd.sdk_logging import truncate_body
+
+# maximum page size of cloudapi collections
+DEFAULT_CLOUDAPI_PAGE_SIZE = 128
+DEFAULT_CLOUDAPI_MAX_WORKERS = 8
 
 
 class OpenApiLink(object):
@@ -54,6 +69,39 @@ class OpenApiLink(object):
             self.href, self.rel, self.model, self.title, self.type)
 
 
+class LazyTask(object):
+    """Task returned by an API call, fetched from vCD on first use.
+
+    The href of the task is known from the Location header of the response,
+    the task itself is only fetched when one of its other fields is accessed.
+    """
+
+    def __init__(self, client, href):
+        self.href = href
+        self._client = client
+        self._task = None
+
+    def get_task(self):
+        """Returns the task, fetching it on the first call.
+
+        :return: the task.
+
+        :rtype: TaskType
+        """
+        if self._task is None:
+            self._task = self._client._get_task(self.href)
+        return self._task
+
+    def __getattr__(self, name):
+        # only called for attributes not set in the constructor
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get_task(), name)
+
+    def __repr__(self):
+        return 'LazyTask(%s)' % self.href
+
+
 class VcdClient(Client, ApiClient):
     """A client to interact with the vCloud Director OpenAPI & Legacy Api.
 
@@ -66,6 +114,11 @@ class VcdClient(Client, ApiClient):
     :param boolean verify_ssl_certs: If True validate server certificate;
         False allows self-signed certificates.
     :param str log_file: log file name or None, which suppresses logging.
+    :param int log_body_limit: maximum number of bytes or characters of
+        each request and response body logged, None to log whole bodies.
+    :param bool capture_tasks: if False, the tasks returned by API calls are
+        not recorded, and wait_for_last_task() doesn't wait. Saves some work
+        to callers which never wait for tasks.
     """
 
     API = '/api/'
@@ -87,7 +140,9 @@ class VcdClient(Client, ApiClient):
                  log_file=None,
                  log_requests=False,
                  log_bodies=None,
-                 log_headers=None
+                 log_headers=None,
+                 capture_tasks=True,
+                 log_body_limit=DEFAULT_LOG_BODY_LIMIT
                  ):
         self.prep_base_uri(uri)
         self._api_version = api_version
@@ -104,7 +159,8 @@ class VcdClient(Client, ApiClient):
         # Initializing client
         Client.__init__(self, uri, api_version, verify_ssl_certs, log_file,
                         log_requests, log_bodies=log_bodies,
-                        log_headers=log_headers)
+                        log_headers=log_headers,
+                        log_body_limit=log_body_limit)
 
         # Initialize OPENApi BaseClient without any parameter
         ApiClient.__init__(self)
@@ -114,6 +170,8 @@ class VcdClient(Client, ApiClient):
         self._api_helper = ApiHelper()
         self._versions = None
         self._task_monitor = None
+        self._task = None
+        self.capture_tasks = capture_tasks
 
     def prep_base_uri(self, uri):
         self._uri = uri
@@ -220,12 +278,25 @@ class VcdClient(Client, ApiClient):
     def wait_for_task(self, task):
         """Waits for success of a given task.
 
-        :param TaskType task: task we are waiting for.
+        :param TaskType task: task we are waiting for, or a LazyTask.
         """
         if task is not None:
             self.get_task_monitor().wait_for_success(
                 self.get_resource(task.href))
 
+    def get_last_task(self):
+        """Returns the task returned by the last API call, if any.
+
+        Tasks known only from the Location header of a response are returned
+        as LazyTask objects, which are fetched from vCD on first use.
+
+        :return: the task, or None if the last call returned no task or
+            tasks are not captured.
+
+        :rtype: TaskType or LazyTask
+        """
+        return self._task
+
     def wait_for_last_task(self):
         """Waits for the success of last task."""
         self.wait_for_task(self._task)
@@ -256,10 +327,7 @@ class VcdClient(Client, ApiClient):
         auth_settings = ['ApiKeyAuth']
         self._status = self._headers = self._links = self._headers = None
         try:
-            if self._config.host[-1] == '/':
-                resource_path = 'cloudapi' + resource_path
-            else:
-                resource_path = '/' + 'cloudapi' + resource_path
+            resource_path = self._get_cloudapi_path(resource_path)
             self.default_headers[
                 self.HEADER_ACCEPT] = \
                 '{};version={}'.format(self.ACCEPT_TYPE_API,
@@ -284,13 +352,193 @@ class VcdClient(Client, ApiClient):
                 self._store_task(False, response_data)
         except ApiException as ae:
             self._status = ae.status
-            ex = self._get_specific_exception(
-                self._status, ae.headers.get(
-                    self.HEADER_X_VCLOUD_REQUEST_ID),
-                json.loads(ae.body))
-            raise ex from None
+            raise self._get_api_exception(ae) from None
         return response_data
 
+    def iter_cloudapi_values(self,
+                             resource_path,
+                             response_type,
+                             qfilter=None,
+                             sort_asc=None,
+                             sort_desc=None,
+                             query_params=None,
+                             page_size=DEFAULT_CLOUDAPI_PAGE_SIZE,
+                             max_workers=DEFAULT_CLOUDAPI_MAX_WORKERS):
+        """Iterates over all the items of a paged cloudapi collection.
+
+        The first page tells the number of pages, the remaining pages are
+        then fetched concurrently, at most max_workers at a time, while items
+        are yielded in order.
+
+            for policy in client.iter_cloudapi_values(
+                    '/1.0.0/vdcComputePolicies', VdcComputePolicies,
+                    qfilter='name==policy*'):
+                ...
+
+        :param str resource_path: path of the collection relative to
+            /cloudapi e.g. '/1.0.0/roles'.
+        :param response_type: model class of a page of the collection e.g.
+            vcloud.rest.openapi.models.Roles.
+        :param str qfilter: filter expression of the query e.g.
+            'name==vApp*'.
+        :param str sort_asc: name of the field to sort ascending by.
+        :param str sort_desc: name of the field to sort descending by.
+        :param dict query_params: other query parameters, usually built with
+            QueryParamsBuilder. page and pageSize are ignored.
+        :param int page_size: number of items fetched per page.
+        :param int max_workers: maximum number of pages fetched at the same
+            time.
+
+        :return: a generator yielding the items of the collection, i.e. the
+            values of its pages.
+
+        :rtype: generator
+        """
+        builder = QueryParamsBuilder()
+        if qfilter is not None:
+            builder.set_filter(qfilter)
+        if sort_asc is not None:
+            builder.set_sort_asc(sort_asc)
+        if sort_desc is not None:
+            builder.set_sort_desc(sort_desc)
+        params = dict(query_params or {})
+        params.update(builder.set_page(1).set_page_size(page_size).build())
+
+        # pages fetched by the workers keep the priority of the caller
+        priority = self.get_request_priority()
+        page = self._get_cloudapi_page(resource_path, params, response_type,
+                                       priority)
+        for item in page.values or []:
+            yield item
+        page_count = page.page_count or 1
+        if page_count <= 1:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = deque()
+        next_page = 2
+        try:
+            while next_page <= page_count or futures:
+                # keeps a bounded number of pages ahead of the consumer
+                while next_page <= page_count and \
+                        len(futures) < 2 * max_workers:
+                    # workers inherit the current span, if any
+                    futures.append(
+                        executor.submit(contextvars.copy_context().run,
+                                        self._get_cloudapi_page,
+                                        resource_path,
+                                        dict(params, page=next_page),
+                                        response_type,
+                                        priority))
+                    next_page += 1
+                for item in futures.popleft().result().values or []:
+                    yield item
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _get_cloudapi_page(self, resource_path, query_params, response_type,
+                           priority):
+        """Fetches a page of a cloudapi collection.
+
+        Unlike call_api(), the status, links and task of the response are not
+        stored, so that pages can be fetched concurrently. Like the requests
+        sent by Client, pages wait for the request scheduler and the rate
+        limiter of the client, if any, and throttled pages are retried up to
+        the number of retries allowed by the rate limiter.
+
+        :param str resource_path: path of the collection relative to
+            /cloudapi.
+        :param dict query_params: query parameters of the page.
+        :param response_type: model class of the page.
+        :param RequestPriority priority: priority of the request.
+
+        :return: the page.
+        """
+        attempt = 0
+        with self._scheduled(priority):
+            while True:
+                try:
+                    return self._send_cloudapi_page(
+                        self._get_cloudapi_path(resource_path), query_params,
+                        response_type)
+                except ApiException as ae:
+                    if self._rate_limiter is None or \
+                            ae.status not in self._THROTTLING_STATUS_CODES or \
+                            attempt >= self._rate_limiter.max_retries:
+                        raise self._get_api_exception(ae) from None
+                    attempt += 1
+                    self._logger.debug(
+                        'Request GET %s throttled with status code %s, '
+                        'retry #%s.' % (resource_path, ae.status, attempt))
+
+    def _send_cloudapi_page(self, resource_path, query_params, response_type):
+        if self._rate_limiter is None:
+            return self._fetch_cloudapi_page(resource_path, query_params,
+                                             response_type)
+        overloaded = False
+        retry_after = None
+        self._rate_limiter.acquire(EndpointClass.QUERY)
+        try:
+            return self._fetch_cloudapi_page(resource_path, query_params,
+                                             response_type)
+        except ApiException as ae:
+            if ae.status in self._THROTTLING_STATUS_CODES:
+                retry_after = parse_retry_after(
+                    ae.headers.get(self._HEADER_RETRY_AFTER_NAME))
+                if retry_after is None:
+                    retry_after = DEFAULT_RETRY_AFTER_SEC
+            # status 0 means that the request could not be sent
+            overloaded = retry_after is not None or \
+                ae.status in (http_client.CONFLICT, 0)
+            raise
+        except urllib3.exceptions.HTTPError:
+            overloaded = True
+            raise
+        finally:
+            self._rate_limiter.release(EndpointClass.QUERY, overloaded,
+                                       retry_after)
+
+    def _fetch_cloudapi_page(self, resource_path, query_params,
+                             response_type):
+        headers = {
+            self.HEADER_ACCEPT:
+            '{};version={}'.format(self.ACCEPT_TYPE_API, self._api_version)
+        }
+        with tracing.start_request_span(
+                'GET', self._config.host + resource_path) as span:
+            tracing.inject_context(headers)
+            try:
+                page, status, response_headers = super().call_api(
+                    resource_path,
+                    'GET',
+                    query_params=query_params,
+                    header_params=headers,
+                    response_type=response_type,
+                    auth_settings=['ApiKeyAuth'])
+            except ApiException as ae:
+                if ae.headers is not None:
+                    tracing.set_response(
+                        span, ae.status,
+                        ae.headers.get(self.HEADER_X_VCLOUD_REQUEST_ID))
+                raise
+            tracing.set_response(
+                span, status,
+                response_headers.get(self.HEADER_X_VCLOUD_REQUEST_ID))
+        return page
+
+    def _get_cloudapi_path(self, resource_path):
+        if self._config.host[-1] == '/':
+            return 'cloudapi' + resource_path
+        return '/' + 'cloudapi' + resource_path
+
+    def _get_api_exception(self, api_exception):
+        return self._get_specific_exception(
+            api_exception.status,
+            api_exception.headers.get(self.HEADER_X_VCLOUD_REQUEST_ID),
+            json.loads(api_exception.body))
+
     def call_legacy_api(self,
                         method,
                         uri,
@@ -349,6 +597,9 @@ class VcdClient(Client, ApiClient):
                 self._links.append(link)
 
     def _store_task(self, is_api, response):
+        if not self.capture_tasks:
+            self._task = None
+            return
         if isinstance(response, TaskType):
             self._task = response
         if is_api:
@@ -361,9 +612,29 @@ class VcdClient(Client, ApiClient):
         elif 'Location' in self._headers:
             task_href = self._headers.get('Location')
             if task_href is not None:
-                self._task = self.call_legacy_api('GET',
-                                                  uri=task_href,
-                                                  response_type=TaskType)
+                # saves a round trip when the task is never looked at, or
+                # only waited for
+                self._task = LazyTask(self, task_href)
+
+    def _get_task(self, task_href):
+        """Fetches a task.
+
+        Unlike call_legacy_api(), the status and links of the response are
+        not stored, the task is usually fetched long after the call that
+        returned it.
+
+        :param str task_href: href of the task.
+
+        :return: the task.
+
+        :rtype: TaskType
+        """
+        response = self._do_request_prim(
+            'GET',
+            task_href,
+            self._session,
+            accept_type=self._get_accept_type(self._is_api_uri(task_href)))
+        return self._api_helper.deserialize(response, TaskType)
 
     @staticmethod
     def _get_specific_exception(status, request_id, vcd_error):
@@ -427,15 +698,19 @@ class VcdClient(Client, ApiClient):
 
     def __log_request_response(self, request_headers, request_body,
                                response_headers, response_body):
-        if not self._log_requests:
+        if not self._log_requests or \
+                not self._logger.isEnabledFor(logging.DEBUG):
             return
 
-        self._logger.debug('Request headers: %s' %
-                           self._redact_headers(request_headers))
-        self._logger.debug('Request body: %s' % request_body)
-        self._logger.debug('Response headers: %s' %
+        self._logger.debug('Request headers: %s',
+                           self._redact_headers(request_headers or {}))
+        # bodies are models, only rendered when the request is logged
+        self._logger.debug('Request body: %s', truncate_body(
+            str(request_body), self._log_body_limit))
+        self._logger.debug('Response headers: %s',
                            self._redact_headers(response_headers))
-        self._logger.debug('Response body: %s' % response_body)
+        self._logger.debug('Response body: %s', truncate_body(
+            str(response_body), self._log_body_limit))
 
 
 class QueryParamsBuilder(object):
@@ -39,9 +39,11 @@ from pyvcloud.vcd.exceptions import InvalidParameterException
 from pyvcloud.vcd.exceptions import MultipleRecordsException
 from pyvcloud.vcd.exceptions import OperationNotSupportedException
 from pyvcloud.vcd.metadata import Metadata
+from pyvcloud.vcd.metadata import query_metadata
 from pyvcloud.vcd.org import Org
 from pyvcloud.vcd.platform import Platform
 from pyvcloud.vcd.pvdc import PVDC
+from pyvcloud.vcd.tracing import traced
 from pyvcloud.vcd.utils import cidr_to_netmask
 from pyvcloud.vcd.utils import get_admin_href
 from pyvcloud.vcd.utils import is_admin
@@ -202,6 +204,7 @@ class VDC(object):
         """
         return self.client.get_resource(self.get_vapp_href(name))
 
+    @traced
     def delete_vapp(self, name, force=False):
         """Delete a vApp in the current org vdc.
 
@@ -215,6 +218,7 @@ class VDC(object):
         return self.client.delete_resource(href, force=force)
 
     # NOQA refer to http://pubs.vmware.com/vcd-820/index.jsp?topic=%2Fcom.vmware.vcloud.api.sp.doc_27_0%2FGUID-BF9B790D-512E-4EA1-99E8-6826D4B8E6DC.html
+    @traced
     def instantiate_vapp(self,
                          name,
                          catalog,
@@ -903,6 +907,34 @@ class VDC(object):
             client=self.client, resource=self.get_all_metadata())
         return metadata.get_metadata_value(key, domain)
 
+    def get_vapps_metadata(self, keys, domain=MetadataDomain.GENERAL,
+                           qfilter=None):
+        """Fetch metadata entries of all the vApps in the org vdc.
+
+        The entries are fetched through the query service, a page of vApps
+        per request, instead of one request per vApp.
+
+        :param iterable keys: keys of the metadata entries to fetch.
+        :param client.MetadataDomain domain: domain of the metadata entries.
+        :param str qfilter: optional filter expression further restricting
+            the vApps, e.g. one built with
+            pyvcloud.vcd.client.get_metadata_filter().
+
+        :return: metadata values, typed as per their MetadataValueType, keyed
+            by metadata key, keyed by vApp href.
+
+        :rtype: dict
+        """
+        resource_type = ResourceType.VAPP.value
+        if self.client.is_sysadmin():
+            resource_type = ResourceType.ADMIN_VAPP.value
+        vdc_filter = 'vdc==%s' % urllib.parse.quote(self.href)
+        if qfilter:
+            vdc_filter = '(%s);%s' % (qfilter, vdc_filter)
+        return query_metadata(
+            self.client, resource_type, keys, domain=domain,
+            qfilter=vdc_filter)
+
     def set_metadata(self,
                      key,
                      value,
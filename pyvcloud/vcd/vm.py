@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from copy import deepcopy
+
 from pyvcloud.vcd.client import ApiVersion
 from pyvcloud.vcd.client import E
 from pyvcloud.vcd.client import E_VMW
@@ -34,6 +36,7 @@ from pyvcloud.vcd.exceptions import InvalidStateException
 from pyvcloud.vcd.exceptions import MultipleRecordsException
 from pyvcloud.vcd.exceptions import OperationNotSupportedException
 from pyvcloud.vcd.metadata import Metadata
+from pyvcloud.vcd.tracing import traced
 from pyvcloud.vcd.utils import retrieve_compute_policy_id_from_href
 from pyvcloud.vcd.utils import update_vm_compute_policy_element
 from pyvcloud.vcd.utils import uri_to_api_uri
@@ -89,6 +92,21 @@ class VM(object):
         if self.resource is not None:
             self.href = self.resource.get('href')
 
+    def _get_section(self, section):
+        """Fetches a single section of the vm from vCD.
+
+        Reading a section e.g. 'virtualHardwareSection/cpu' is much cheaper
+        than fetching the whole vm. Sections are fetched on every call, as
+        they change with every update of the vm.
+
+        :param str section: path of the section relative to the vm href.
+
+        :return: object containing the XML representation of the section.
+
+        :rtype: lxml.objectify.ObjectifiedElement
+        """
+        return self.client.get_resource(self.href + '/' + section)
+
     def get_vc(self):
         """Returns the vCenter where this vm is located.
 
@@ -126,7 +144,14 @@ class VM(object):
 
         :rtype: dict
         """
-        self.get_resource()
+        if self.resource is None:
+            cpu = self._get_section('virtualHardwareSection/cpu')
+            return {
+                'num_cpus':
+                int(cpu['{' + NSMAP['rasd'] + '}VirtualQuantity'].text),
+                'num_cores_per_socket':
+                int(cpu['{' + NSMAP['vmw'] + '}CoresPerSocket'].text)
+            }
         return {
             'num_cpus':
             int(self.resource.VmSpecSection.NumCpus.text),
@@ -141,7 +166,10 @@ class VM(object):
 
         :rtype: int
         """
-        self.get_resource()
+        if self.resource is None:
+            memory = self._get_section('virtualHardwareSection/memory')
+            return int(
+                memory['{' + NSMAP['rasd'] + '}VirtualQuantity'].text)
         return int(
             self.resource.VmSpecSection.MemoryResourceMb.Configured.text)
 
@@ -289,6 +317,21 @@ class VM(object):
         item['{' + NSMAP['rasd'] + '}VirtualQuantity'] = virtual_quantity
         return self.client.put_resource(uri, item, EntityType.RASD_ITEM.value)
 
+    def reconfigure(self):
+        """Starts a batched reconfiguration of the vm.
+
+        Changes to cpu, memory, disks and nics are staged on the returned
+        object and sent to vCD in a single reconfigureVm call once apply() is
+        invoked, e.g.
+
+            task = vm.reconfigure().modify_cpu(4).modify_memory(2048).apply()
+
+        :return: an object collecting the changes to be applied on this vm.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+        """
+        return VmReconfiguration(self)
+
     def get_power_state(self, vm_resource=None):
         """Returns the status of the vm.
 
@@ -395,6 +438,7 @@ class VM(object):
                 'Can\'t {0} vm. Current state of vm: {1}.'.format(
                     operation_name, VCLOUD_STATUS_MAP[power_state]))
 
+    @traced
     def shutdown(self):
         """Shutdown the vm.
 
@@ -406,6 +450,7 @@ class VM(object):
         return self._perform_power_operation(
             rel=RelationType.POWER_SHUTDOWN, operation_name='shutdown')
 
+    @traced
     def reboot(self):
         """Reboots the vm.
 
@@ -417,6 +462,7 @@ class VM(object):
         return self._perform_power_operation(
             rel=RelationType.POWER_REBOOT, operation_name='reboot')
 
+    @traced
     def power_on(self):
         """Powers on the vm.
 
@@ -428,6 +474,7 @@ class VM(object):
         return self._perform_power_operation(
             rel=RelationType.POWER_ON, operation_name='power on')
 
+    @traced
     def power_off(self):
         """Powers off the vm.
 
@@ -519,6 +566,7 @@ class VM(object):
             params,
             EntityType.GUEST_CUSTOMIZATION_SECTION.value)
 
+    @traced
     def deploy(self, power_on=True, force_customization=False):
         """Deploys the vm.
 
@@ -541,6 +589,7 @@ class VM(object):
             media_type=EntityType.DEPLOY.value,
             contents=deploy_vm_params)
 
+    @traced
     def undeploy(self, action='default'):
         """Undeploy the vm.
 
@@ -624,38 +673,10 @@ class VM(object):
 
         :rtype: lxml.objectify.ObjectifiedElement
         """
-        # get network connection section.
-        net_conn_section = self.get_resource().NetworkConnectionSection
-        nic_index = 0
-        insert_index = net_conn_section.index(
-            net_conn_section['{' + NSMAP['ovf'] + '}Info']) + 1
-        # check if any nics exists
-        if hasattr(net_conn_section, 'PrimaryNetworkConnectionIndex'):
-            # calculate nic index and create the networkconnection object.
-            indices = [None] * 10
-            insert_index = net_conn_section.index(
-                net_conn_section.PrimaryNetworkConnectionIndex) + 1
-            for nc in net_conn_section.NetworkConnection:
-                indices[int(nc.NetworkConnectionIndex.
-                            text)] = nc.NetworkConnectionIndex.text
-            nic_index = indices.index(None)
-            if is_primary:
-                net_conn_section.PrimaryNetworkConnectionIndex = \
-                    E.PrimaryNetworkConnectionIndex(nic_index)
-
-        net_conn = E.NetworkConnection(network=network_name)
-        net_conn.set('needsCustomization', 'true')
-        net_conn.append(E.NetworkConnectionIndex(nic_index))
-        if ip_address_mode == IpAddressMode.MANUAL.value:
-            net_conn.append(E.IpAddress(ip_address))
-        else:
-            net_conn.append(E.IpAddress())
-        net_conn.append(E.IsConnected(is_connected))
-        net_conn.append(E.IpAddressAllocationMode(ip_address_mode))
-        net_conn.append(E.NetworkAdapterType(adapter_type))
-        net_conn_section.insert(insert_index, net_conn)
         vm_resource = self.get_resource()
-        vm_resource.NetworkConnectionSection = net_conn_section
+        _add_nic_to_section(vm_resource.NetworkConnectionSection,
+                            adapter_type, is_primary, is_connected,
+                            network_name, ip_address_mode, ip_address)
         return self.client.post_linked_resource(
             vm_resource, RelationType.RECONFIGURE_VM, EntityType.VM.value,
             vm_resource)
@@ -670,7 +691,10 @@ class VM(object):
         :rtype: list
         """
         # get network connection section.
-        net_conn_section = self.get_resource().NetworkConnectionSection
+        if self.resource is None:
+            net_conn_section = self._get_section('networkConnectionSection/')
+        else:
+            net_conn_section = self.resource.NetworkConnectionSection
 
         nics = []
         if hasattr(net_conn_section, 'PrimaryNetworkConnectionIndex'):
@@ -711,30 +735,9 @@ class VM(object):
         :raises: InvalidParameterException: if a nic with the given index is
             not found in the VM.
         """
-        # get network connection section.
         net_conn_section = self.get_resource().NetworkConnectionSection
-
-        indices = [None] * 10
-        nic_not_found = True
-        # find the nic with the given index
-        for nc in net_conn_section.NetworkConnection:
-            if int(nc.NetworkConnectionIndex.text) == index:
-                net_conn_section.remove(nc)
-                nic_not_found = False
-            else:
-                indices[int(nc.NetworkConnectionIndex.
-                            text)] = nc.NetworkConnectionIndex.text
-
-        if nic_not_found:
-            raise InvalidParameterException(
-                'Nic with index \'%s\' is not found in the VM \'%s\'' %
-                (index, self.get_resource().get('name')))
-
-        # now indices will have all existing nic indices
-        prim_nic = next((i for i in indices if i is not None), None)
-        if prim_nic:
-            net_conn_section.PrimaryNetworkConnectionIndex = \
-                E.PrimaryNetworkConnectionIndex(prim_nic)
+        _delete_nic_from_section(net_conn_section, index,
+                                 self.get_resource().get('name'))
         return self.client.put_linked_resource(
             net_conn_section, RelationType.EDIT,
             EntityType.NETWORK_CONNECTION_SECTION.value, net_conn_section)
@@ -1080,7 +1083,6 @@ class VM(object):
 
         :rtype: String
         """
-        self.get_resource()
         uri = self.href + '/guestcustomizationstatus/'
         gc_status_resource = self.client.get_resource(uri)
         return gc_status_resource.GuestCustStatus
@@ -1094,7 +1096,6 @@ class VM(object):
 
         :rtype: lxml.objectify.ObjectifiedElement
         """
-        self.get_resource()
         uri = self.href + '/guestCustomizationSection/'
         return self.client.get_resource(uri)
 
@@ -1110,7 +1111,6 @@ class VM(object):
 
         :rtype: lxml.objectify.ObjectifiedElement
         """
-        self.get_resource()
         gc_section = self.get_guest_customization_section()
         if hasattr(gc_section, 'Enabled'):
             gc_section.Enabled = E.Enabled(is_enabled)
@@ -1136,10 +1136,8 @@ class VM(object):
         :rtype: list
         """
         result = []
-        self.get_resource()
         if is_cpu:
-            uri = self.href + '/virtualHardwareSection/cpu'
-            cpu_resource = self.client.get_resource(uri)
+            cpu_resource = self._get_section('virtualHardwareSection/cpu')
             vhs_cpu_info = {}
             vhs_cpu_info['cpuVirtualQuantity'] = cpu_resource[
                 '{' + NSMAP['rasd'] + '}VirtualQuantity']
@@ -1148,16 +1146,15 @@ class VM(object):
             result.append(vhs_cpu_info)
 
         if is_memory:
-            uri = self.href + '/virtualHardwareSection/memory'
-            memory_resource = self.client.get_resource(uri)
+            memory_resource = self._get_section(
+                'virtualHardwareSection/memory')
             vhs_memory_info = {}
             vhs_memory_info['memoryVirtualQuantityInMb'] = memory_resource[
                 '{' + NSMAP['rasd'] + '}VirtualQuantity']
             result.append(vhs_memory_info)
 
         if is_disk:
-            uri = self.href + '/virtualHardwareSection/disks'
-            disk_list = self.client.get_resource(uri)
+            disk_list = self._get_section('virtualHardwareSection/disks')
 
             for disk in disk_list.Item:
                 if disk['{' + NSMAP['rasd'] + '}Description'] == 'Hard disk':
@@ -1170,8 +1167,7 @@ class VM(object):
                     result.append(vhs_disk_info)
 
         if is_media:
-            uri = self.href + '/virtualHardwareSection/media'
-            media_list = self.client.get_resource(uri)
+            media_list = self._get_section('virtualHardwareSection/media')
             vhs_media_info = {}
             for media in media_list.Item:
                 if media['{' +
@@ -1195,8 +1191,8 @@ class VM(object):
             result.append(vhs_media_info)
 
         if is_networkCards:
-            uri = self.href + '/virtualHardwareSection/networkCards'
-            ncards_list = self.client.get_resource(uri)
+            ncards_list = self._get_section(
+                'virtualHardwareSection/networkCards')
             vhs_network_info = {}
             for ncard in ncards_list.Item:
                 if ncard['{' + NSMAP['rasd'] + '}Connection'] is not None:
@@ -1378,36 +1374,10 @@ class VM(object):
 
         :rtype: lxml.objectify.ObjectifiedElement
         """
-        # get network connection section.
         net_conn_section = self.get_resource().NetworkConnectionSection
-        nic_index = 0
-        nic_found = False
-        for network in net_conn_section.NetworkConnection:
-            if network.get('network') == network_name:
-                if network.NetworkConnectionIndex == nic_id:
-                    nic_found = True
-                    if ip_address is not None:
-                        network.IpAddress = E.IpAddress(ip_address)
-                    network.IsConnected = E.IsConnected(is_connected)
-                    if ip_address_mode is not None:
-                        network.IpAddressAllocationMode = \
-                            E.IpAddressAllocationMode(ip_address_mode)
-                    if adapter_type is not None:
-                        network.NetworkAdapterType = E.NetworkAdapterType(
-                            adapter_type)
-                    if is_primary:
-                        nic_index = network.NetworkConnectionIndex
-                    break
-
-        if nic_found is False:
-            raise EntityNotFoundException(
-                'VM Network with name \'%s\' not found.' % network_name)
-
-        if is_primary:
-            nic_index = int(nic_index.text)
-            net_conn_section.PrimaryNetworkConnectionIndex = \
-                E.PrimaryNetworkConnectionIndex(nic_index)
-
+        _update_nic_in_section(net_conn_section, network_name, nic_id,
+                               is_connected, is_primary, ip_address_mode,
+                               ip_address, adapter_type)
         return self.client.put_linked_resource(
             net_conn_section, RelationType.EDIT,
             EntityType.NETWORK_CONNECTION_SECTION.value, net_conn_section)
@@ -1428,7 +1398,7 @@ class VM(object):
         :return: dict which contains os section info
         :rtype: dict
         """
-        os_section = self.get_operating_system_section()
+        os_section = self._get_section('operatingSystemSection/')
         result = {}
         result['Info'] = os_section.Info
         result['Description'] = os_section.Description
@@ -1462,7 +1432,7 @@ class VM(object):
         :return: dict which contains gc section info
         :rtype: dict
         """
-        gc_section = self.get_guest_customization_section()
+        gc_section = self._get_section('guestCustomizationSection/')
         result = {}
 
         if hasattr(gc_section, 'Enabled'):
@@ -2044,3 +2014,356 @@ class VM(object):
         uri = self.href + '/action/enableNestedHypervisor'
         return self.client. \
             post_resource(uri=uri, contents=None, media_type=None)
+
+
+def _add_nic_to_section(net_conn_section, adapter_type, is_primary,
+                        is_connected, network_name, ip_address_mode,
+                        ip_address):
+    """Adds a NetworkConnection element to a NetworkConnectionSection.
+
+    :param lxml.objectify.ObjectifiedElement net_conn_section: the section to
+        be modified in place.
+
+    See VM.add_nic() for the description of the remaining parameters.
+    """
+    nic_index = 0
+    insert_index = net_conn_section.index(
+        net_conn_section['{' + NSMAP['ovf'] + '}Info']) + 1
+    # check if any nics exists
+    if hasattr(net_conn_section, 'PrimaryNetworkConnectionIndex'):
+        # calculate nic index and create the networkconnection object.
+        indices = [None] * 10
+        insert_index = net_conn_section.index(
+            net_conn_section.PrimaryNetworkConnectionIndex) + 1
+        if hasattr(net_conn_section, 'NetworkConnection'):
+            for nc in net_conn_section.NetworkConnection:
+                indices[int(nc.NetworkConnectionIndex.
+                            text)] = nc.NetworkConnectionIndex.text
+        nic_index = indices.index(None)
+        if is_primary:
+            net_conn_section.PrimaryNetworkConnectionIndex = \
+                E.PrimaryNetworkConnectionIndex(nic_index)
+
+    net_conn = E.NetworkConnection(network=network_name)
+    net_conn.set('needsCustomization', 'true')
+    net_conn.append(E.NetworkConnectionIndex(nic_index))
+    if ip_address_mode == IpAddressMode.MANUAL.value:
+        net_conn.append(E.IpAddress(ip_address))
+    else:
+        net_conn.append(E.IpAddress())
+    net_conn.append(E.IsConnected(is_connected))
+    net_conn.append(E.IpAddressAllocationMode(ip_address_mode))
+    net_conn.append(E.NetworkAdapterType(adapter_type))
+    net_conn_section.insert(insert_index, net_conn)
+
+
+def _update_nic_in_section(net_conn_section, network_name, nic_id,
+                           is_connected, is_primary, ip_address_mode,
+                           ip_address, adapter_type):
+    """Updates a NetworkConnection element of a NetworkConnectionSection.
+
+    :param lxml.objectify.ObjectifiedElement net_conn_section: the section to
+        be modified in place.
+
+    See VM.update_nic() for the description of the remaining parameters.
+
+    :raises: EntityNotFoundException: if the nic is not found.
+    """
+    nic_index = 0
+    nic_found = False
+    for network in net_conn_section.NetworkConnection:
+        if network.get('network') == network_name:
+            if network.NetworkConnectionIndex == nic_id:
+                nic_found = True
+                if ip_address is not None:
+                    network.IpAddress = E.IpAddress(ip_address)
+                network.IsConnected = E.IsConnected(is_connected)
+                if ip_address_mode is not None:
+                    network.IpAddressAllocationMode = \
+                        E.IpAddressAllocationMode(ip_address_mode)
+                if adapter_type is not None:
+                    network.NetworkAdapterType = E.NetworkAdapterType(
+                        adapter_type)
+                if is_primary:
+                    nic_index = network.NetworkConnectionIndex
+                break
+
+    if nic_found is False:
+        raise EntityNotFoundException(
+            'VM Network with name \'%s\' not found.' % network_name)
+
+    if is_primary:
+        nic_index = int(nic_index.text)
+        net_conn_section.PrimaryNetworkConnectionIndex = \
+            E.PrimaryNetworkConnectionIndex(nic_index)
+
+
+def _delete_nic_from_section(net_conn_section, index, vm_name):
+    """Removes a NetworkConnection element from a NetworkConnectionSection.
+
+    :param lxml.objectify.ObjectifiedElement net_conn_section: the section to
+        be modified in place.
+    :param int index: index of the nic to be deleted.
+    :param str vm_name: name of the vm, used in error messages.
+
+    :raises: InvalidParameterException: if a nic with the given index is
+        not found in the section.
+    """
+    indices = [None] * 10
+    nic_not_found = True
+    # find the nic with the given index
+    for nc in net_conn_section.NetworkConnection:
+        if int(nc.NetworkConnectionIndex.text) == index:
+            net_conn_section.remove(nc)
+            nic_not_found = False
+        else:
+            indices[int(nc.NetworkConnectionIndex.
+                        text)] = nc.NetworkConnectionIndex.text
+
+    if nic_not_found:
+        raise InvalidParameterException(
+            'Nic with index \'%s\' is not found in the VM \'%s\'' %
+            (index, vm_name))
+
+    # now indices will have all existing nic indices
+    prim_nic = next((i for i in indices if i is not None), None)
+    if prim_nic:
+        net_conn_section.PrimaryNetworkConnectionIndex = \
+            E.PrimaryNetworkConnectionIndex(prim_nic)
+
+
+class VmReconfiguration(object):
+    """Stages vm hardware and nic changes and applies them in one call.
+
+    Each of VM.modify_cpu(), VM.modify_memory(), VM.add_nic(),
+    VM.update_nic(), VM.delete_nic(), VM.update_vhs_disks() and
+    VApp.add_disk_to_vm() results in a separate reconfiguration task in vCD.
+    This class applies the same edits to a single copy of the vm's XML
+    representation and posts it to the vm's reconfigureVm link, so that all
+    the changes are carried out by one task.
+
+    Objects of this class are obtained via VM.reconfigure(). All the staging
+    methods return the object itself so that calls can be chained.
+    """
+
+    _RASD_RESOURCE_TYPE_CPU = 3
+    _RASD_RESOURCE_TYPE_MEMORY = 4
+    _RASD_RESOURCE_TYPE_DISK = 17
+
+    def __init__(self, vm):
+        """Constructor for VmReconfiguration object.
+
+        :param pyvcloud.vcd.vm.VM vm: the vm to be reconfigured.
+        """
+        self.vm = vm
+        self._resource = None
+        self._is_dirty = False
+
+    def _get_resource(self):
+        # The vm is fetched from vCD when the first change is staged, rather
+        # than reusing the possibly stale representation cached on the VM
+        # object, so that changes made elsewhere aren't overwritten. All the
+        # staged changes are then applied to that copy, until apply().
+        if self._resource is None:
+            self._resource = self.vm.client.get_resource(self.vm.href)
+        return self._resource
+
+    def _get_hardware_items(self):
+        resource = self._get_resource()
+        return resource['{' + NSMAP['ovf'] + '}VirtualHardwareSection'][
+            '{' + NSMAP['ovf'] + '}Item']
+
+    def _find_hardware_item(self, resource_type):
+        for item in self._get_hardware_items():
+            if int(item['{' + NSMAP['rasd'] + '}ResourceType']) == \
+                    resource_type:
+                return item
+        raise EntityNotFoundException(
+            'Virtual hardware item of type \'%s\' not found in VM \'%s\'.' %
+            (resource_type, self._get_resource().get('name')))
+
+    def modify_cpu(self, virtual_quantity, cores_per_socket=None):
+        """Stages an update of the number of CPUs of the vm.
+
+        :param int virtual_quantity: number of virtual CPUs to configure on the
+            vm.
+        :param int cores_per_socket: number of cores per socket.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+        """
+        if cores_per_socket is None:
+            cores_per_socket = virtual_quantity
+        item = self._find_hardware_item(self._RASD_RESOURCE_TYPE_CPU)
+        item['{' + NSMAP['rasd'] + '}ElementName'] = \
+            '%s virtual CPU(s)' % virtual_quantity
+        item['{' + NSMAP['rasd'] + '}VirtualQuantity'] = virtual_quantity
+        item['{' + NSMAP['vmw'] + '}CoresPerSocket'] = cores_per_socket
+        self._is_dirty = True
+        return self
+
+    def modify_memory(self, virtual_quantity):
+        """Stages an update of the memory of the vm.
+
+        :param int virtual_quantity: number of MB of memory to configure on the
+            vm.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+        """
+        item = self._find_hardware_item(self._RASD_RESOURCE_TYPE_MEMORY)
+        item['{' + NSMAP['rasd'] + '}ElementName'] = \
+            '%s MB of memory' % virtual_quantity
+        item['{' + NSMAP['rasd'] + '}VirtualQuantity'] = virtual_quantity
+        self._is_dirty = True
+        return self
+
+    def add_disk(self, disk_size):
+        """Stages the addition of a virtual hard disk to the vm.
+
+        It assumes that the vm has already at least one virtual hard disk and
+        will create another one with similar characteristics, attached to the
+        same disk controller as the last disk of the vm.
+
+        :param int disk_size: size of the disk to be added, in MBs.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+
+        :raises: EntityNotFoundException: if the vm has no virtual hard disk.
+        """
+        items = self._get_hardware_items()
+        disks = [item for item in items
+                 if int(item['{' + NSMAP['rasd'] + '}ResourceType']) ==
+                 self._RASD_RESOURCE_TYPE_DISK]
+        if len(disks) == 0:
+            raise EntityNotFoundException(
+                'VM \'%s\' has no virtual hard disk.' %
+                self._get_resource().get('name'))
+        last_disk = disks[-1]
+        parent = str(last_disk['{' + NSMAP['rasd'] + '}Parent'])
+        instance_id = max(
+            int(str(item['{' + NSMAP['rasd'] + '}InstanceID']))
+            for item in items) + 1
+        address = max(
+            int(str(disk['{' + NSMAP['rasd'] + '}AddressOnParent']))
+            for disk in disks
+            if str(disk['{' + NSMAP['rasd'] + '}Parent']) == parent) + 1
+
+        new_disk = deepcopy(last_disk)
+        new_disk['{' + NSMAP['rasd'] + '}AddressOnParent'] = address
+        new_disk['{' + NSMAP['rasd'] + '}ElementName'] = \
+            'Hard disk %s' % (len(disks) + 1)
+        new_disk['{' + NSMAP['rasd'] + '}InstanceID'] = instance_id
+        new_disk['{' + NSMAP['rasd'] + '}VirtualQuantity'] = \
+            disk_size * 1024 * 1024
+        new_disk['{' + NSMAP['rasd'] + '}HostResource'].set(
+            '{' + NSMAP['vcloud'] + '}capacity', str(disk_size))
+        last_disk.addnext(new_disk)
+        self._is_dirty = True
+        return self
+
+    def update_disk(self, element_name, virtual_quantity_in_bytes):
+        """Stages a resize of a virtual hard disk of the vm.
+
+        :param str element_name: name of the disk e.g. 'Hard disk 1'.
+        :param int virtual_quantity_in_bytes: new size of the disk in bytes.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+
+        :raises: EntityNotFoundException: if the disk is not found.
+        """
+        for item in self._get_hardware_items():
+            if int(item['{' + NSMAP['rasd'] + '}ResourceType']) == \
+                    self._RASD_RESOURCE_TYPE_DISK and \
+                    item['{' + NSMAP['rasd'] + '}ElementName'] == \
+                    element_name:
+                item['{' + NSMAP['rasd'] + '}VirtualQuantity'] = \
+                    virtual_quantity_in_bytes
+                item['{' + NSMAP['rasd'] + '}HostResource'].set(
+                    '{' + NSMAP['vcloud'] + '}capacity',
+                    str(virtual_quantity_in_bytes // (1024 * 1024)))
+                self._is_dirty = True
+                return self
+        raise EntityNotFoundException(
+            'Disk \'%s\' not found in VM \'%s\'.' %
+            (element_name, self._get_resource().get('name')))
+
+    def add_nic(self, adapter_type, is_primary, is_connected, network_name,
+                ip_address_mode, ip_address):
+        """Stages the addition of a nic to the vm.
+
+        See VM.add_nic() for the description of the parameters.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+        """
+        _add_nic_to_section(self._get_resource().NetworkConnectionSection,
+                            adapter_type, is_primary, is_connected,
+                            network_name, ip_address_mode, ip_address)
+        self._is_dirty = True
+        return self
+
+    def update_nic(self, network_name, nic_id=0, is_connected=False,
+                   is_primary=False, ip_address_mode=None, ip_address=None,
+                   adapter_type=None):
+        """Stages an update of a nic of the vm.
+
+        See VM.update_nic() for the description of the parameters.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+        """
+        _update_nic_in_section(self._get_resource().NetworkConnectionSection,
+                               network_name, nic_id, is_connected, is_primary,
+                               ip_address_mode, ip_address, adapter_type)
+        self._is_dirty = True
+        return self
+
+    def delete_nic(self, index):
+        """Stages the removal of a nic from the vm.
+
+        :param int index: index of the nic to be deleted.
+
+        :return: this object.
+
+        :rtype: pyvcloud.vcd.vm.VmReconfiguration
+        """
+        resource = self._get_resource()
+        _delete_nic_from_section(resource.NetworkConnectionSection, index,
+                                 resource.get('name'))
+        self._is_dirty = True
+        return self
+
+    def apply(self):
+        """Sends all the staged changes to vCD in a single request.
+
+        :return: an object containing EntityType.TASK XML data which represents
+            the asynchronous task that reconfigures the vm, or None if no
+            change was staged.
+
+        :rtype: lxml.objectify.ObjectifiedElement
+        """
+        if not self._is_dirty:
+            return None
+        resource = self._get_resource()
+        # VmSpecSection mirrors the hardware described in
+        # VirtualHardwareSection, drop it so that vCD doesn't reconcile the
+        # edited items against the stale values.
+        if hasattr(resource, 'VmSpecSection'):
+            resource.remove(resource.VmSpecSection)
+        task = self.vm.client.post_linked_resource(
+            resource, RelationType.RECONFIGURE_VM, EntityType.VM.value,
+            resource)
+        self._resource = None
+        self._is_dirty = False
+        # cached representation of the vm is stale from now on
+        self.vm.resource = None
+        return task
@@ -0,0 +1,201 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from pyvcloud.vcd.client import QueryResultFormat
+from pyvcloud.vcd.exceptions import EntityWaitTimeoutException
+from pyvcloud.vcd.exceptions import InvalidStateException
+
+DEFAULT_TIMEOUT_SEC = 600
+DEFAULT_MIN_INTERVAL_SEC = 1
+DEFAULT_MAX_INTERVAL_SEC = 30
+DEFAULT_BACKOFF_FACTOR = 1.5
+# number of entities refreshed by a single query, keeps the filter, and
+# hence the query url, reasonably short
+DEFAULT_BATCH_SIZE = 50
+
+_UUID_LENGTH = 36
+
+
+class EntityWaiter(object):
+    """Waits for many entities of the same type to reach a state.
+
+    Instead of fetching every entity on every poll, all pending entities are
+    refreshed with one typed query filtered by their ids, and the state is
+    evaluated on the fields of the query records, e.g. status, isBusy or
+    vmToolsStatus. When a poll makes no progress, the interval to the next
+    poll grows up to max_interval, and shrinks back to min_interval as soon
+    as some entity reaches the target state.
+
+        waiter = EntityWaiter(client, ResourceType.VM.value)
+        for href, record in waiter.iter_wait(vm_hrefs,
+                                             {'status': 'POWERED_ON'}):
+            ...
+    """
+
+    def __init__(self,
+                 client,
+                 resource_type,
+                 min_interval=DEFAULT_MIN_INTERVAL_SEC,
+                 max_interval=DEFAULT_MAX_INTERVAL_SEC,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        """Constructor for EntityWaiter objects.
+
+        :param pyvcloud.vcd.client.Client client: the client that will be used
+            to make REST calls to vCD.
+        :param str resource_type: type of the entities, as listed in the enum
+            pyvcloud.vcd.client.ResourceType e.g. 'vApp', 'vm',
+            'adminCatalogItem' or 'disk'.
+        :param float min_interval: time in seconds between polls, as long as
+            entities keep reaching the target state.
+        :param float max_interval: upper bound of the time in seconds
+            between polls.
+        :param float backoff_factor: factor by which the interval between
+            polls grows after a poll without progress.
+        :param int batch_size: maximum number of entities refreshed by a
+            single query.
+        """
+        self.client = client
+        self.resource_type = resource_type
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.batch_size = batch_size
+
+    def iter_wait(self,
+                  hrefs,
+                  target,
+                  timeout=DEFAULT_TIMEOUT_SEC,
+                  fail_on=None):
+        """Yields the entities as they reach the target state.
+
+        :param iterable hrefs: hrefs of the entities to wait for.
+        :param target: either a function with signature function(record)
+            returning True once the query record of an entity is in the
+            target state, or a dict of query field names and expected values
+            (a value can also be a list of acceptable values), e.g.
+            {'status': 'POWERED_ON', 'isBusy': False}.
+        :param float timeout: time in seconds to wait for all the entities.
+        :param fail_on: optional function or dict, in the same format as
+            target, describing states the entities are not expected to
+            reach, e.g. {'status': 'FAILED_CREATION'}.
+
+        :return: a generator yielding tuples of the href, as passed in hrefs,
+            and the query record of each entity reaching the target state.
+
+        :rtype: generator
+
+        :raises: InvalidStateException: if an entity reaches a state matched
+            by fail_on.
+        :raises: EntityWaitTimeoutException: if some entities haven't reached
+            the target state within the timeout.
+        """
+        is_target = _as_predicate(target)
+        is_failed = _as_predicate(fail_on) if fail_on is not None else None
+        pending = {_get_uuid(href): href for href in hrefs}
+        deadline = time.monotonic() + timeout
+        interval = self.min_interval
+        while pending:
+            progressed = False
+            uuids = list(pending)
+            for i in range(0, len(uuids), self.batch_size):
+                for record in self._query(uuids[i:i + self.batch_size]):
+                    uuid = _get_uuid(record.get('href'))
+                    if uuid not in pending:
+                        continue
+                    if is_failed is not None and is_failed(record):
+                        raise InvalidStateException(
+                            'Entity \'%s\' reached unexpected state.' %
+                            pending[uuid])
+                    if is_target(record):
+                        progressed = True
+                        yield pending.pop(uuid), record
+            if not pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise EntityWaitTimeoutException(
+                    '%d entities did not reach the expected state.' %
+                    len(pending), list(pending.values()))
+            if progressed:
+                interval = self.min_interval
+            else:
+                interval = min(interval * self.backoff_factor,
+                               self.max_interval)
+            time.sleep(min(interval, remaining))
+
+    def wait(self, hrefs, target, timeout=DEFAULT_TIMEOUT_SEC, fail_on=None):
+        """Waits for all the entities to reach the target state.
+
+        :param iterable hrefs: hrefs of the entities to wait for.
+        :param target: function or dict describing the target state, see
+            iter_wait().
+        :param float timeout: time in seconds to wait for all the entities.
+        :param fail_on: optional function or dict describing states the
+            entities are not expected to reach, see iter_wait().
+
+        :return: query records of the entities, keyed by href.
+
+        :rtype: dict
+
+        :raises: InvalidStateException: if an entity reaches a state matched
+            by fail_on.
+        :raises: EntityWaitTimeoutException: if some entities haven't reached
+            the target state within the timeout.
+        """
+        return dict(self.iter_wait(hrefs, target, timeout, fail_on))
+
+    def _query(self, uuids):
+        query = self.client.get_typed_query(
+            self.resource_type,
+            query_result_format=QueryResultFormat.RECORDS,
+            page_size=len(uuids),
+            qfilter=','.join('id==%s' % uuid for uuid in uuids))
+        return query.execute()
+
+
+def _get_uuid(href):
+    """Extracts the uuid of an entity from its href.
+
+    Works for both the user and admin views of an entity, e.g.
+    https://vcd/api/vApp/vm-<uuid> and https://vcd/api/admin/disk/<uuid>.
+
+    :param str href: href of the entity.
+
+    :return: uuid of the entity.
+
+    :rtype: str
+    """
+    return href.rstrip('/').split('/')[-1][-_UUID_LENGTH:]
+
+
+def _as_predicate(target):
+    if callable(target):
+        return target
+    expected = {}
+    for field, value in target.items():
+        if not isinstance(value, (list, tuple, set)):
+            value = [value]
+        expected[field] = {str(v).lower() for v in value}
+
+    def predicate(record):
+        for field, values in expected.items():
+            value = record.get(field)
+            if value is None or value.lower() not in values:
+                return False
+        return True
+    return predicate
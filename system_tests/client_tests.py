@@ -13,13 +13,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
 import unittest
 
 from pyvcloud.system_test_framework.base_test import BaseTestCase
 from pyvcloud.system_test_framework.environment import Environment
 
+from pyvcloud.vcd.cassette import RecordingTransport
+from pyvcloud.vcd.cassette import ReplayTransport
 import pyvcloud.vcd.client as client
+from pyvcloud.vcd.client_pool import ClientPool
 from pyvcloud.vcd.exceptions import VcdException
+from pyvcloud.vcd.hedging import HedgingPolicy
+from pyvcloud.vcd.multi_site import MultiSiteClient
+from pyvcloud.vcd.rate_limiter import AdaptiveRateLimiter
+from pyvcloud.vcd.rate_limiter import EndpointClass
+from pyvcloud.vcd.request_scheduler import RequestPriority
+from pyvcloud.vcd.request_scheduler import RequestScheduler
 
 
 class TestClient(BaseTestCase):
@@ -184,6 +196,128 @@ class TestClient(BaseTestCase):
         if unreachable_code:
             raise Exception("Login succeeded with bad host")
 
+    def test_0090_rate_limited_requests(self):
+        """Concurrent requests of a rate limited client all succeed."""
+        rate_limiter = AdaptiveRateLimiter(initial_limit=2, max_limit=4)
+        self._client = client.Client(
+            self._host, verify_ssl_certs=False, rate_limiter=rate_limiter)
+        creds = client.BasicLoginCredentials(self._user, self._org, self._pass)
+        self._client.set_credentials(creds)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda i: self._client.get_query_list(), range(16)))
+        self.assertEqual(16, len(results))
+        self.assertLessEqual(rate_limiter.get_limit(EndpointClass.GET), 4)
+
+    def test_0100_prioritized_requests(self):
+        """Requests of all priorities complete on a scheduled client."""
+        scheduler = RequestScheduler(max_concurrency=4,
+                                     reserved_concurrency=1)
+        self._client = client.Client(
+            self._host, verify_ssl_certs=False, request_scheduler=scheduler)
+        creds = client.BasicLoginCredentials(self._user, self._org, self._pass)
+        self._client.set_credentials(creds)
+
+        def sweep(i):
+            with self._client.request_priority(RequestPriority.LOW):
+                return self._client.get_query_list()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sweeps = executor.map(sweep, range(16))
+            org = self._client.get_resource(
+                self._client.get_org().get('href'),
+                priority=RequestPriority.HIGH)
+            self.assertEqual(16, len(list(sweeps)))
+        self.assertIsNotNone(org)
+
+    def test_0110_hedged_requests(self):
+        """GET requests of a hedging client succeed and are accounted for."""
+        # hedge aggressively, so that some requests actually get hedged
+        hedging_policy = HedgingPolicy(
+            percentile=50, min_delay=0, min_samples=1, max_hedge_ratio=0.5)
+        self._client = client.Client(
+            self._host, verify_ssl_certs=False, hedging_policy=hedging_policy)
+        creds = client.BasicLoginCredentials(self._user, self._org, self._pass)
+        self._client.set_credentials(creds)
+        for i in range(10):
+            self.assertIsNotNone(self._client.get_query_list())
+        stats = self._client.get_stats()['hedging']
+        self.assertGreaterEqual(stats['requests'], 10)
+        self.assertLessEqual(stats['hedge_wins'], stats['hedged'])
+
+    def test_0120_record_and_replay(self):
+        """Requests recorded to a cassette are replayed without vCD."""
+        fd, path = tempfile.mkstemp(suffix='.cassette')
+        os.close(fd)
+        try:
+            recorder = RecordingTransport(path)
+            recording_client = client.Client(
+                self._host, verify_ssl_certs=False, transport=recorder)
+            creds = client.BasicLoginCredentials(self._user, self._org,
+                                                 self._pass)
+            recording_client.set_credentials(creds)
+            recorded = recording_client.get_query_list()
+            token = recording_client.get_access_token() or \
+                recording_client.get_xvcloud_authorization_token()
+            recording_client.logout()
+            recorder.close()
+            with open(path) as f:
+                self.assertNotIn(token, f.read())
+
+            player = ReplayTransport(path, latency_scale=0)
+            replaying_client = client.Client(
+                self._host, verify_ssl_certs=False, transport=player)
+            replaying_client.set_credentials(creds)
+            replayed = replaying_client.get_query_list()
+            replaying_client.logout()
+            self.assertEqual(len(replayed), len(recorded))
+            self.assertEqual(player.get_stats()['unplayed'], 0)
+        finally:
+            os.remove(path)
+
+    def test_0130_client_pool(self):
+        """Pooled clients are reused until evicted by other ones."""
+        with ClientPool(max_sessions=1, verify_ssl_certs=False) as pool:
+            with pool.client(self._host, self._org, self._user,
+                             self._pass) as first_client:
+                self.assertIsNotNone(first_client.get_org())
+            with pool.client(self._host, self._org.upper(), self._user,
+                             self._pass) as second_client:
+                self.assertIs(second_client, first_client)
+            with self.assertRaises(VcdException):
+                with pool.client(self._host, self._org, self._user, '!!!'):
+                    self.fail("Pooled client handed out with bad password")
+            with pool.client('https://' + self._host, self._org, self._user,
+                             self._pass) as third_client:
+                self.assertIsNot(third_client, first_client)
+                self.assertEqual(third_client.get_api_version(),
+                                 first_client.get_api_version())
+            stats = pool.get_stats()
+            self.assertEqual(stats['logins'], 2)
+            self.assertEqual(stats['evictions'], 1)
+            self.assertEqual(stats['sessions'], 1)
+
+    def test_0140_multi_site_query(self):
+        """A typed query run on several sites returns the records of all."""
+        site_clients = [self._create_client_with_credentials(None)
+                        for i in range(2)]
+        try:
+            multi_site = MultiSiteClient({'east': site_clients[0],
+                                          'west': site_clients[1]})
+            results = multi_site.get_typed_query(
+                client.ResourceType.ORGANIZATION.value).execute()
+            names = {}
+            for site, record in results:
+                names.setdefault(site, []).append(record.get('name'))
+            self.assertEqual(results.errors, {})
+            self.assertEqual(sorted(results.completed_sites),
+                             ['east', 'west'])
+            self.assertIn(self._org, names['east'])
+            self.assertEqual(names['east'], names['west'])
+        finally:
+            for site_client in site_clients:
+                site_client.logout()
+
     def _create_client_with_credentials(self, api_version):
         """Create client with[out] explicit API version and login."""
         new_client = client.Client(
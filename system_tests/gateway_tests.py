@@ -670,6 +670,41 @@ class TestGateway(BaseTestCase):
                 break
         self.assertTrue(matchFound)
 
+    def test_0096_apply_firewall_rules(self):
+        """Apply a desired set of firewall rules to the gateway.
+
+        The desired set is made of the current user rules plus two new ones.
+        The first call should only add the new rules, applying the same set
+        again should leave the gateway unchanged. The new rules are removed
+        by applying the initial set.
+        """
+        gateway_obj = Gateway(TestGateway._client, self._name,
+                              TestGateway._gateway.get('href'))
+        current_rules = [
+            rule for rule in
+            gateway_obj.get_firewall_rules().firewallRules.iterchildren()
+            if hasattr(rule, 'ruleType') and
+            rule.ruleType.text.lower() == 'user'
+        ]
+        rule_name = 'Apply Rule Test ' + str(uuid1())
+        rules = current_rules + [
+            {'name': rule_name},
+            {'name': rule_name + ' 2', 'action': 'deny'}
+        ]
+        try:
+            result = gateway_obj.apply_firewall_rules(rules)
+            self.assertEqual(result['added'], 2)
+            self.assertEqual(result['removed'], 0)
+            self.assertEqual(result['unchanged'], len(current_rules))
+            result = gateway_obj.apply_firewall_rules(rules)
+            self.assertEqual(result['added'], 0)
+            self.assertEqual(result['removed'], 0)
+            self.assertEqual(result['unchanged'], len(current_rules) + 2)
+        finally:
+            result = gateway_obj.apply_firewall_rules(current_rules)
+        self.assertEqual(result['removed'], 2)
+        self.assertEqual(result['unchanged'], len(current_rules))
+
     def test_0100_add_dhcp_pool(self):
         """Add DHCP pool in the gateway.
          Invokes the add_dhcp_pool of the gateway.
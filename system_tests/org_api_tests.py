@@ -118,6 +118,7 @@ class TestApiClient(ApiBaseTestCase):
         org_api = OrgApi(api_client=TestApiClient._client)
 
         org_api.delete_org(org_urn=org_urn)
+        self.assertIsNotNone(TestApiClient._client.get_last_task())
         TestApiClient._client.wait_for_last_task()
 
 
@@ -105,6 +105,27 @@ class TestApiClient(ApiBaseTestCase):
                                                header_params=TestApiClient._client.default_headers)
         self.assertEqual(len(roles.values), 1)
 
+    def test_0075_iterate_roles(self):
+        """Iterate over all the roles.
+        Pages the roles collection, a few roles per page.
+        This test passes if the same roles are returned in the same order as
+        by a single page query, and the test role is among them.
+        """
+        self.assertIsNotNone(TestApiClient._client, msg="Login Failed or was not performed")
+        self.assertIsNotNone(TestApiClient._role, 'Role not created')
+        query_params = QueryParamsBuilder().set_page(1).set_page_size(
+            128).set_sort_asc('name').build()
+        roles = TestApiClient._client.call_api(method='GET',
+                                               resource_path='/1.0.0/roles',
+                                               query_params=query_params,
+                                               response_type=Roles)
+
+        names = [role.name for role in
+                 TestApiClient._client.iter_cloudapi_values(
+                     '/1.0.0/roles', Roles, sort_asc='name', page_size=3)]
+        self.assertEqual(names, [role.name for role in roles.values])
+        self.assertIn(TestApiClient._test_role_name, names)
+
     def test_0080_delete_role(self):
         """Delete a role.
         This test passes if the returned status code is 204.
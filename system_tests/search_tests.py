@@ -190,6 +190,54 @@ class TestSearch(BaseTestCase):
                 len(q2_result) >= 4,
                 "Expect at least 4 users from list: {0}".format(format))
 
+    def test_0070_sweep_with_cursor(self):
+        """Verify cursor paging returns the same records as offset paging."""
+        self._client = Environment.get_client_in_default_org(
+            CommonRoles.ORGANIZATION_ADMINISTRATOR)
+        q1 = self._client.get_typed_query(
+            ResourceType.USER.value,
+            query_result_format=QueryResultFormat.ID_RECORDS,
+            sort_asc='name')
+        offset_names = [r.get('name') for r in q1.execute()]
+
+        # small batches, so that the sweep spans several requests
+        q2 = self._client.get_typed_query(
+            ResourceType.USER.value,
+            query_result_format=QueryResultFormat.ID_RECORDS,
+            page_size=2,
+            cursor_key='name')
+        cursor_names = [r.get('name') for r in q2.execute()]
+        self.assertEqual(offset_names, cursor_names)
+
+    def test_0080_count(self):
+        """Verify counts match the number of records fetched."""
+        self._client = Environment.get_client_in_default_org(
+            CommonRoles.ORGANIZATION_ADMINISTRATOR)
+        q1 = self._client.get_typed_query(
+            ResourceType.USER.value,
+            query_result_format=QueryResultFormat.RECORDS)
+        records = list(q1.execute())
+        self.assertEqual(len(records), q1.count())
+
+        names = [records[0].get('name'), 'invalid_user_name']
+        counts = q1.group_count('name', names)
+        self.assertEqual({names[0]: 1, names[1]: 0}, counts)
+
+    def test_0090_search_across_types(self):
+        """Verify a federated search finds the default catalog."""
+        self._client = Environment.get_sys_admin_client()
+        catalog_name = Environment.get_default_catalog_name()
+        org_name = Environment.get_config()['vcd']['default_org_name']
+        records = self._client.search(catalog_name, orgs=[org_name])
+        self.assertIn(catalog_name, [r.get('name') for r in records])
+
+        hrefs = [r.get('href') for r in records]
+        self.assertEqual(len(hrefs), len(set(hrefs)),
+                         "Search results should be deduplicated")
+
+        records = self._client.search(catalog_name, limit=1)
+        self.assertEqual(1, len(records))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,121 @@
+# VMware vCloud Director Python SDK
+# Copyright (c) 2014-2019 VMware, Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from uuid import uuid1
+
+from pyvcloud.system_test_framework.base_test import BaseTestCase
+from pyvcloud.system_test_framework.environment import developerModeAware
+from pyvcloud.system_test_framework.environment import Environment
+
+from pyvcloud.vcd.exceptions import EntityNotFoundException
+from pyvcloud.vcd.operation_graph import OperationStatus
+from pyvcloud.vcd.tenant import provision_tenants
+from pyvcloud.vcd.tenant import TenantProvisioner
+from pyvcloud.vcd.tenant import TenantTeardown
+
+
+class TestTenant(BaseTestCase):
+    """Test tenant provisioning implemented in pyvcloud."""
+
+    # All tests in this module should be run as System Administrator
+    _client = None
+
+    _org_names = ['test_tenant_' + str(uuid1()) for i in range(2)]
+    _user_name = 'test_tenant_user'
+    _user_password = 'Pa$$w0rd'
+    _user_role = 'Organization Administrator'
+    _catalog_name = 'test_tenant_catalog'
+
+    @classmethod
+    def _get_spec(cls, org_name):
+        return {
+            'org': org_name,
+            'user': {
+                'name': cls._user_name,
+                'password': cls._user_password,
+                'role': cls._user_role
+            },
+            'catalog': {
+                'name': cls._catalog_name,
+                'description': 'Tenant catalog'
+            }
+        }
+
+    def test_0000_setup(self):
+        TestTenant._client = Environment.get_sys_admin_client()
+
+    def test_0010_provision_tenants(self):
+        """Test the method provision_tenants().
+
+        This test passes if the org, user and catalog of each tenant are
+        created.
+        """
+        graph = provision_tenants(
+            TestTenant._client,
+            [TestTenant._get_spec(name) for name in TestTenant._org_names])
+        for operation in graph.list_operations():
+            self.assertEqual(operation.status, OperationStatus.SUCCEEDED,
+                             '%s: %s' % (operation.name, operation.error))
+        self.assertEqual(len(graph.list_operations()), 6)
+
+    def test_0020_provision_existing_tenant(self):
+        """Test the method TenantProvisioner.provision() on an existing tenant.
+
+        This test passes if all the operations are skipped.
+        """
+        provisioner = TenantProvisioner(
+            TestTenant._client, TestTenant._get_spec(TestTenant._org_names[0]))
+        graph = provisioner.provision()
+        for operation in graph.list_operations():
+            self.assertEqual(operation.status, OperationStatus.SKIPPED)
+
+    def test_0030_teardown_tenant(self):
+        """Test the method TenantTeardown.run().
+
+        This test passes if all the operations succeed and the org is gone.
+        """
+        org_name = TestTenant._org_names[0]
+        teardown = TenantTeardown(
+            TestTenant._client, org_name, delete_org=True)
+        graph = teardown.run()
+        operations = graph.list_operations()
+        self.assertNotEqual(len(operations), 0)
+        for operation in operations:
+            self.assertEqual(operation.status, OperationStatus.SUCCEEDED,
+                             '%s: %s' % (operation.name, operation.error))
+        with self.assertRaises(EntityNotFoundException):
+            TestTenant._client.get_org_by_name(org_name)
+
+        # nothing left to do when run again
+        graph = teardown.run()
+        self.assertEqual(len(graph.list_operations()), 0)
+
+    @developerModeAware
+    def test_9998_teardown(self):
+        """Delete the orgs created by the tests."""
+        for org_name in TestTenant._org_names:
+            graph = TenantTeardown(
+                TestTenant._client, org_name, delete_org=True).run()
+            for operation in graph.list_operations():
+                self.assertEqual(operation.status, OperationStatus.SUCCEEDED)
+
+    def test_9999_cleanup(self):
+        """Release all resources held by this object for testing purposes."""
+        TestTenant._client.logout()
+
+
+if __name__ == '__main__':
+    unittest.main()
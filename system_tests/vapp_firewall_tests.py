@@ -154,6 +154,32 @@ class TestVappFirewall(BaseTestCase):
             d['Name'] == TestVappFirewall._test_firewall_rule_name for d in
             result))
 
+    def test_0070_firewall_rule_transaction(self):
+        vapp_firewall = VappFirewall(
+            TestVappFirewall._client,
+            vapp_name=TestVappFirewall._vapp_name,
+            network_name=TestVappFirewall._network_name)
+        rule_names = [TestVappFirewall._test_firewall_rule_name + str(i)
+                      for i in range(3)]
+        with vapp_firewall.transaction() as transaction:
+            for rule_name in rule_names:
+                self.assertIsNone(
+                    vapp_firewall.add_firewall_rule(name=rule_name))
+        result = TestVappFirewall._client.get_task_monitor().wait_for_success(
+            task=transaction.task)
+        self.assertEqual(result.get('status'), TaskStatus.SUCCESS.value)
+        vapp_firewall._reload()
+        result = vapp_firewall.list_firewall_rule()
+        for rule_name in rule_names:
+            self.assertTrue(any(d['Name'] == rule_name for d in result))
+
+        with vapp_firewall.transaction() as transaction:
+            for rule_name in rule_names:
+                vapp_firewall.delete_firewall_rule(rule_name)
+        result = TestVappFirewall._client.get_task_monitor().wait_for_success(
+            task=transaction.task)
+        self.assertEqual(result.get('status'), TaskStatus.SUCCESS.value)
+
     @developerModeAware
     def test_9998_teardown(self):
         """Test the  method vdc.delete_vapp().
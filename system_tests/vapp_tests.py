@@ -27,12 +27,14 @@ from pyvcloud.system_test_framework.utils import \
 from pyvcloud.system_test_framework.utils import create_empty_vapp
 
 from pyvcloud.vcd.client import find_link
+from pyvcloud.vcd.client import get_metadata_filter
 from pyvcloud.vcd.client import IpAddressMode
 from pyvcloud.vcd.client import MetadataDomain
 from pyvcloud.vcd.client import MetadataVisibility
 from pyvcloud.vcd.client import NetworkAdapterType
 from pyvcloud.vcd.client import NSMAP
 from pyvcloud.vcd.client import RelationType
+from pyvcloud.vcd.client import ResourceType
 from pyvcloud.vcd.client import EntityType
 from pyvcloud.vcd.client import TaskStatus
 from pyvcloud.vcd.exceptions import EntityNotFoundException
@@ -40,6 +42,7 @@ from pyvcloud.vcd.system import System
 from pyvcloud.vcd.vapp import VApp
 from pyvcloud.vcd.vdc import VDC
 from pyvcloud.vcd.vm import VM
+from pyvcloud.vcd.waiter import EntityWaiter
 from pyvcloud.vcd.utils import metadata_to_dict
 from pyvcloud.system_test_framework.depends import depends
 
@@ -356,6 +359,16 @@ class TestVApp(BaseTestCase):
         self.assertEqual(result.get('status'), TaskStatus.SUCCESS.value)
         # end state of vApp is deployed and partially powered on.
 
+    def test_0051_wait_for_vapps(self):
+        """Test the method EntityWaiter.wait().
+
+        This test passes if both vApps are reported as no longer busy.
+        """
+        hrefs = [TestVApp._empty_vapp_href, TestVApp._customized_vapp_href]
+        waiter = EntityWaiter(TestVApp._client, ResourceType.VAPP.value)
+        records = waiter.wait(hrefs, {'isBusy': False}, timeout=300)
+        self.assertEqual(sorted(records.keys()), sorted(hrefs))
+
     # Inconsistent behavior with CI CD and locally working fine.
     # def test_0052_suspend_vapp(self):
     #     logger = Environment.get_default_logger()
@@ -647,6 +660,17 @@ class TestVApp(BaseTestCase):
         self.assertEqual(TestVApp._metadata_new_value,
                          entries[TestVApp._metadata_key])
 
+        # retrieve metadata of the vApps in bulk, through the query service
+        vdc = Environment.get_test_vdc(TestVApp._client)
+        vapps_metadata = vdc.get_vapps_metadata(
+            [TestVApp._metadata_key],
+            qfilter=get_metadata_filter(TestVApp._metadata_key,
+                                        TestVApp._metadata_new_value))
+        self.assertEqual(
+            {vapp.href: {
+                TestVApp._metadata_key: TestVApp._metadata_new_value}},
+            vapps_metadata)
+
         # remove metadata entry
         logger.debug(f'Removing metadata with '
                      'key={TestVApp._metadata_key} from vApp:{vapp_name}.')
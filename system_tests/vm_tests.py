@@ -313,6 +313,32 @@ class TestVM(BaseTestCase):
         task = vm.power_on()
         TestVM._client.get_task_monitor().wait_for_success(task)
 
+    def test_0051_reconfigure_vm(self):
+        """Test batched reconfiguration of cpu and memory of a vm.
+
+        The test passes if a single reconfiguration task succeeds and the
+        values retrieved thereafter match the expected values.
+        """
+        vm = VM(TestVM._client, href=TestVM._test_vapp_first_vm_href)
+        # vm can be updated only when it's powered off
+        if not vm.is_powered_off():
+            task = vm.power_off()
+            TestVM._client.get_task_monitor().wait_for_success(task)
+            vm.reload()
+        task = vm.reconfigure().modify_cpu(
+            TestVM._test_vapp_first_vm_num_cpu).modify_memory(
+                TestVM._test_vapp_first_vm_memory_size).apply()
+        result = TestVM._client.get_task_monitor().wait_for_success(task)
+        self.assertEqual(result.get('status'), TaskStatus.SUCCESS.value)
+        vm.reload()
+        self.assertEqual(vm.get_cpus()['num_cpus'],
+                         TestVM._test_vapp_first_vm_num_cpu)
+        self.assertEqual(vm.get_memory(),
+                         TestVM._test_vapp_first_vm_memory_size)
+        # power the vm back on
+        task = vm.power_on()
+        TestVM._client.get_task_monitor().wait_for_success(task)
+
     def test_0060_vm_power_operations(self):
         """Test the method related to power operations in vm.py.
         This test passes if all the power operations are successful.